@@ -0,0 +1,250 @@
+"""
+Task activity log: who changed what on a task, and when.
+
+Every change to a task (a save from the views or the admin, a bulk change,
+an import, a delete) appends a TaskActivity row with the user who made it
+and a diff of Task.AUDITED_FIELDS. Logging adds no per-change INSERTs to a
+request: entries are buffered while it runs and written with one
+bulk_create when it ends (ActivityMiddleware). An entry joins the buffer
+only once the transaction that made its change commits, so rolled-back
+changes leave no trace. Outside a request (commands, jobs, the shell)
+entries are written as their transaction commits, one bulk_create per
+change set, and have no actor.
+
+Diffs are packed into compact JSON keyed by one-letter field codes, with
+datetimes as epoch seconds and the description as a changed flag only:
+
+    {"s":["TODO","DONE"],"a":[3,7]}
+
+The table only grows by date, so `prune()` (run periodically by core.jobs)
+deletes rows older than TASK_ACTIVITY_RETENTION_DAYS in batches off the
+created_at index, and `timeline()` reads one task's history off
+task_activity_timeline_idx.
+"""
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DatabaseError, router, transaction
+from django.utils import timezone
+
+from .models import Task, TaskActivity
+
+logger = logging.getLogger(__name__)
+
+FIELD_CODES = {
+    'title': 't',
+    'description': 'x',
+    'assigned_to_id': 'a',
+    'status': 's',
+    'priority': 'p',
+    'due_date': 'd',
+}
+FIELDS_BY_CODE = {code: name for name, code in FIELD_CODES.items()}
+assert set(FIELD_CODES) == set(Task.AUDITED_FIELDS)
+
+# The "before" of a created task and the "after" of a deleted one.
+NOTHING = dict.fromkeys(FIELD_CODES)
+
+BATCH_SIZE = 500
+
+
+# --- Packed diffs ---
+
+def _pack(value):
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return value
+
+
+def _unpack(name, value):
+    if name == 'due_date' and value is not None:
+        return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+    return value
+
+
+def diff(old, new):
+    """
+    The packed diff between two {field: value} dicts, over the audited
+    fields present in both. Empty when nothing audited changed.
+    """
+    changes = {}
+    for name, code in FIELD_CODES.items():
+        if name not in old or name not in new:
+            continue
+        if name == 'description':
+            if (old[name] or '') != (new[name] or ''):
+                changes[code] = 1
+        elif old[name] != new[name]:
+            changes[code] = [_pack(old[name]), _pack(new[name])]
+    return json.dumps(changes, separators=(',', ':')) if changes else ''
+
+
+def unpack(packed):
+    """{field: (old, new)} of a packed diff; the description maps to (None, None)."""
+    changes = {}
+    for code, values in json.loads(packed or '{}').items():
+        name = FIELDS_BY_CODE[code]
+        if name == 'description':
+            changes[name] = (None, None)
+        else:
+            changes[name] = tuple(_unpack(name, value) for value in values)
+    return changes
+
+
+def values(task):
+    """{field: value} of the audited fields `task` has loaded."""
+    deferred = task.get_deferred_fields()
+    return {name: getattr(task, name) for name in FIELD_CODES if name not in deferred}
+
+
+# --- Buffered writes ---
+
+class ActivityBuffer:
+    """The entries of one request, written together by flush()."""
+
+    def __init__(self, actor=None):
+        # A user or the request's lazy user; read when the first entry is made.
+        self.actor = actor
+        self.entries = []
+
+    @property
+    def actor_id(self):
+        if self.actor is None or not self.actor.is_authenticated:
+            return None
+        return self.actor.pk
+
+    def flush(self):
+        entries, self.entries = self.entries, []
+        if not entries:
+            return
+        try:
+            TaskActivity.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+        except DatabaseError:
+            # The changes themselves are committed; don't fail the request.
+            logger.exception("Could not write %d task activity entries", len(entries))
+
+
+_buffer = ContextVar('task_activity_buffer', default=None)
+
+
+def activate(buffer):
+    """Collect entries in `buffer` until deactivate(token); returns the token."""
+    return _buffer.set(buffer)
+
+
+def deactivate(token):
+    _buffer.reset(token)
+
+
+@contextmanager
+def buffered(actor=None):
+    """Log the changes made inside the block as `actor`, written once on exit."""
+    buffer = ActivityBuffer(actor)
+    token = activate(buffer)
+    try:
+        yield buffer
+    finally:
+        deactivate(token)
+        buffer.flush()
+
+
+def entry(task_id, action, old, new):
+    """An unsaved TaskActivity for a change, or None if nothing audited changed."""
+    packed = diff(old, new)
+    if not packed and action == TaskActivity.Action.UPDATED:
+        return None
+    buffer = _buffer.get()
+    return TaskActivity(
+        task_id=task_id,
+        actor_id=buffer.actor_id if buffer else None,
+        action=action,
+        diff=packed,
+    )
+
+
+def record(entries):
+    """Log `entries` (None items are skipped) once the current transaction commits."""
+    entries = [item for item in entries if item is not None]
+    if not entries:
+        return
+
+    def add():
+        buffer = _buffer.get()
+        if buffer is not None:
+            buffer.entries.extend(entries)
+        else:
+            TaskActivity.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+
+    transaction.on_commit(add, using=router.db_for_write(Task))
+
+
+def record_saved(task, created):
+    if created:
+        record([entry(task.pk, TaskActivity.Action.CREATED, NOTHING, values(task))])
+    else:
+        record([entry(task.pk, TaskActivity.Action.UPDATED, getattr(task, '_loaded_values', {}), values(task))])
+
+
+def record_deleted(task):
+    record([entry(task.pk, TaskActivity.Action.DELETED, values(task), NOTHING)])
+
+
+# --- Reading and pruning ---
+
+def timeline(task_id, limit=50):
+    """
+    The task's latest `limit` entries, newest first, each with `changes`:
+    [(field label, old, new)] with choices and assignees shown by name.
+    Two queries: the entries and the users they mention.
+    """
+    entries = list(TaskActivity.objects.filter(task_id=task_id).order_by('-id')[:limit])
+    user_ids = {item.actor_id for item in entries}
+    for item in entries:
+        item.unpacked = unpack(item.diff)
+        user_ids.update(item.unpacked.get('assigned_to_id', ()))
+    user_ids.discard(None)
+    usernames = dict(User.objects.filter(pk__in=user_ids).values_list('pk', 'username')) if user_ids else {}
+
+    displays = {
+        'status': dict(Task.Status.choices),
+        'priority': dict(Task.Priority.choices),
+        'assigned_to_id': usernames,
+    }
+    for item in entries:
+        item.actor_name = usernames.get(item.actor_id)
+        item.changes = [
+            (
+                Task._meta.get_field(name.removesuffix('_id')).verbose_name,
+                *(displays[name].get(value, value) if name in displays else value for value in pair),
+            )
+            for name, pair in item.unpacked.items()
+        ]
+    return entries
+
+
+def prune(now=None, batch_size=None):
+    """
+    Delete the entries older than TASK_ACTIVITY_RETENTION_DAYS (None keeps
+    them all), `batch_size` at a time. Returns how many were deleted.
+    """
+    if not settings.TASK_ACTIVITY_RETENTION_DAYS:
+        return 0
+    cutoff = (now or timezone.now()) - timedelta(days=settings.TASK_ACTIVITY_RETENTION_DAYS)
+    batch_size = batch_size or settings.TASK_JOBS_BATCH_SIZE
+    deleted = 0
+    while True:
+        pks = list(
+            TaskActivity.objects.filter(created_at__lt=cutoff)
+            .order_by('created_at').values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            break
+        deleted += TaskActivity.objects.filter(pk__in=pks).delete()[0]
+        if len(pks) < batch_size:
+            break
+    return deleted
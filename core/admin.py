@@ -1,10 +1,29 @@
+from functools import partial
+
 from django.contrib import admin
 
 # Register your models here.
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
-from .models import Profile, Task
+from django.core.exceptions import PermissionDenied
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.contrib import messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.conf import settings
+from django.db.models import Prefetch
+from .bulk import bulk_change_tasks
+from .forms import TaskBulkChangeForm, TaskBulkValuesForm, TaskImportForm
+from .importer import import_tasks, read_rows
+from .models import Profile, Task, TaskDependency
+from .pagination import EstimatedCountPaginator
+from .search import get_backend as search_backend
+
+# Row errors listed on the admin import page; the rest are only counted.
+IMPORT_ERRORS_SHOWN = 200
 
 # --- 1. Custom User Admin for Inline Profile Editing ---
 
@@ -22,6 +41,13 @@ class UserAdmin(BaseUserAdmin):
     """
     inlines = (ProfileInline,)
 
+    def get_inline_instances(self, request, obj=None):
+        # The post_save signal creates the Profile, so only offer the
+        # inline once the user exists.
+        if obj is None:
+            return []
+        return super().get_inline_instances(request, obj)
+
 # Re-register the User model
 admin.site.unregister(User)
 admin.site.register(User, UserAdmin)
@@ -29,16 +55,111 @@ admin.site.register(User, UserAdmin)
 
 # --- 2. Task Model Registration ---
 
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Filter on a foreign key through the admin's autocomplete select, so the
+    sidebar doesn't list every related object (every User, for assignees).
+    The related model's admin needs search_fields.
+    """
+    template = 'admin/core/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.form_field = field.formfield(
+            widget=AutocompleteSelect(field, model_admin.admin_site),
+            required=False,
+        )
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    @property
+    def value(self):
+        values = self.used_parameters.get(self.lookup_kwarg)
+        return values[-1] if values else None
+
+    def rendered_widget(self):
+        # Looks up only the selected object, if any.
+        return self.form_field.widget.render(
+            self.lookup_kwarg, self.value, attrs={'id': f'filter_{self.lookup_kwarg}'},
+        )
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.value is None,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'display': 'All',
+        }
+
+
+class TaskChangeList(ChangeList):
+    def get_queryset(self, request, exclude_parameters=None):
+        # Descriptions can be long and the list doesn't show them. The
+        # assignee and creator of the page's rows are fetched in one query
+        # each: with a JOIN instead, SQLite's planner starts from auth_user
+        # and sorts the whole task table to find the first page.
+        users = User.objects.only('id', 'username')
+        return super().get_queryset(request, exclude_parameters).defer('description').prefetch_related(
+            Prefetch('assigned_to', queryset=users),
+            Prefetch('created_by', queryset=users),
+        )
+
+
+class TaskActionForm(ActionForm, TaskBulkValuesForm):
+    """The admin action bar, plus the values the bulk actions set."""
+
+    def __init__(self, *args, admin_site=admin.site, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Autocomplete instead of a <select> with every user.
+        field = Task._meta.get_field('assigned_to')
+        self.fields['assigned_to'] = field.formfield(widget=AutocompleteSelect(field, admin_site), required=False)
+
+
+class BlockedByInline(admin.TabularInline):
+    """
+    The tasks that block this one. Saving checks for cycles and updates
+    the task's status (see core.dependencies).
+    """
+    model = TaskDependency
+    fk_name = 'blocked'
+    fields = ('blocker',)
+    autocomplete_fields = ('blocker',)
+    extra = 0
+    verbose_name = 'Blocked by'
+    verbose_name_plural = 'Blocked by'
+
+
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
     """
     Customizes the display of the Task model in the admin interface.
+
+    The changelist is built for millions of rows: assignee/creator are
+    loaded per page, not per row, is_overdue is a stored column, user filters
+    use autocomplete instead of listing every user, and with
+    settings.TASK_ADMIN_LARGE_TABLES (the default) the paginator counts
+    only up to EstimatedCountPaginator.exact_limit (core.pagination, 10_000)
+    rows and the date hierarchy (a DISTINCT over all dates) is off.
     """
     list_display = ('title', 'assigned_to', 'status', 'priority', 'due_date', 'created_by', 'is_overdue')
+
+    # Loaded by TaskChangeList with prefetch_related; an empty tuple (not
+    # False) also stops the changelist adding its own select_related().
+    list_select_related = ()
     
-    list_filter = ('status', 'priority', 'assigned_to', 'created_at', 'due_date')
+    list_filter = (
+        'status', 'priority',
+        ('assigned_to', AutocompleteFilter),
+        ('created_by', AutocompleteFilter),
+        'created_at', 'due_date',
+    )
     
     search_fields = ('title', 'description', 'assigned_to__username')
+
+    autocomplete_fields = ('assigned_to',)
+
+    inlines = (BlockedByInline,)
     
     date_hierarchy = 'created_at' # Allows navigating by date
     
@@ -55,6 +176,34 @@ class TaskAdmin(admin.ModelAdmin):
             'classes': ('collapse',), # Optional: collapse this section by default
         }),
     )
+
+    def __init__(self, model, admin_site):
+        super().__init__(model, admin_site)
+        # The action bar's autocomplete asks this site, not the default one.
+        self.action_form = partial(TaskActionForm, admin_site=admin_site)
+        if settings.TASK_ADMIN_LARGE_TABLES:
+            self.date_hierarchy = None
+            # The "N total" link next to search results is a second full COUNT.
+            self.show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return TaskChangeList
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        if settings.TASK_ADMIN_LARGE_TABLES:
+            return EstimatedCountPaginator(queryset, per_page, orphans, allow_empty_first_page)
+        return super().get_paginator(request, queryset, per_page, orphans, allow_empty_first_page)
+
+    def get_search_results(self, request, queryset, search_term):
+        # The search index covers the same fields as search_fields without
+        # a LIKE scan over every description.
+        if not search_term.strip():
+            return queryset, False
+        return search_backend().filter(queryset, search_term), False
+
+    @property
+    def media(self):
+        return super().media + AutocompleteSelect(Task._meta.get_field('assigned_to'), self.admin_site).media
     
     # Automatically set the 'created_by' field when saving a new task
     def save_model(self, request, obj, form, change):
@@ -66,15 +215,72 @@ class TaskAdmin(admin.ModelAdmin):
     # but still show it.
     readonly_fields = ('created_by',)
     
-    # Custom method to check if the task is overdue (requires import)
+    # The stored flag (see core.overdue); sorting uses its column.
+    @admin.display(boolean=True, description='Overdue', ordering='overdue_since')
     def is_overdue(self, obj):
-        from django.utils import timezone
-        if obj.due_date and obj.status != 'DONE':
-            return obj.due_date < timezone.now()
-        return False
-    
-    is_overdue.boolean = True
-    is_overdue.short_description = 'Overdue'
+        return obj.is_overdue
+
+    # --- Bulk changes (core.bulk) ---
+    # Each action reads its value from the matching field next to the
+    # action dropdown and runs as chunked UPDATEs, not a save() per task.
+
+    action_form = TaskActionForm
+    actions = ['set_status', 'set_priority', 'reassign', 'shift_due_dates']
+
+    def _bulk_change(self, request, queryset, operation):
+        form = TaskBulkChangeForm({**request.POST.dict(), 'operation': operation})
+        if not form.is_valid():
+            self.message_user(request, ' '.join(form.non_field_errors()) or form.errors.as_text(), messages.ERROR)
+            return
+        count = bulk_change_tasks(queryset, **form.changes())
+        self.message_user(request, f"Updated {count} task(s).", messages.SUCCESS)
+
+    @admin.action(description='Set status of selected tasks', permissions=['change'])
+    def set_status(self, request, queryset):
+        self._bulk_change(request, queryset, 'status')
+
+    @admin.action(description='Set priority of selected tasks', permissions=['change'])
+    def set_priority(self, request, queryset):
+        self._bulk_change(request, queryset, 'priority')
+
+    @admin.action(description='Reassign selected tasks', permissions=['change'])
+    def reassign(self, request, queryset):
+        self._bulk_change(request, queryset, 'assigned_to')
+
+    @admin.action(description='Shift due dates of selected tasks', permissions=['change'])
+    def shift_due_dates(self, request, queryset):
+        self._bulk_change(request, queryset, 'shift_days')
+
+    # --- Bulk import (core.importer) ---
+
+    change_list_template = 'admin/core/task/change_list.html'
+
+    def get_urls(self):
+        urls = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='core_task_import'),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        result = None
+        if request.method == 'POST':
+            form = TaskImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                upload = form.cleaned_data['file']
+                result = import_tasks(read_rows(upload, upload.name), created_by=request.user)
+        else:
+            form = TaskImportForm()
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import tasks',
+            'form': form,
+            'result': result,
+            'shown_errors': result.errors[:IMPORT_ERRORS_SHOWN] if result else [],
+        }
+        return TemplateResponse(request, 'admin/core/task/import.html', context)
 
 
 # --- 3. Profile Model Registration (Optional) ---
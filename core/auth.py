@@ -0,0 +1,29 @@
+"""
+Authentication backend that loads the user and their Profile together.
+
+AuthenticationMiddleware resolves request.user once per request through
+the backend's get_user(). Selecting the profile in the same query means
+request.user.profile is already loaded, so views and templates reading it
+cost no further query. Every user has a Profile: core.signals creates it
+with the user.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+
+class ProfileBackend(ModelBackend):
+    def get_user(self, user_id):
+        try:
+            user = UserModel._default_manager.select_related('profile').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        try:
+            user = await UserModel._default_manager.select_related('profile').aget(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
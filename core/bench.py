@@ -0,0 +1,171 @@
+"""
+Helpers shared by the benchmark management commands and the test suite.
+
+Benchmarks never touch the real database: `benchmark_database()` creates a
+throwaway copy of the schema (the same way the test runner does), seeds it,
+and drops it again when the benchmark finishes.
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import Client
+from django.utils import timezone
+
+from .models import Profile, Task
+from .search import get_backend as search_backend
+from . import stats as task_stats
+
+STATUSES = [choice for choice, _ in Task.Status.choices]
+PRIORITIES = [choice for choice, _ in Task.Priority.choices]
+
+FIRST_NAMES = ('Alice', 'Bilal', 'Chen', 'Dara', 'Elena', 'Farid', 'Grace', 'Hiro', 'Ines', 'Jonas', 'Kemi', 'Luca')
+LAST_NAMES = ('Okafor', 'Silva', 'Novak', 'Haddad', 'Kim', 'Larsen', 'Mehta', 'Rossi', 'Tanaka', 'Weber')
+
+
+@contextmanager
+def benchmark_database(alias='default'):
+    """
+    Run the enclosed block against a freshly migrated scratch database.
+
+    SQLite scratch databases are files (not :memory:) so that timings and
+    EXPLAIN plans reflect real page I/O and several threads can share them.
+    """
+    connection = connections[alias]
+    scratch_file = None
+    if connection.vendor == 'sqlite':
+        scratch_file = os.path.join(tempfile.mkdtemp(prefix='taskbench-'), 'bench.sqlite3')
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = scratch_file
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        if scratch_file:
+            os.rmdir(os.path.dirname(scratch_file))
+
+
+def create_users(count, prefix='bench'):
+    """Create `count` plain users (and their empty profiles) and return them with their ids."""
+    User.objects.bulk_create(
+        [User(username=f"{prefix}{i}", password='!') for i in range(count)],
+        batch_size=1000,
+    )
+    users = list(User.objects.filter(username__startswith=prefix).order_by('id'))
+    # bulk_create skips the post_save signal that creates profiles.
+    Profile.objects.bulk_create([Profile(user=user) for user in users], batch_size=1000)
+    return users
+
+
+def seed_dataset(user_count, task_count, prefix='load', seed=0):
+    """
+    A realistic data set: `user_count` named users, each with a Profile,
+    and `task_count` tasks spread over them as seed_tasks() does. Returns
+    the users.
+    """
+    rng = random.Random(seed)
+    User.objects.bulk_create([
+        User(
+            username=f"{prefix}{i}", email=f"{prefix}{i}@example.com", password='!',
+            first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+        )
+        for i in range(user_count)
+    ], batch_size=1000)
+    users = list(User.objects.filter(username__startswith=prefix).order_by('id'))
+    # bulk_create skips the post_save signal that creates profiles.
+    Profile.objects.bulk_create([
+        Profile(user=user, full_name=user.get_full_name(), bio=f"Seeded profile of {user.username}.")
+        for user in users
+    ], batch_size=1000)
+    seed_tasks(users, task_count, seed=seed)
+    return users
+
+
+def seed_tasks(users, count, batch_size=5000, seed=0):
+    """
+    Bulk insert `count` tasks round-robin over `users`.
+
+    Status, priority and due date are spread over every choice (due dates
+    cover 30 days in the past to 30 days ahead, with one in seven tasks
+    undated), so every filter in task_list has something to match.
+    Instances are built one batch at a time to keep memory flat.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    creator = users[0]
+    for start in range(0, count, batch_size):
+        batch = []
+        for i in range(start, min(start + batch_size, count)):
+            task = Task(
+                title=f"Task {i}",
+                description=f"Seeded description for task {i} " * 4,
+                assigned_to=users[i % len(users)],
+                created_by=creator,
+                status=STATUSES[i % len(STATUSES)],
+                priority=PRIORITIES[(i // len(STATUSES)) % len(PRIORITIES)],
+                due_date=None if i % 7 == 0 else now + timedelta(minutes=rng.randint(-30 * 1440, 30 * 1440)),
+            )
+            task.refresh_overdue(now)
+            batch.append(task)
+        Task.objects.bulk_create(batch)
+        # bulk_create skips save() and the post_save signals that maintain
+        # the overdue flag, the index and the analytics counters.
+        search_backend().index_tasks(task.pk for task in batch)
+    task_stats.reconcile()
+
+
+def analyze(connection):
+    """Refresh planner statistics after bulk loading."""
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+@contextmanager
+def count_queries(connection):
+    """
+    Collect the SQL run on `connection` in the enclosed block into the
+    yielded list. Unlike CaptureQueriesContext it also sees test Client
+    requests, whose request_started signal resets connection.queries.
+    """
+    queries = []
+
+    def record(execute, sql, *args):
+        queries.append(sql)
+        return execute(sql, *args)
+
+    with connection.execute_wrapper(record):
+        yield queries
+
+
+def time_call(func, repeat=5):
+    """Run `func` `repeat` times and return (best, median) in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return min(samples), statistics.median(samples)
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    """{'p50': ..., 'p95': ..., 'p99': ...} of `samples` (nearest-rank)."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {f'p{point}': None for point in points}
+    return {
+        f'p{point}': ordered[min(len(ordered) - 1, max(0, round(point / 100 * len(ordered)) - 1))]
+        for point in points
+    }
+
+
+def logged_in_client(user):
+    """A test Client with a session for `user`."""
+    client = Client()
+    client.force_login(user)
+    return client
@@ -0,0 +1,99 @@
+"""
+Set-based task changes for the admin actions and the task list's
+multi-select.
+
+A change to any number of tasks is a handful of UPDATE statements (one per
+CHUNK_SIZE ids) instead of a save() per task. Since those skip the model
+signals, updated_at is set explicitly (the calendar feed's ETag and
+Last-Modified depend on it), so is the stored overdue flag,
+tasks_bulk_changed is sent so the search index and analytics counters
+follow, new assignees get a notification (core.notifications) and each
+task's change goes in the activity log (core.activity).
+"""
+from datetime import timedelta
+
+from django.db import router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task, TaskActivity
+from . import activity
+from .notifications import notify_assigned
+from .overdue import overdue_since_expression
+from .signals import tasks_bulk_changed
+
+# Ids per UPDATE, comfortably under SQLite's bound-parameter limit.
+CHUNK_SIZE = 1000
+
+# The values the analytics counters are kept by (see core.stats).
+STAT_FIELDS = Task.TRACKED_FIELDS
+
+
+def bulk_change_tasks(tasks, status=None, priority=None, assigned_to=None, shift_days=None, chunk_size=CHUNK_SIZE):
+    """
+    Apply the given changes to every task in the `tasks` queryset and
+    return how many were changed. `shift_days` moves due dates by that many
+    days (undated tasks stay undated).
+    """
+    changes = {}
+    if status is not None:
+        changes['status'] = status
+    if priority is not None:
+        changes['priority'] = priority
+    if assigned_to is not None:
+        changes['assigned_to'] = assigned_to
+    if shift_days:
+        changes['due_date'] = F('due_date') + timedelta(days=shift_days)
+    if not changes:
+        return 0
+
+    changed_fields = set(changes)
+    changes['updated_at'] = timezone.now()
+    if status is not None or shift_days:
+        changes['overdue_since'] = overdue_since_expression(changes['updated_at'], status, changes.get('due_date'))
+    with transaction.atomic(using=router.db_for_write(Task)):
+        # The old values, for the counter deltas and the activity log.
+        rows = list(tasks.order_by().values('pk', *STAT_FIELDS, *(('due_date',) if shift_days else ())))
+        if not rows:
+            return 0
+        task_ids = [row['pk'] for row in rows]
+        new_rows = [_new_values(row, status, priority, assigned_to, shift_days) for row in rows]
+        # Live views resync for the old assignees as well as the new one.
+        user_ids = {row['assigned_to_id'] for row in rows}
+        if assigned_to is not None:
+            user_ids.add(assigned_to.pk)
+        for start in range(0, len(task_ids), chunk_size):
+            Task.objects.filter(pk__in=task_ids[start:start + chunk_size]).update(**changes)
+        if assigned_to is not None:
+            notify_assigned([row['pk'] for row in rows if row['assigned_to_id'] != assigned_to.pk], assigned_to.pk)
+        activity.record(
+            activity.entry(row['pk'], TaskActivity.Action.UPDATED, row, new)
+            for row, new in zip(rows, new_rows)
+        )
+        done_changed = []
+        if status is not None:
+            done_changed = [row['pk'] for row in rows if (row['status'] == Task.Status.DONE) != (status == Task.Status.DONE)]
+        tasks_bulk_changed.send(
+            sender=Task, task_ids=task_ids, user_ids=user_ids, fields=changed_fields,
+            stat_changes=[(_stat_values(row), _stat_values(new)) for row, new in zip(rows, new_rows)],
+            done_changed=done_changed,
+        )
+    return len(task_ids)
+
+
+def _stat_values(row):
+    return tuple(row[name] for name in STAT_FIELDS)
+
+
+def _new_values(row, status, priority, assigned_to, shift_days):
+    """The values bulk_change_tasks() wrote over the old `row`."""
+    new = dict(row)
+    if status is not None:
+        new['status'] = status
+    if priority is not None:
+        new['priority'] = priority
+    if assigned_to is not None:
+        new['assigned_to_id'] = assigned_to.pk
+    if shift_days and row['due_date'] is not None:
+        new['due_date'] = row['due_date'] + timedelta(days=shift_days)
+    return new
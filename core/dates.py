@@ -0,0 +1,47 @@
+"""
+Date windows for due_date filters.
+
+Filtering with `due_date__date=...` wraps the column in a DATE() cast,
+which no index can serve, and evaluates the day in UTC. These helpers turn
+a calendar day (or run of days) in the user's timezone into a half-open
+[start, end) pair of aware datetimes that can be compared with the raw
+column instead.
+
+The user's timezone is the active Django timezone, which
+core.middleware.UserTimezoneMiddleware sets per request.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+
+def local_today():
+    """Today's date in the active (user's) timezone."""
+    return timezone.localdate()
+
+
+def start_of_day(day, tz=None):
+    """Midnight at the start of `day` in `tz` (default: active timezone)."""
+    return timezone.make_aware(datetime.combine(day, time.min), tz or timezone.get_current_timezone())
+
+
+def days_window(first_day, days=1, tz=None):
+    """
+    [start, end) covering `days` calendar days from `first_day`.
+
+    Both ends are local midnights, so DST transitions inside the window
+    give 23 or 25 hour days rather than shifting the boundaries.
+    """
+    return start_of_day(first_day, tz), start_of_day(first_day + timedelta(days=days), tz)
+
+
+def day_window(day, tz=None):
+    """[start, end) covering a single calendar day."""
+    return days_window(day, 1, tz)
+
+
+def due_within(window, field='due_date'):
+    """Q matching `field` inside a [start, end) window."""
+    start, end = window
+    return Q(**{f'{field}__gte': start, f'{field}__lt': end})
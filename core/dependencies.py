@@ -0,0 +1,211 @@
+"""
+Task dependencies: "A blocks B" edges between tasks, and the BLOCKED
+status that follows from them.
+
+The edges form a directed acyclic graph; `check_acyclic()` walks
+downstream from the new edge's target one level per query before it is
+added. A TODO task with an unfinished blocker is BLOCKED, and goes back to
+TODO once its last blocker is done. Tasks already in progress keep their
+status (waiting_tasks() still lists them), so nothing someone set by hand
+is overwritten. Statuses only change through blockers crossing DONE
+(either way) and through edges coming and going, so propagation is
+incremental: `blockers_changed()` recomputes just the direct dependents of
+the tasks that crossed, one set-based pass through core.bulk, which keeps
+the search index, activity log and live views current and moves the
+analytics counters by the changed rows' deltas (never a recount of the
+task table). A blocked task moving between TODO and BLOCKED doesn't change
+whether its own dependents are waiting (they wait for DONE), so the walk
+stops there.
+
+Every read runs off the two adjacency indexes: (blocker, blocked) from the
+unique constraint for downstream walks, task_dependency_blocked_idx for
+"is anything still blocking this task". `ready_tasks()` and
+`waiting_tasks()` are plain EXISTS filters; `critical_path()` loads the
+edges between unfinished tasks once per graph change and caches the
+longest chain through them.
+"""
+from collections import defaultdict, deque
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Exists, OuterRef
+
+from .models import Task, TaskDependency
+from . import bulk
+
+DONE = Task.Status.DONE
+# Open statuses that can be picked up; only TODO turns into BLOCKED.
+WORKABLE_STATUSES = (Task.Status.TODO, Task.Status.IN_PROGRESS)
+
+# Ids per IN list, as in core.bulk.
+CHUNK_SIZE = 1000
+
+# Bumped on every change that can move the critical path. With a
+# per-process cache other processes don't see the bump, so a cached path
+# also expires after CRITICAL_PATH_TTL seconds.
+GRAPH_VERSION_KEY = 'task-dependencies:version'
+CRITICAL_PATH_TTL = 60
+
+
+def unfinished_blockers(task=OuterRef('pk')):
+    """The dependencies of `task` (a task id or OuterRef) whose blocker isn't done."""
+    return TaskDependency.objects.filter(blocked=task).exclude(blocker__status=DONE)
+
+
+def ready_tasks(tasks):
+    """Those of `tasks` that are open and not waiting on any blocker: what can be picked up next."""
+    return tasks.filter(~Exists(unfinished_blockers()), status__in=WORKABLE_STATUSES)
+
+
+def waiting_tasks(tasks):
+    """Those of `tasks` that have an unfinished blocker."""
+    return tasks.filter(Exists(unfinished_blockers()))
+
+
+def downstream(task_ids, batch_size=CHUNK_SIZE):
+    """The ids of the tasks that `task_ids` directly block."""
+    task_ids = list(task_ids)
+    dependents = set()
+    for start in range(0, len(task_ids), batch_size):
+        dependents.update(
+            TaskDependency.objects.filter(blocker_id__in=task_ids[start:start + batch_size])
+            .values_list('blocked_id', flat=True)
+        )
+    return dependents
+
+
+def check_acyclic(blocker_id, blocked_id):
+    """Raise ValidationError if `blocker_id` blocking `blocked_id` would close a cycle."""
+    if blocker_id == blocked_id:
+        raise ValidationError("A task can't block itself.")
+    seen, frontier = {blocked_id}, {blocked_id}
+    while frontier:
+        frontier = downstream(frontier) - seen
+        if blocker_id in frontier:
+            raise ValidationError(
+                f"Task {blocker_id} already depends on task {blocked_id}; this would create a cycle."
+            )
+        seen |= frontier
+
+
+def add_dependency(blocker, blocked):
+    """Make `blocker` block `blocked` (tasks), after checking for cycles; returns the TaskDependency."""
+    dependency = TaskDependency(blocker=blocker, blocked=blocked)
+    # save() does the cycle check (clean()'s), under a lock.
+    dependency.clean_fields()
+    dependency.validate_unique()
+    dependency.validate_constraints()
+    dependency.save()
+    return dependency
+
+
+def remove_dependency(blocker, blocked):
+    TaskDependency.objects.filter(blocker=blocker, blocked=blocked).delete()
+
+
+def refresh_blocked(task_ids):
+    """
+    Bring the statuses of `task_ids` in line with their blockers: TODO
+    tasks are BLOCKED while any is unfinished and back to TODO once none
+    is; IN_PROGRESS tasks keep their status. Tasks with no dependencies
+    that were set to BLOCKED by hand are only passed in when they just lost
+    one, and then follow the same rule.
+    """
+    task_ids = list(task_ids)
+    for start in range(0, len(task_ids), CHUNK_SIZE):
+        tasks = Task.objects.filter(pk__in=task_ids[start:start + CHUNK_SIZE])
+        bulk.bulk_change_tasks(
+            tasks.filter(Exists(unfinished_blockers()), status=Task.Status.TODO),
+            status=Task.Status.BLOCKED,
+        )
+        bulk.bulk_change_tasks(
+            tasks.filter(~Exists(unfinished_blockers()), status=Task.Status.BLOCKED),
+            status=Task.Status.TODO,
+        )
+
+
+def blockers_changed(task_ids):
+    """
+    Called with the tasks that moved to or from DONE; recomputes what they
+    block. The cached critical path is only dropped when one of them is on
+    an edge, so the usual status changes of unrelated tasks keep it.
+    """
+    task_ids = list(task_ids)
+    dependents = downstream(task_ids)
+    if dependents:
+        graph_changed()
+        refresh_blocked(dependents)
+    elif has_blockers(task_ids):
+        graph_changed()
+
+
+def has_blockers(task_ids, batch_size=CHUNK_SIZE):
+    """Whether any of `task_ids` is blocked by another task (done or not)."""
+    return any(
+        TaskDependency.objects.filter(blocked_id__in=task_ids[start:start + batch_size]).exists()
+        for start in range(0, len(task_ids), batch_size)
+    )
+
+
+def graph_changed():
+    """Invalidate the cached critical path."""
+    try:
+        cache.incr(GRAPH_VERSION_KEY)
+    except ValueError:
+        cache.set(GRAPH_VERSION_KEY, 1, None)
+
+
+def critical_path():
+    """
+    The ids of the longest chain of unfinished tasks, each blocking the
+    next, in order (ties go to the lowest ids); empty when no unfinished
+    task blocks another. Cached until the graph or a blocker's status
+    changes (see CRITICAL_PATH_TTL).
+
+    There is one path for the whole graph, whoever the tasks are assigned
+    to: the task list's "critical" filter shows the user's own tasks on it,
+    which may be none or a broken-up part of it.
+    """
+    version = cache.get_or_set(GRAPH_VERSION_KEY, 1, None)
+    key = f'task-dependencies:critical-path:{version}'
+    path = cache.get(key)
+    if path is None:
+        path = longest_path(
+            TaskDependency.objects.exclude(blocker__status=DONE).exclude(blocked__status=DONE)
+            .values_list('blocker_id', 'blocked_id').iterator(chunk_size=10_000)
+        )
+        cache.set(key, path, CRITICAL_PATH_TTL)
+    return path
+
+
+def longest_path(edges):
+    """The longest path through a DAG given as (from, to) pairs, in one topological pass."""
+    successors = defaultdict(list)
+    indegree = defaultdict(int)
+    for source, target in edges:
+        successors[source].append(target)
+        indegree[target] += 1
+        indegree.setdefault(source, 0)
+    if not successors:
+        return []
+
+    # length[node]: nodes on the longest path ending at node.
+    length = dict.fromkeys(indegree, 1)
+    previous = {}
+    queue = deque(sorted(node for node, degree in indegree.items() if degree == 0))
+    while queue:
+        node = queue.popleft()
+        step = length[node] + 1
+        for target in successors[node]:
+            if step > length[target] or (step == length[target] and node < previous[target]):
+                length[target] = step
+                previous[target] = node
+            indegree[target] -= 1
+            if not indegree[target]:
+                queue.append(target)
+
+    end = min(length, key=lambda node: (-length[node], node))
+    path = [end]
+    while path[-1] in previous:
+        path.append(previous[path[-1]])
+    return path[::-1]
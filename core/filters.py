@@ -0,0 +1,116 @@
+"""
+The task filter set shared by task_list and the task export.
+
+`filter_tasks()` applies the task_list query parameters (q, status,
+priority, assigned_to, date_filter, dependency, sort) to a queryset, so a bookmarked
+list URL and an export of it always select the same tasks.
+"""
+from datetime import timedelta
+
+from .dates import day_window, days_window, due_within, local_today
+from .search import get_backend as search_backend
+from . import dependencies
+
+# ?sort= value -> ORDER BY field.
+SORT_OPTIONS = {
+    'due_date': 'due_date',  # Ascending: oldest first
+    '-due_date': '-due_date',  # Descending: newest first
+    'priority': 'priority',  # Low to High (LOW, MEDIUM, HIGH, CRITICAL)
+    '-priority': '-priority',  # High to Low (CRITICAL, HIGH, MEDIUM, LOW)
+    'created_at': 'created_at',  # Oldest first
+    '-created_at': '-created_at',  # Newest first
+    'title': 'title',  # A-Z
+    '-title': '-title',  # Z-A
+    'status': 'status',  # Status order
+}
+
+DATE_FILTERS = ('today', 'tomorrow', 'week', 'overdue', 'no_date')
+
+DEPENDENCY_FILTERS = ('ready', 'waiting', 'critical')
+
+
+def filter_tasks(tasks, params, user=None):
+    """
+    Restrict and order `tasks` by the query parameters in `params` (a
+    QueryDict or plain dict). Users other than superusers only see their
+    own tasks and can't filter by assignee; `user=None` means unrestricted
+    (management commands).
+
+    Returns (tasks, filters): the active filter values, normalised, with
+    'sort_by' falling back to 'due_date' for unknown sorts.
+    """
+    restricted = user is not None and not user.is_superuser
+    if restricted:
+        tasks = tasks.filter(assigned_to=user)
+
+    filters = {
+        'search_query': (params.get('q') or '').strip(),
+        'status_filter': params.get('status') or '',
+        'priority_filter': params.get('priority') or '',
+        'assigned_to_filter': '' if restricted else params.get('assigned_to') or '',
+        'date_filter': params.get('date_filter') or '',
+        'dependency_filter': params.get('dependency') or '',
+        'sort_by': params.get('sort') or 'due_date',
+    }
+
+    # Matches title, description and the assignee's names through the
+    # search index (see core.search) instead of scanning with LIKE.
+    if filters['search_query']:
+        tasks = search_backend().filter(tasks, filters['search_query'])
+    if filters['status_filter'] not in ('', 'all'):
+        tasks = tasks.filter(status=filters['status_filter'])
+    if filters['priority_filter'] not in ('', 'all'):
+        tasks = tasks.filter(priority=filters['priority_filter'])
+    # Anything but a user id (a hand-edited URL) is ignored.
+    if filters['assigned_to_filter'].isdigit():
+        tasks = tasks.filter(assigned_to__id=filters['assigned_to_filter'])
+
+    # Days are the user's local days, as [start, end) ranges on the raw
+    # due_date column so the due_date indexes apply.
+    date_filter = filters['date_filter']
+    today = local_today()
+    if date_filter == 'today':
+        tasks = tasks.filter(due_within(day_window(today)))
+    elif date_filter == 'tomorrow':
+        tasks = tasks.filter(due_within(day_window(today + timedelta(days=1))))
+    elif date_filter == 'week':
+        # Today through the 7th day from now, inclusive.
+        tasks = tasks.filter(due_within(days_window(today, 8)))
+    elif date_filter == 'overdue':
+        # The stored flag (see core.overdue), on its partial indexes.
+        tasks = tasks.filter(overdue_since__isnull=False)
+    elif date_filter == 'no_date':
+        tasks = tasks.filter(due_date__isnull=True)
+
+    # Off the dependency indexes (see core.dependencies).
+    dependency_filter = filters['dependency_filter']
+    if dependency_filter == 'ready':
+        tasks = dependencies.ready_tasks(tasks)
+    elif dependency_filter == 'waiting':
+        tasks = dependencies.waiting_tasks(tasks)
+    elif dependency_filter == 'critical':
+        # The path is over every user's tasks; this keeps the visible ones.
+        tasks = tasks.filter(pk__in=dependencies.critical_path())
+
+    # Best match first; only meaningful while searching.
+    if filters['sort_by'] == 'relevance' and filters['search_query']:
+        tasks = search_backend().rank(tasks, filters['search_query'])
+    else:
+        filters['sort_by'] = SORT_OPTIONS.get(filters['sort_by'], 'due_date')
+        tasks = tasks.order_by(filters['sort_by'])
+    return tasks, filters
+
+
+def filter_params(filters):
+    """The query parameters that reproduce `filters` (as returned by filter_tasks)."""
+    return {
+        key: filters[name] for key, name in (
+            ('q', 'search_query'),
+            ('status', 'status_filter'),
+            ('priority', 'priority_filter'),
+            ('date_filter', 'date_filter'),
+            ('dependency', 'dependency_filter'),
+            ('assigned_to', 'assigned_to_filter'),
+            ('sort', 'sort_by'),
+        ) if filters[name]
+    }
@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.models import User
 from .models import Profile, Task
+from . import thumbnails
 
 # --- User Authentication Forms ---
 class SignUpForm(forms.ModelForm):
@@ -26,6 +27,26 @@ class ProfileUpdateForm(forms.ModelForm):
     class Meta:
         model = Profile
         fields = ["full_name", "phone", "bio", "profile_image"]
+
+    def save(self, commit=True):
+        """
+        Store a new upload under its content hash (reusing an identical
+        file if there is one) and build its renditions.
+        """
+        profile = super().save(commit=False)
+        if 'profile_image' in self.changed_data:
+            upload = self.cleaned_data.get('profile_image')
+            if upload:
+                name, profile.image_hash = thumbnails.store_original(upload)
+                # A plain name marks the file as already stored, so the
+                # field doesn't save a second copy under profiles/.
+                profile.profile_image = name
+                thumbnails.generate_renditions(name, profile.image_hash)
+            else:
+                profile.image_hash = ''
+        if commit:
+            profile.save()
+        return profile
 # forms.py
 
 from django import forms
@@ -53,4 +74,47 @@ class TaskForm(forms.ModelForm):
         for field in self.fields.values():
             field.widget.attrs.update({
                 'class': 'form-control'
-            })
\ No newline at end of file
+            })
+
+
+class TaskImportForm(forms.Form):
+    file = forms.FileField(
+        help_text="CSV with a header row, or JSON Lines (.jsonl); either may be gzipped (.gz). "
+                  "Columns: title, description, status, priority, due_date, assigned_to (username).",
+    )
+
+
+
+class TaskBulkValuesForm(forms.Form):
+    """The new values a bulk change can set; see core.bulk."""
+    status = forms.ChoiceField(choices=[('', 'Status...')] + Task.Status.choices, required=False)
+    priority = forms.ChoiceField(choices=[('', 'Priority...')] + Task.Priority.choices, required=False)
+    assigned_to = forms.ModelChoiceField(
+        queryset=User.objects.only('id', 'username').order_by('username'),
+        required=False, empty_label='Assignee...',
+    )
+    shift_days = forms.IntegerField(required=False, min_value=-3650, max_value=3650)
+
+
+class TaskBulkChangeForm(TaskBulkValuesForm):
+    """One bulk operation and its value, for the task list multi-select."""
+    OPERATIONS = (
+        ('status', 'Set status'),
+        ('priority', 'Set priority'),
+        ('assigned_to', 'Reassign'),
+        ('shift_days', 'Shift due dates (days)'),
+    )
+
+    operation = forms.ChoiceField(choices=OPERATIONS)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        operation = cleaned_data.get('operation')
+        if operation and cleaned_data.get(operation) in (None, ''):
+            raise forms.ValidationError(f"Choose a value to {dict(self.OPERATIONS)[operation].lower()}.")
+        return cleaned_data
+
+    def changes(self):
+        """Keyword arguments for bulk_change_tasks()."""
+        operation = self.cleaned_data['operation']
+        return {operation: self.cleaned_data[operation]}
\ No newline at end of file
@@ -0,0 +1,256 @@
+"""
+Bulk task import.
+
+Rows (dicts with title, description, status, priority, due_date and
+assigned_to as a username; the export's other columns are ignored, so an
+export can be imported back) are checked a batch at a time against the
+Task field rules, and each batch that passes is written with one
+bulk_create in its own transaction. Assignee usernames are resolved with
+one query per batch for the names not seen before, never one per row.
+
+Invalid rows are skipped and reported with their row number; the rest of
+the file is still imported. So are lines that can't be parsed (bad JSON,
+or JSON that isn't an object). A file that can't be read any further (not
+UTF-8, a truncated or corrupt .gz) is reported at the row where it broke
+off, and the rows before it are kept. Used by `manage.py import_tasks` and the
+"Import tasks" page of the task admin.
+"""
+import csv
+import gzip
+import io
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.db import router, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .dates import start_of_day
+from .models import Task, TaskActivity
+from .signals import tasks_bulk_changed
+from . import activity
+
+BATCH_SIZE = 1000
+
+TITLE_MAX_LENGTH = Task._meta.get_field('title').max_length
+
+
+def _choice_lookup(choices):
+    """Accept a choice by value or label, case-insensitively: 'in_progress', 'In Progress'."""
+    lookup = {}
+    for value, label in choices:
+        lookup[value.lower()] = value
+        lookup[str(label).lower()] = value
+    return lookup
+
+
+STATUS_LOOKUP = _choice_lookup(Task.Status.choices)
+PRIORITY_LOOKUP = _choice_lookup(Task.Priority.choices)
+DEFAULT_STATUS = Task._meta.get_field('status').default
+DEFAULT_PRIORITY = Task._meta.get_field('priority').default
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.errors = []  # (row number, message)
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+class UnreadableRow:
+    """A row read_rows() couldn't parse; import_tasks() reports it like an invalid row."""
+
+    def __init__(self, message):
+        self.message = message
+
+
+# What reading a damaged file raises: UnicodeDecodeError (a ValueError),
+# gzip.BadGzipFile (an OSError), EOFError for a truncated .gz, csv.Error.
+READ_ERRORS = (ValueError, UnicodeDecodeError, OSError, EOFError, csv.Error)
+
+
+def read_rows(file, name=''):
+    """
+    Rows of a binary file: CSV with a header line, or JSON Lines when the
+    name ends in .jsonl/.ndjson. A trailing .gz is decompressed on the fly.
+    Lines that can't be parsed come out as UnreadableRow, and so does the
+    point where the file can't be read any further, which ends the rows.
+    """
+    if name.endswith('.gz'):
+        file, name = gzip.GzipFile(fileobj=file), name[:-3]
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    if name.endswith(('.jsonl', '.ndjson')):
+        return _read_errors_as_rows(_json_rows(text))
+    return _read_errors_as_rows(csv.DictReader(text))
+
+
+def _json_rows(lines):
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield UnreadableRow(f"invalid JSON: {exc}")
+            continue
+        yield row if isinstance(row, dict) else UnreadableRow("not a JSON object")
+
+
+def _read_errors_as_rows(rows):
+    rows = iter(rows)
+    while True:
+        try:
+            row = next(rows)
+        except StopIteration:
+            return
+        except READ_ERRORS as exc:
+            yield UnreadableRow(f"unreadable file from here on: {exc}")
+            return
+        yield row
+
+
+def import_tasks(rows, created_by=None, batch_size=BATCH_SIZE):
+    """Validate and insert `rows`; returns an ImportResult."""
+    result = ImportResult()
+    assignees = {}
+    task_ids, user_ids, stat_changes = [], set(), []
+    started = time.perf_counter()
+    try:
+        batch = []
+        for row in rows:
+            result.rows += 1
+            batch.append((result.rows, row))
+            if len(batch) == batch_size:
+                _import_batch(batch, created_by, assignees, result, task_ids, user_ids, stat_changes)
+                batch = []
+        if batch:
+            _import_batch(batch, created_by, assignees, result, task_ids, user_ids, stat_changes)
+    finally:
+        # bulk_create skips post_save; bring the search index and analytics
+        # counters up to date for every batch that was committed.
+        if task_ids:
+            tasks_bulk_changed.send(sender=Task, task_ids=task_ids, user_ids=user_ids, stat_changes=stat_changes)
+        result.elapsed = time.perf_counter() - started
+    return result
+
+
+def _import_batch(batch, created_by, assignees, result, task_ids, user_ids, stat_changes):
+    unseen = {
+        _text(row, 'assigned_to', []) for _, row in batch if not isinstance(row, UnreadableRow)
+    } - assignees.keys() - {'', None}
+    if unseen:
+        found = dict(User.objects.filter(username__in=unseen).values_list('username', 'pk'))
+        for username in unseen:
+            assignees[username] = found.get(username)
+
+    tasks = []
+    for number, row in batch:
+        if isinstance(row, UnreadableRow):
+            result.errors.append((number, row.message))
+            continue
+        task, errors = _build_task(row, assignees)
+        if errors:
+            result.errors.append((number, '; '.join(errors)))
+            continue
+        task.created_by = created_by
+        # bulk_create skips save(), which sets the stored overdue flag.
+        task.refresh_overdue()
+        tasks.append(task)
+
+    if not tasks:
+        return
+    with transaction.atomic(using=router.db_for_write(Task)):
+        Task.objects.bulk_create(tasks)
+        activity.record(
+            activity.entry(task.pk, TaskActivity.Action.CREATED, activity.NOTHING, activity.values(task))
+            for task in tasks
+        )
+    result.created += len(tasks)
+    task_ids.extend(task.pk for task in tasks)
+    user_ids.update(task.assigned_to_id for task in tasks)
+    stat_changes.extend((None, (task.assigned_to_id, task.status, task.priority)) for task in tasks)
+
+
+def _build_task(row, assignees):
+    """An unsaved Task for `row`, or (None, errors)."""
+    errors = []
+
+    title = _text(row, 'title', errors)
+    if title == '':
+        errors.append("title is required")
+    elif title and len(title) > TITLE_MAX_LENGTH:
+        errors.append(f"title is longer than {TITLE_MAX_LENGTH} characters")
+
+    status = _text(row, 'status', errors)
+    status = STATUS_LOOKUP.get(status.lower()) if status else DEFAULT_STATUS
+    if status is None:
+        errors.append(f"unknown status {row.get('status')!r}")
+
+    priority = _text(row, 'priority', errors)
+    priority = PRIORITY_LOOKUP.get(priority.lower()) if priority else DEFAULT_PRIORITY
+    if priority is None:
+        errors.append(f"unknown priority {row.get('priority')!r}")
+
+    due_date, error = _parse_due_date(_text(row, 'due_date', errors))
+    if error:
+        errors.append(error)
+
+    username = _text(row, 'assigned_to', errors)
+    assigned_to_id = assignees.get(username)
+    if username == '':
+        errors.append("assigned_to is required")
+    elif username and assigned_to_id is None:
+        errors.append(f"unknown user {username!r}")
+
+    description = _text(row, 'description', errors, strip=False)
+
+    if errors:
+        return None, errors
+    return Task(
+        title=title,
+        description=description,
+        status=status,
+        priority=priority,
+        due_date=due_date,
+        assigned_to_id=assigned_to_id,
+    ), None
+
+
+def _text(row, name, errors, strip=True):
+    """
+    The row's `name` value as a string, '' when missing. JSON Lines rows
+    can hold numbers, lists and so on: those are recorded in `errors` and
+    give None.
+    """
+    value = row.get(name)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        errors.append(f"{name} must be text, not {type(value).__name__}")
+        return None
+    return value.strip() if strip else value
+
+
+def _parse_due_date(value):
+    """(aware datetime or None, error message or None)."""
+    if not value:
+        return None, None
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                return None, f"due_date {value!r} is not a date"
+            # A bare date means the start of that day, as the task form does.
+            return start_of_day(day), None
+    except ValueError:
+        return None, f"due_date {value!r} is not a valid date"
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed, None
@@ -0,0 +1,80 @@
+"""
+Periodic background jobs, run by `manage.py run_jobs`.
+
+Each job is a function called every `interval` seconds (read from a
+setting, so it can be tuned per deployment). The runner is a plain loop in
+one worker process; jobs are idempotent, so running a second worker, or
+`run_jobs --once` from cron instead, is safe.
+"""
+import logging
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    name: str
+    func: str  # dotted path, imported when the job first runs
+    interval_setting: str
+
+    @property
+    def interval(self):
+        return getattr(settings, self.interval_setting)
+
+    def run(self):
+        return import_string(self.func)()
+
+
+JOBS = [
+    Job('overdue_sweep', 'core.overdue.sweep', 'TASK_OVERDUE_SWEEP_SECONDS'),
+    Job('notifications', 'core.notifications.deliver', 'TASK_NOTIFY_DIGEST_SECONDS'),
+    Job('activity_prune', 'core.activity.prune', 'TASK_ACTIVITY_PRUNE_SECONDS'),
+]
+
+
+def get_jobs(names=None):
+    jobs = {job.name: job for job in JOBS}
+    if not names:
+        return list(jobs.values())
+    unknown = set(names) - set(jobs)
+    if unknown:
+        raise KeyError(', '.join(sorted(unknown)))
+    return [jobs[name] for name in names]
+
+
+def run_job(job):
+    """
+    Run `job` once. Returns (result, milliseconds); the result is None if
+    the job raised, which is logged rather than propagated so one failing
+    job doesn't stop the others. It runs again at its next interval.
+    """
+    close_old_connections()
+    started = time.perf_counter()
+    try:
+        result = job.run()
+    except Exception:
+        logger.exception("Job %s failed", job.name)
+        result = None
+    finally:
+        close_old_connections()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def run_forever(jobs, report, sleep=time.sleep, clock=time.monotonic):
+    """
+    Run each job every `job.interval` seconds, all of them right away
+    first, calling report(job, result, milliseconds) after each run.
+    """
+    next_run = {job.name: clock() for job in jobs}
+    while True:
+        for job in jobs:
+            if clock() >= next_run[job.name]:
+                report(job, *run_job(job))
+                next_run[job.name] = clock() + job.interval
+        sleep(max(0.0, min(next_run.values()) - clock()))
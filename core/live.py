@@ -0,0 +1,246 @@
+"""
+Live task updates, streamed to the browser as Server-Sent Events.
+
+Saving or deleting a Task publishes a small delta after the transaction
+commits. The task_events view streams them, so the task list and the
+calendar can patch the page in place. Deltas are 'created', 'updated',
+'status_changed' and 'deleted'. Bulk writes (core.bulk, core.importer)
+send a single 'resync' instead of one delta per row.
+
+Events go to channels:
+- 'user:<id>' carries the tasks assigned to that user (the calendar and
+  a user's task list);
+- 'all' carries every task (the superusers' task list).
+
+The broker is chosen with TASK_EVENTS_BROKER:
+- LocalBroker (default) fans out within one process. That is enough for a
+  single ASGI worker.
+- PostgresBroker publishes with pg_notify and has every process LISTEN,
+  so events reach streams served by any worker.
+
+Streams need ASGI. Under WSGI, Django collects an async iterator into a
+list before sending anything, which never finishes for an endless stream.
+So task_events answers WSGI requests with 204 (which tells EventSource
+not to reconnect), and the pages only open a stream when `available()`.
+"""
+import asyncio
+import json
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, router, transaction
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+ALL_TASKS = 'all'
+
+RESYNC = {'type': 'resync'}
+
+
+def available(request):
+    """Whether `request` came in through ASGI, the only handler that can stream events."""
+    return isinstance(request, ASGIRequest)
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def channels_for(user, assigned_only=False):
+    """The channels `user` may listen to: their own tasks, plus every task for superusers."""
+    channels = {user_channel(user.pk)}
+    if user.is_superuser and not assigned_only:
+        channels.add(ALL_TASKS)
+    return channels
+
+
+def task_payload(task):
+    payload = {
+        'id': task.pk,
+        'title': task.title,
+        'status': task.status,
+        'status_display': task.get_status_display(),
+        'priority': task.priority,
+        'priority_display': task.get_priority_display(),
+        'due_date': task.due_date,
+        'assigned_to_id': task.assigned_to_id,
+    }
+    # Only when already loaded; publishing never costs a query.
+    if Task.assigned_to.is_cached(task):
+        payload['assigned_to'] = task.assigned_to.username
+    return payload
+
+
+class Subscription:
+    """One stream's queue, fed from any thread and read on its event loop."""
+
+    def __init__(self, channels, size):
+        self.channels = frozenset(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(size)
+
+    def put(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            pass  # the stream's loop has closed
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A client this far behind gets one resync instead of the backlog.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class LocalBroker:
+    """In-process fan-out from publishers (any thread) to the streams of this process."""
+
+    queue_size = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}  # channel -> set of Subscription
+
+    def subscribe(self, channels):
+        """Call from the stream's event loop."""
+        subscription = Subscription(channels, self.queue_size)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[channel]
+
+    def publish(self, channels, event):
+        self.deliver(channels, event)
+
+    def deliver(self, channels, event):
+        with self._lock:
+            # A stream on several of the channels still gets the event once.
+            targets = set().union(*(self._subscriptions.get(channel, ()) for channel in channels))
+        for subscription in targets:
+            subscription.put(event)
+
+
+class PostgresBroker(LocalBroker):
+    """
+    Cross-process delivery via PostgreSQL LISTEN/NOTIFY. Each process keeps
+    one listening connection (opened with its first stream) and hands what
+    arrives to its own streams.
+    """
+
+    channel = 'task_events'
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def publish(self, channels, event):
+        payload = json.dumps({'channels': sorted(channels), 'event': event}, cls=DjangoJSONEncoder)
+        with connections[router.db_for_write(Task)].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, payload])
+
+    def subscribe(self, channels):
+        subscription = super().subscribe(channels)
+        if self._listener is None or self._listener.done():
+            self._listener = subscription.loop.create_task(self._listen())
+        return subscription
+
+    async def _listen(self):
+        import psycopg
+
+        database = connections[router.db_for_write(Task)].settings_dict
+        conninfo = psycopg.conninfo.make_conninfo(
+            dbname=database['NAME'], user=database['USER'], password=database['PASSWORD'],
+            host=database['HOST'], port=database['PORT'],
+        )
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as connection:
+                    await connection.execute(f'LISTEN {self.channel}')
+                    async for notify in connection.notifies():
+                        message = json.loads(notify.payload)
+                        self.deliver(message['channels'], message['event'])
+            except psycopg.OperationalError:
+                # Events sent while reconnecting are lost; tell streams to resync.
+                self.deliver(list(self._subscriptions), RESYNC)
+                await asyncio.sleep(1)
+
+
+def get_broker():
+    return _load_broker(settings.TASK_EVENTS_BROKER)
+
+
+@lru_cache(maxsize=None)
+def _load_broker(path):
+    return import_string(path)()
+
+
+def publish_on_commit(channels, event):
+    """Publish once the current transaction commits (immediately outside one)."""
+    alias = router.db_for_write(Task)
+    transaction.on_commit(lambda: get_broker().publish(channels, event), using=alias)
+
+
+def publish_task_saved(task, created):
+    loaded = getattr(task, '_loaded_values', {})
+    old_assignee = loaded.get('assigned_to_id', task.assigned_to_id)
+    if created:
+        kind = 'created'
+    elif loaded.get('status', task.status) != task.status:
+        kind = 'status_changed'
+    else:
+        kind = 'updated'
+    event = {'type': kind, 'task': task_payload(task)}
+    publish_on_commit({ALL_TASKS, user_channel(task.assigned_to_id)}, event)
+    if not created and old_assignee != task.assigned_to_id:
+        # Reassigned: gone from the previous assignee's views.
+        publish_on_commit({user_channel(old_assignee)}, {'type': 'deleted', 'task': {'id': task.pk}})
+
+
+def publish_task_deleted(task):
+    event = {'type': 'deleted', 'task': {'id': task.pk}}
+    publish_on_commit({ALL_TASKS, user_channel(task.assigned_to_id)}, event)
+
+
+def publish_resync(user_ids):
+    publish_on_commit({ALL_TASKS, *map(user_channel, user_ids)}, RESYNC)
+
+
+def encode(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event, cls=DjangoJSONEncoder)}\n\n"
+
+
+async def event_stream(channels):
+    """SSE lines for the events on `channels`, with a comment line as heartbeat."""
+    broker = get_broker()
+    subscription = broker.subscribe(channels)
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), settings.TASK_EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle stream.
+                yield ': keep-alive\n\n'
+                continue
+            yield encode(event)
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,90 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from core.models import Profile
+from core.thumbnails import content_hash, process_stored_image
+
+
+def _init_worker():
+    # Workers only touch storage, but need settings for it.
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = (
+        "Deduplicate stored profile images by content hash and generate "
+        "their renditions, decoding images in a pool of worker processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--force', action='store_true', help="Reprocess images that already have renditions.")
+        parser.add_argument(
+            '--prune', action='store_true',
+            help="Delete original files that no profile references after deduplication.",
+        )
+
+    def handle(self, *args, **options):
+        profiles = Profile.objects.exclude(profile_image='').exclude(profile_image__isnull=True)
+        if not options['force']:
+            profiles = profiles.filter(image_hash='')
+        by_name = {}
+        for profile_id, name in profiles.values_list('pk', 'profile_image'):
+            by_name.setdefault(name, []).append(profile_id)
+        if not by_name:
+            self.stdout.write(self.style.SUCCESS("No profile images to process."))
+            return
+
+        started = time.perf_counter()
+        # Hash up front (cheap, I/O bound) so identical files become one
+        # job: workers never race to write the same original or renditions.
+        by_hash, failed = {}, 0
+        for name in by_name:
+            try:
+                with default_storage.open(name, 'rb') as file:
+                    by_hash.setdefault(content_hash(file), []).append(name)
+            except OSError as exc:
+                failed += 1
+                self.stderr.write(f"{name}: {exc}")
+
+        processed = 0
+        replaced = set()
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+            futures = {
+                pool.submit(process_stored_image, names[0], options['force']): names
+                for names in by_hash.values()
+            }
+            for future in as_completed(futures):
+                names = futures[future]
+                try:
+                    _, canonical, image_hash = future.result()
+                except Exception as exc:
+                    failed += len(names)
+                    self.stderr.write(f"{', '.join(names)}: {exc}")
+                    continue
+                profile_ids = [pk for name in names for pk in by_name[name]]
+                Profile.objects.filter(pk__in=profile_ids).update(profile_image=canonical, image_hash=image_hash)
+                processed += len(names)
+                replaced.update(name for name in names if name != canonical)
+
+        pruned = 0
+        if options['prune']:
+            referenced = set(Profile.objects.filter(profile_image__in=replaced).values_list('profile_image', flat=True))
+            for name in replaced - referenced:
+                default_storage.delete(name)
+                pruned += 1
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {processed} image(s) ({len(by_hash)} distinct) for "
+            f"{sum(map(len, by_name.values()))} profile(s) in {elapsed:.2f}s; "
+            f"{len(replaced)} duplicate or renamed file(s)"
+            + (f", {pruned} pruned." if options['prune'] else ".")
+        ))
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{failed} image(s) could not be processed."))
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.bench import analyze, benchmark_database, logged_in_client, percentiles, seed_dataset
+from core.models import Task
+
+HOST = '127.0.0.1'
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class WSGIServer:
+    """Django's threaded WSGI server (what runserver uses), one thread per request."""
+
+    name = 'wsgi'
+
+    def __enter__(self):
+        self.httpd = ThreadedWSGIServer((HOST, 0), QuietHandler)
+        self.httpd.set_app(get_internal_wsgi_application())
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class UvicornServer:
+    """The ASGI application under uvicorn, on its own event loop thread."""
+
+    name = 'asgi'
+
+    def __enter__(self):
+        try:
+            import uvicorn
+        except ImportError:
+            raise CommandError("The ASGI run needs uvicorn (pip install uvicorn), or pass --skip-asgi.")
+        with socket.socket() as probe:
+            probe.bind((HOST, 0))
+            self.port = probe.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(
+            'myproject.asgi:application', host=HOST, port=self.port,
+            lifespan='off', access_log=False, log_level='warning',
+        ))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise CommandError("uvicorn failed to start.")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.should_exit = True
+        self.thread.join()
+
+
+async def fetch(port, path, cookie):
+    """One GET on a fresh connection; returns the status code."""
+    reader, writer = await asyncio.open_connection(HOST, port)
+    try:
+        writer.write(
+            f'GET {path} HTTP/1.1\r\nHost: {HOST}\r\nCookie: {cookie}\r\nConnection: close\r\n\r\n'.encode()
+        )
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def load(port, paths, cookie, concurrency, seconds):
+    """`concurrency` clients issuing requests back to back for `seconds`."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + seconds
+    latencies, errors = [], [0]
+
+    async def client(number):
+        while loop.time() < deadline:
+            path = paths[number % len(paths)]
+            number += concurrency
+            started = time.perf_counter()
+            try:
+                status = await fetch(port, path, cookie)
+            except (OSError, ValueError, IndexError):
+                status = None
+            if status == 200:
+                latencies.append((time.perf_counter() - started) * 1000)
+            else:
+                errors[0] += 1
+
+    started = loop.time()
+    await asyncio.gather(*(client(number) for number in range(concurrency)))
+    return latencies, errors[0], loop.time() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the calendar JSON endpoints served by Django's threaded "
+        "WSGI server and by uvicorn (ASGI) under many concurrent clients: "
+        "requests/sec and p50/p95/p99 latency. The load generator runs in "
+        "the same process, so treat the numbers as relative."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=20_000)
+        parser.add_argument('--concurrency', default='10,50,200', help="Comma-separated client counts.")
+        parser.add_argument('--seconds', type=float, default=5.0, help="Duration of each run.")
+        parser.add_argument('--skip-asgi', action='store_true')
+        parser.add_argument('--output', '-o', help="Also write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        servers = [WSGIServer] if options['skip_asgi'] else [WSGIServer, UvicornServer]
+        results = []
+        with benchmark_database() as db, override_settings(DEBUG=False, ALLOWED_HOSTS=[HOST]):
+            self.stdout.write(f"Seeding {options['tasks']:,} tasks ({db.vendor})...")
+            users = seed_dataset(20, options['tasks'])
+            analyze(db)
+            user = users[1]
+            cookie = f"{settings.SESSION_COOKIE_NAME}={logged_in_client(user).cookies[settings.SESSION_COOKIE_NAME].value}"
+            today = timezone.localdate()
+            task_ids = list(Task.objects.filter(assigned_to=user).values_list('pk', flat=True)[:50])
+            paths = [
+                f"{reverse('task_calendar_events')}?start={today - timedelta(days=7)}&end={today + timedelta(days=35)}",
+                f"{reverse('tasks_by_date')}?date={today}",
+                *(reverse('task_detail', args=[pk]) for pk in task_ids[:8]),
+            ]
+            db.close()  # the servers' threads open their own connections
+
+            for server_class in servers:
+                with server_class() as server:
+                    asyncio.run(load(server.port, paths, cookie, 4, 0.5))  # warm-up
+                    for concurrency in levels:
+                        latencies, errors, elapsed = asyncio.run(
+                            load(server.port, paths, cookie, concurrency, options['seconds'])
+                        )
+                        points = percentiles(latencies)
+                        results.append({
+                            'server': server.name,
+                            'concurrency': concurrency,
+                            'requests': len(latencies),
+                            'errors': errors,
+                            'requests_per_second': len(latencies) / elapsed,
+                            **{f'{name}_ms': value for name, value in points.items()},
+                        })
+
+        self.stdout.write(f"{'server':<8}{'clients':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+        for row in results:
+            self.stdout.write(
+                f"{row['server']:<8}{row['concurrency']:>8}{row['requests_per_second']:>9.0f}"
+                + ''.join(f"{row[key]:>9.1f}" if row[key] is not None else f"{'-':>9}"
+                          for key in ('p50_ms', 'p95_ms', 'p99_ms'))
+                + f"{row['errors']:>8}"
+            )
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(results, file, indent=2)
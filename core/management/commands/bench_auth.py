@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings, setup_test_environment
+from django.urls import reverse
+
+from core.bench import benchmark_database, count_queries, logged_in_client, percentiles, seed_dataset
+
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+}
+
+BACKENDS = {
+    'ModelBackend': 'django.contrib.auth.backends.ModelBackend',
+    'ProfileBackend': 'core.auth.ProfileBackend',
+}
+
+PAGES = ('dashboard', 'profile', 'settings')
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure what authentication costs per request: queries and latency "
+        "of the dashboard, profile and settings pages for each session "
+        "engine, with Django's ModelBackend and with core.auth.ProfileBackend."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200, help="Timed requests per page.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        rows = []
+        with benchmark_database() as db:
+            user = seed_dataset(5, 500)[1]
+            for store, engine in SESSION_ENGINES.items():
+                for backend_name, backend in BACKENDS.items():
+                    with override_settings(SESSION_ENGINE=engine, AUTHENTICATION_BACKENDS=[backend]):
+                        # A new client per configuration: middleware and
+                        # the session are set up from the settings in force.
+                        client = logged_in_client(user)
+                        for page in PAGES:
+                            rows.append((store, backend_name, page, *self.run(db, client, page, options['repeat'])))
+
+        self.stdout.write(f"{'sessions':<11}{'backend':<16}{'page':<11}{'queries':>8}{'p50 ms':>9}{'p95 ms':>9}")
+        for store, backend_name, page, queries, points in rows:
+            self.stdout.write(
+                f"{store:<11}{backend_name:<16}{page:<11}{queries:>8}{points['p50']:>9.2f}{points['p95']:>9.2f}"
+            )
+
+    def run(self, db, client, page, repeat):
+        path = reverse(page)
+        client.get(path)  # warm-up; also fills the session cache
+        samples, query_counts = [], []
+        for _ in range(repeat):
+            with count_queries(db) as queries:
+                started = time.perf_counter()
+                response = client.get(path)
+                samples.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.status_code
+            query_counts.append(len(queries))
+        return max(query_counts), percentiles(samples)
@@ -0,0 +1,105 @@
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from core.bench import benchmark_database, create_users, logged_in_client, percentiles, seed_tasks
+from core.models import Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer task_list/calendar (readers) and task_create/task_update "
+        "(writers) from parallel threads against the configured database "
+        "profile. Run once per DB_PROFILE (and with DB_SQLITE_TUNING=0 for "
+        "the untuned SQLite baseline) to compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=10.0)
+        parser.add_argument('--rows', type=int, default=20_000, help="Tasks seeded before the run.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        with benchmark_database() as db:
+            settings_dict = db.settings_dict
+            self.stdout.write(
+                f"Profile: {db.vendor} {settings_dict.get('OPTIONS') or '(default options)'}"
+            )
+            admin = User.objects.create_superuser('bench-admin', 'admin@example.com', 'pass')
+            users = create_users(20)
+            seed_tasks(users, options['rows'])
+            task_ids = list(Task.objects.values_list('pk', flat=True)[:1000])
+            # The seeding connection must not hold the database while the threads run.
+            connection.close()
+
+            results = {'read': [], 'write': []}
+            errors = {'read': 0, 'write': 0}
+            lock = threading.Lock()
+            deadline = time.perf_counter() + options['seconds']
+
+            def reader(index):
+                client = logged_in_client(users[index % len(users)])
+                urls = [reverse('task_list'), reverse('task_list') + '?status=TODO&sort=-priority',
+                        reverse('task_calendar_events')]
+                run('read', lambda i: client.get(urls[i % len(urls)]))
+
+            def writer(index):
+                client = logged_in_client(admin)
+                assignee = users[index % len(users)].pk
+
+                def write(i):
+                    if i % 2:
+                        return client.post(reverse('task_create'), {
+                            'title': f'Bench {index}-{i}', 'assigned_to': assignee,
+                            'status': 'TODO', 'priority': 'MEDIUM',
+                        })
+                    return client.post(reverse('task_update', args=[task_ids[(index * 31 + i) % len(task_ids)]]), {
+                        'title': f'Updated {index}-{i}', 'assigned_to': assignee,
+                        'status': 'IN_PROGRESS', 'priority': 'HIGH',
+                    })
+                run('write', write)
+
+            def run(kind, request):
+                samples, failures, i = [], 0, 0
+                try:
+                    while time.perf_counter() < deadline:
+                        started = time.perf_counter()
+                        try:
+                            response = request(i)
+                            ok = response.status_code < 400
+                        except Exception:
+                            ok = False
+                        if ok:
+                            samples.append((time.perf_counter() - started) * 1000)
+                        else:
+                            failures += 1
+                        i += 1
+                finally:
+                    connections.close_all()
+                with lock:
+                    results[kind].extend(samples)
+                    errors[kind] += failures
+
+            threads = [threading.Thread(target=reader, args=(i,)) for i in range(options['readers'])]
+            threads += [threading.Thread(target=writer, args=(i,)) for i in range(options['writers'])]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(f"{'kind':<8}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for kind in ('read', 'write'):
+            points = percentiles(results[kind])
+            self.stdout.write(
+                f"{kind:<8}{len(results[kind]):>10}{errors[kind]:>8}{len(results[kind]) / elapsed:>10.1f}"
+                + ''.join(f"{points[p] or 0:>10.1f}" for p in ('p50', 'p95', 'p99'))
+            )
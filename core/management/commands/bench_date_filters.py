@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core.bench import analyze, benchmark_database, create_users, seed_tasks, time_call
+from core.dates import day_window, days_window, due_within, local_today
+from core.models import Task
+
+
+def scenarios(user):
+    """(label, old queryset using DATE() casts, new queryset using ranges)."""
+    today = local_today()
+    mine = Task.objects.filter(assigned_to=user).order_by('due_date')
+    everyone = Task.objects.order_by('due_date')
+    return [
+        ('user: today',
+         mine.filter(due_date__date=today),
+         mine.filter(due_within(day_window(today)))),
+        ('user: tomorrow',
+         mine.filter(due_date__date=today + timedelta(days=1)),
+         mine.filter(due_within(day_window(today + timedelta(days=1))))),
+        ('user: next 7 days',
+         mine.filter(due_date__date__range=[today, today + timedelta(days=7)]),
+         mine.filter(due_within(days_window(today, 8)))),
+        ('admin: today',
+         everyone.filter(due_date__date=today),
+         everyone.filter(due_within(day_window(today)))),
+        ('admin: next 7 days',
+         everyone.filter(due_date__date__range=[today, today + timedelta(days=7)]),
+         everyone.filter(due_within(days_window(today, 8)))),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare EXPLAIN plans and timings of the old DATE()-cast due_date "
+        "filters against the [start, end) range filters on a seeded scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500_000, help="Number of tasks to seed.")
+        parser.add_argument('--users', type=int, default=50, help="Number of assignees.")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per query.")
+
+    def handle(self, *args, **options):
+        with benchmark_database() as connection:
+            self.stdout.write(f"Seeding {options['rows']:,} tasks for {options['users']} users ({connection.vendor})...")
+            users = create_users(options['users'])
+            seed_tasks(users, options['rows'])
+            analyze(connection)
+
+            rows = []
+            for label, old, new in scenarios(users[0]):
+                self.stdout.write("")
+                self.stdout.write(self.style.MIGRATE_HEADING(label))
+                for name, queryset in (('DATE() cast', old), ('range', new)):
+                    self.stdout.write(self.style.MIGRATE_LABEL(f"  {name}"))
+                    self.stdout.write('    ' + queryset.explain().replace('\n', '\n    '))
+                old_ms = time_call(lambda: list(old.all()), options['repeat'])[0]
+                new_ms = time_call(lambda: list(new.all()), options['repeat'])[0]
+                rows.append((label, old_ms, new_ms))
+
+        self.stdout.write("")
+        self.stdout.write(f"{'filter':<24}{'DATE() ms':>12}{'range ms':>12}{'speedup':>10}")
+        for label, old_ms, new_ms in rows:
+            self.stdout.write(f"{label:<24}{old_ms:>12.2f}{new_ms:>12.2f}{old_ms / new_ms:>9.1f}x")
@@ -0,0 +1,190 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.test.utils import override_settings, setup_test_environment
+from django.utils import timezone
+
+from core.bench import (
+    analyze, benchmark_database, count_queries, logged_in_client, percentiles, seed_dataset,
+)
+from core.filters import DATE_FILTERS, SORT_OPTIONS
+from core.models import Task
+
+
+def scenarios(users):
+    """
+    (name, who, method, path, data): every task_list filter and sort, the
+    calendar feeds, analytics, task creation and editing. `who` is 'admin'
+    or 'user'. A tuple of dicts as `data` is used in turn, request by request.
+    """
+    task_list = reverse('task_list')
+    today = timezone.localdate()
+    yield 'task_list', 'admin', 'get', task_list, {}
+    yield 'task_list user', 'user', 'get', task_list, {}
+    yield 'task_list search', 'admin', 'get', task_list, {'q': 'Task 4242'}
+    yield 'task_list search relevance', 'admin', 'get', task_list, {'q': 'seeded 42', 'sort': 'relevance'}
+    yield 'task_list status', 'admin', 'get', task_list, {'status': 'BLOCKED'}
+    yield 'task_list priority', 'admin', 'get', task_list, {'priority': 'CRITICAL'}
+    yield 'task_list assigned_to', 'admin', 'get', task_list, {'assigned_to': users[1].pk}
+    for date_filter in DATE_FILTERS:
+        yield f'task_list date={date_filter}', 'admin', 'get', task_list, {'date_filter': date_filter}
+    for sort in SORT_OPTIONS:
+        yield f'task_list sort={sort}', 'admin', 'get', task_list, {'sort': sort}
+    yield 'task_calendar_events', 'user', 'get', reverse('task_calendar_events'), {
+        'start': (today - timedelta(days=7)).isoformat(), 'end': (today + timedelta(days=35)).isoformat(),
+    }
+    yield 'tasks_by_date', 'user', 'get', reverse('tasks_by_date'), {'date': today.isoformat()}
+    yield 'analytics_page', 'admin', 'get', reverse('analytics'), {}
+    yield 'analytics_page user', 'user', 'get', reverse('analytics'), {}
+    yield 'task_create form', 'admin', 'get', reverse('task_create'), {}
+    yield 'task_create', 'admin', 'post', reverse('task_create'), {
+        'title': 'Benchmark task', 'assigned_to': users[2].pk, 'status': 'TODO', 'priority': 'MEDIUM',
+    }
+    task = Task.objects.filter(assigned_to=users[2]).order_by('pk').first()
+    edit = {'title': 'Edited task', 'status': 'IN_PROGRESS', 'priority': 'HIGH'}
+    yield 'task_update', 'admin', 'post', reverse('task_update', args=[task.pk]), {**edit, 'assigned_to': users[2].pk}
+    # Every request moves the task to another user (and queues a notification).
+    yield 'task_update reassign', 'admin', 'post', reverse('task_update', args=[task.pk]), (
+        {**edit, 'assigned_to': users[3].pk}, {**edit, 'assigned_to': users[2].pk},
+    )
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _change(new, old):
+    return (new - old) / old * 100 if old else 0.0
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a scratch database and drive the core endpoints through the "
+        "test client. Writes p50/p95/p99 latency and queries per request "
+        "for each scenario to a JSON file; --compare reports the change "
+        "from an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--tasks', type=int, default=50_000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=30, help="Timed requests per scenario.")
+        parser.add_argument('--only', help="Run only the scenarios whose name contains this.")
+        parser.add_argument('--output', '-o', default='bench-results.json')
+        parser.add_argument('--compare', help="Results file of an earlier run to compare with.")
+        parser.add_argument(
+            '--threshold', type=float, default=25.0,
+            help="p95 increase (percent) reported as a regression (default: 25).",
+        )
+        parser.add_argument('--fail-on-regression', action='store_true', help="Exit with an error on regressions.")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as file:
+                    baseline = json.load(file)
+            except (OSError, ValueError) as error:
+                raise CommandError(f"Can't read {options['compare']}: {error}")
+
+        setup_test_environment()
+        # Slow-query log lines would bury the results.
+        with benchmark_database() as db, override_settings(PERF_SLOW_QUERY_SAMPLE_RATE=0.0):
+            self.stdout.write(f"Seeding {options['users']:,} users and {options['tasks']:,} tasks ({db.vendor})...")
+            users = seed_dataset(options['users'], options['tasks'], seed=options['seed'])
+            analyze(db)
+            clients = {
+                'admin': logged_in_client(User.objects.create_superuser('bench-admin', 'admin@example.com', 'pass')),
+                'user': logged_in_client(users[1]),
+            }
+            results = {}
+            for name, who, method, path, data in scenarios(users):
+                if options['only'] and options['only'] not in name:
+                    continue
+                results[name] = self.run(db, clients[who], method, path, data, options['repeat'])
+                self.stdout.write(
+                    f"{name:<30}{results[name]['p50_ms']:>9.1f}{results[name]['p95_ms']:>9.1f}"
+                    f"{results[name]['p99_ms']:>9.1f} ms{results[name]['queries']:>6} queries"
+                )
+            vendor = db.vendor
+
+        report = {
+            'meta': {
+                'commit': git_commit(),
+                'created': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': vendor,
+                'users': options['users'],
+                'tasks': options['tasks'],
+                'seed': options['seed'],
+                'repeat': options['repeat'],
+            },
+            'scenarios': results,
+        }
+        with open(options['output'], 'w') as file:
+            json.dump(report, file, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+        if baseline is not None:
+            regressions = self.compare(baseline, report, options['threshold'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+
+    def run(self, db, client, method, path, data, repeat):
+        request = getattr(client, method)
+        payloads = data if isinstance(data, tuple) else (data,)
+        response = request(path, payloads[-1])  # warm-up
+        if response.status_code >= 400:
+            raise CommandError(f"{method.upper()} {path} returned {response.status_code}")
+        samples, query_counts = [], []
+        for i in range(repeat):
+            with count_queries(db) as queries:
+                started = time.perf_counter()
+                request(path, payloads[i % len(payloads)])
+                samples.append((time.perf_counter() - started) * 1000)
+            query_counts.append(len(queries))
+        points = percentiles(samples)
+        return {
+            'p50_ms': points['p50'],
+            'p95_ms': points['p95'],
+            'p99_ms': points['p99'],
+            'mean_ms': statistics.fmean(samples),
+            'queries': max(query_counts),
+            'status': response.status_code,
+        }
+
+    def compare(self, baseline, report, threshold):
+        old_commit = (baseline.get('meta') or {}).get('commit') or '?'
+        self.stdout.write(f"\nCompared with {old_commit[:12]}:")
+        self.stdout.write(f"{'scenario':<30}{'p50':>9}{'p95':>9}{'queries':>10}")
+        regressions = []
+        for name, new in report['scenarios'].items():
+            old = baseline.get('scenarios', {}).get(name)
+            if old is None:
+                continue
+            p95_change = _change(new['p95_ms'], old['p95_ms'])
+            query_change = new['queries'] - old['queries']
+            regressed = p95_change > threshold or query_change > 0
+            if regressed:
+                regressions.append(name)
+            self.stdout.write(
+                f"{name:<30}{_change(new['p50_ms'], old['p50_ms']):>+8.0f}%{p95_change:>+8.0f}%{query_change:>+10}"
+                + ("  REGRESSION" if regressed else "")
+            )
+        return regressions
@@ -0,0 +1,98 @@
+from contextlib import contextmanager
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment
+from django.urls import reverse
+
+from core.bench import analyze, benchmark_database, create_users, logged_in_client, percentiles, seed_tasks, time_call
+from core.models import Task
+
+
+@contextmanager
+def legacy_admin(model_admin):
+    """
+    TaskAdmin as it was before the large-table changes: exact COUNT plus
+    the full-result COUNT, the created_at date hierarchy, a filter listing
+    every user, per-row assignee/creator queries and LIKE search. (The
+    overdue column is a stored field either way; it was never a query per
+    row.)
+    """
+    legacy = {
+        'list_select_related': False,  # the changelist's own select_related(): non-null FKs only
+        'list_filter': ('status', 'priority', 'assigned_to', 'created_at', 'due_date'),
+        'date_hierarchy': 'created_at',
+        'show_full_result_count': True,
+        'get_changelist': lambda request, **kwargs: admin.ModelAdmin.get_changelist(model_admin, request),
+        'get_search_results': lambda *args: admin.ModelAdmin.get_search_results(model_admin, *args),
+    }
+    saved = {name: model_admin.__dict__[name] for name in legacy if name in model_admin.__dict__}
+    model_admin.__dict__.update(legacy)
+    try:
+        with override_settings(TASK_ADMIN_LARGE_TABLES=False):
+            yield
+    finally:
+        for name in legacy:
+            model_admin.__dict__.pop(name, None)
+        model_admin.__dict__.update(saved)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a scratch database and time the Task admin changelist, in its "
+        "large-table configuration and in the previous one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Number of tasks to seed.")
+        parser.add_argument('--users', type=int, default=2_000, help="Number of users (the old filter lists them all).")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed requests per scenario.")
+        parser.add_argument('--skip-legacy', action='store_true', help="Only time the current configuration.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        with benchmark_database() as db:
+            self.stdout.write(f"Seeding {options['rows']:,} tasks for {options['users']:,} users ({db.vendor})...")
+            users = create_users(options['users'])
+            seed_tasks(users, options['rows'])
+            analyze(db)
+            client = logged_in_client(User.objects.create_superuser('bench-admin', 'admin@example.com', 'pass'))
+            changelist = reverse('admin:core_task_changelist')
+            scenarios = [
+                ('first page', ''),
+                ('page 50', '?p=50'),
+                ('assignee filter', f'?assigned_to__id__exact={users[1].pk}'),
+                ('status filter', '?status__exact=BLOCKED'),
+                ('sorted by overdue', '?o=-7'),
+                ('search', '?q=Task+4242'),
+            ]
+
+            model_admin = admin.site._registry[Task]
+            results = {'current': self.run(client, changelist, scenarios, options['repeat'])}
+            if not options['skip_legacy']:
+                with legacy_admin(model_admin):
+                    results['legacy'] = self.run(client, changelist, scenarios, options['repeat'])
+
+        self.stdout.write("")
+        self.stdout.write(f"{'scenario':<20}{'mode':<9}{'queries':>8}{'best ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for label, _ in scenarios:
+            for mode, by_label in results.items():
+                queries, best, points = by_label[label]
+                self.stdout.write(f"{label:<20}{mode:<9}{queries:>8}{best:>10.1f}{points['p50']:>10.1f}{points['p95']:>10.1f}")
+
+    def run(self, client, changelist, scenarios, repeat):
+        by_label = {}
+        for label, query in scenarios:
+            url = changelist + query
+            # Counted with a wrapper: request_started resets connection.queries.
+            queries = []
+            with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+                response = client.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+            samples = []
+            for _ in range(repeat):
+                samples.append(time_call(lambda: client.get(url), 1)[0])
+            by_label[label] = (len(queries), min(samples), percentiles(samples))
+        return by_label
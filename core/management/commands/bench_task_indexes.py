@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand
+from django.db import models
+
+from core.bench import analyze, benchmark_database, create_users, seed_tasks, time_call
+from core.models import Task
+
+# The index Django created for the assigned_to FK before the composite
+# indexes replaced it. It is re-created for the "before" run so the
+# comparison is against the old schema rather than against no index at all.
+BASELINE_INDEXES = [
+    models.Index(fields=['assigned_to'], name='task_bench_assignee_fk_idx'),
+]
+
+
+def scenarios(user):
+    """(label, queryset, evaluate) for each task_list/admin access path."""
+    mine = Task.objects.filter(assigned_to=user)
+    overdue = dict(overdue_since__isnull=False)
+    return [
+        ('user: default sort', mine.order_by('due_date')[:10], list),
+        ('user: status filter', mine.filter(status='TODO').order_by('due_date')[:10], list),
+        ('user: overdue', mine.filter(**overdue).order_by('due_date')[:10], list),
+        ('user: count', mine.order_by(), None),
+        ('admin: Meta.ordering', Task.objects.all()[:10], list),
+        ('admin: status+priority', Task.objects.filter(status='TODO', priority='HIGH').order_by('due_date')[:10], list),
+        ('admin: newest first', Task.objects.order_by('-created_at')[:10], list),
+        ('admin: overdue count', Task.objects.filter(**overdue).order_by(), None),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a scratch database and compare EXPLAIN plans and timings of the "
+        "task_list access paths with and without the Task indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Number of tasks to seed.")
+        parser.add_argument('--users', type=int, default=50, help="Number of assignees.")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per query.")
+
+    def handle(self, *args, **options):
+        with benchmark_database() as connection:
+            self.stdout.write(f"Seeding {options['rows']:,} tasks for {options['users']} users ({connection.vendor})...")
+            users = create_users(options['users'])
+            seed_tasks(users, options['rows'])
+            user = users[0]
+
+            with connection.schema_editor() as editor:
+                for index in Task._meta.indexes:
+                    editor.remove_index(Task, index)
+                for index in BASELINE_INDEXES:
+                    editor.add_index(Task, index)
+            analyze(connection)
+            before = self.run_scenarios("before (FK index only)", user, options['repeat'])
+
+            with connection.schema_editor() as editor:
+                for index in BASELINE_INDEXES:
+                    editor.remove_index(Task, index)
+                for index in Task._meta.indexes:
+                    editor.add_index(Task, index)
+            analyze(connection)
+            after = self.run_scenarios("after (Task.Meta.indexes)", user, options['repeat'])
+
+        self.stdout.write("")
+        self.stdout.write(f"{'scenario':<28}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+        for label, before_best in before.items():
+            after_best = after[label]
+            speedup = before_best / after_best if after_best else float('inf')
+            self.stdout.write(f"{label:<28}{before_best:>12.2f}{after_best:>12.2f}{speedup:>9.1f}x")
+
+    def run_scenarios(self, phase, user, repeat):
+        self.stdout.write("")
+        self.stdout.write(self.style.MIGRATE_HEADING(f"== {phase} =="))
+        results = {}
+        for label, queryset, evaluate in scenarios(user):
+            self.stdout.write(self.style.MIGRATE_LABEL(label))
+            self.stdout.write('    ' + queryset.explain().replace('\n', '\n    '))
+            if evaluate is None:
+                run = queryset.count
+            else:
+                # Clone on every run so the queryset result cache isn't reused.
+                run = lambda: evaluate(queryset.all())
+            results[label] = time_call(run, repeat)[0]
+        return results
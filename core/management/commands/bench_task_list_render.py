@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.template.backends.django import DjangoTemplates
+from django.template.loader import get_template
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from core import views
+from core.bench import benchmark_database, create_users, logged_in_client, percentiles, seed_tasks, time_call
+
+TEMPLATE = 'tasks/task_list.html'
+
+
+def uncached_engine():
+    """The project's template engine without the cached loader: every get_template() re-parses."""
+    config = settings.TEMPLATES[0]
+    return DjangoTemplates({
+        'NAME': 'uncached',
+        'DIRS': config.get('DIRS', []),
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **config['OPTIONS'],
+            'loaders': [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ],
+        },
+    })
+
+
+class Command(BaseCommand):
+    help = (
+        "Time rendering of a 100-row task list page: re-parsed templates "
+        "without fragment caching, the cached loader with cold fragments, "
+        "and with warm fragments."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help="Tasks on the page.")
+        parser.add_argument('--repeat', type=int, default=50, help="Timed renders per scenario.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        fragments = caches['template_fragments']
+        with benchmark_database():
+            users = create_users(5)
+            seed_tasks(users, options['rows'])
+            client = logged_in_client(User.objects.create_superuser('bench-admin', 'admin@example.com', 'pass'))
+            with mock.patch.object(views, 'TASK_LIST_PAGE_SIZE', options['rows']):
+                response = client.get(reverse('task_list'))
+            assert response.status_code == 200, response.status_code
+
+            # Render the view's own context again, rows already fetched, so
+            # only template work is timed.
+            request = response.wsgi_request
+            context = response.context[0].flatten()
+            list(context['page_obj'])
+
+            def cold(template_source):
+                def render():
+                    fragments.clear()
+                    template_source().render(context, request)
+                return render
+
+            engine = uncached_engine()
+            scenarios = [
+                ('re-parsed, no fragments', cold(lambda: engine.get_template(TEMPLATE))),
+                ('cached loader, cold', cold(lambda: get_template(TEMPLATE))),
+                ('cached loader, warm', lambda: get_template(TEMPLATE).render(context, request)),
+            ]
+            results = []
+            for label, render in scenarios:
+                render()  # warm-up
+                samples = [time_call(render, 1)[0] for _ in range(options['repeat'])]
+                results.append((label, min(samples), percentiles(samples)))
+
+        self.stdout.write(f"{options['rows']} rows, {options['repeat']} renders per scenario")
+        self.stdout.write(f"{'scenario':<26}{'best ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for label, best, points in results:
+            self.stdout.write(f"{label:<26}{best:>10.2f}{points['p50']:>10.2f}{points['p95']:>10.2f}")
@@ -0,0 +1,37 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importer import BATCH_SIZE, import_tasks, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import tasks from CSV or JSON Lines (optionally .gz), e.g. a "
+        "file written by export_tasks. Invalid rows are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--created-by', help="Username recorded as the creator of the imported tasks.")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Rows per INSERT/transaction.")
+        parser.add_argument('--max-errors', type=int, default=50, help="Row errors to print.")
+
+    def handle(self, *args, **options):
+        created_by = None
+        if options['created_by']:
+            try:
+                created_by = User.objects.get(username=options['created_by'])
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {options['created_by']!r}.")
+
+        with open(options['path'], 'rb') as file:
+            result = import_tasks(read_rows(file, options['path']), created_by, options['batch_size'])
+
+        for number, message in result.errors[:options['max_errors']]:
+            self.stdout.write(self.style.WARNING(f"row {number}: {message}"))
+        if len(result.errors) > options['max_errors']:
+            self.stdout.write(self.style.WARNING(f"... and {len(result.errors) - options['max_errors']} more."))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.created:,} of {result.rows:,} rows in {result.elapsed:.2f}s "
+            f"({result.rows_per_second:,.0f} rows/s); {len(result.errors):,} rejected."
+        ))
@@ -0,0 +1,52 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.perf import merge, read_snapshots, summarize
+
+
+def _ms(value):
+    return '-' if value is None else f'{value:.0f}'
+
+
+class Command(BaseCommand):
+    help = (
+        "Show the request histogram of every process writing to "
+        "PERF_STATS_DIR, merged, slowest views first. Percentiles are the "
+        "upper bounds of histogram buckets."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help="Print the merged summary as JSON.")
+        parser.add_argument('--reset', action='store_true', help="Delete the snapshots after reading them.")
+
+    def handle(self, *args, **options):
+        directory = settings.PERF_STATS_DIR
+        if not directory:
+            raise CommandError(
+                "PERF_STATS_DIR is not set. Set it for the server processes, "
+                "or read /perf/stats/ of a running server."
+            )
+        rows = summarize(merge(read_snapshots(directory)))
+        if options['reset']:
+            for path in Path(directory).glob('*.json'):
+                path.unlink(missing_ok=True)
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        self.stdout.write(
+            f"{'view':<28}{'requests':>9}{'avg ms':>8}{'p50':>7}{'p95':>7}{'p99':>7}{'max ms':>8}"
+            f"{'queries':>9}{'db ms':>8}{'tpl ms':>8}{'avg KB':>8}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['view']:<28}{row['requests']:>9}{row['avg_ms']:>8.1f}"
+                f"{_ms(row['p50_ms']):>7}{_ms(row['p95_ms']):>7}{_ms(row['p99_ms']):>7}{row['max_ms']:>8.1f}"
+                f"{row['avg_queries']:>9.1f}{row['avg_db_ms']:>8.1f}{row['avg_template_ms']:>8.1f}"
+                f"{row['avg_bytes'] / 1024:>8.1f}"
+            )
+        if not rows:
+            self.stdout.write("No requests recorded yet.")
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core.stats import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the analytics counters from the task table, report any "
+        "drift and fix it. Safe to run periodically (e.g. from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without fixing it.")
+
+    def handle(self, *args, **options):
+        drift = reconcile(fix=not options['dry_run'])
+        for scope, differences in drift:
+            details = ', '.join(
+                f"{column}: {stored} -> {actual}" for column, (stored, actual) in differences.items()
+            )
+            self.stdout.write(self.style.WARNING(f"{scope}: {details}"))
+        verb = "Found" if options['dry_run'] else "Fixed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} drift in {len(drift)} scope(s)."))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.jobs import get_jobs, run_forever, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the periodic background jobs (see core.jobs), each at its "
+        "configured interval, until interrupted. --once runs every job a "
+        "single time, for cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('jobs', nargs='*', help="Only run these jobs (default: all).")
+        parser.add_argument('--once', action='store_true', help="Run each job once and exit.")
+
+    def handle(self, *args, **options):
+        try:
+            jobs = get_jobs(options['jobs'])
+        except KeyError as error:
+            raise CommandError(f"Unknown job(s): {error.args[0]}")
+
+        if options['once']:
+            failed = [job.name for job in jobs if self.report(job, *run_job(job)) is None]
+            if failed:
+                raise CommandError(f"Failed: {', '.join(failed)}")
+            return
+        self.stdout.write(
+            "Running " + ', '.join(f"{job.name} every {job.interval}s" for job in jobs) + ". Ctrl-C to stop."
+        )
+        try:
+            run_forever(jobs, self.report)
+        except KeyboardInterrupt:
+            pass
+
+    def report(self, job, result, milliseconds):
+        stamp = timezone.localtime().strftime('%H:%M:%S')
+        if result is None:
+            self.stderr.write(f"{stamp} {job.name} failed after {milliseconds:.0f}ms (see the log)")
+        else:
+            self.stdout.write(f"{stamp} {job.name}: {result} in {milliseconds:.0f}ms")
+        return result
@@ -0,0 +1,75 @@
+import zoneinfo
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.utils import timezone
+
+from . import activity
+
+# Set by base.html from the browser's Intl API.
+TIMEZONE_COOKIE = 'tz'
+
+
+class UserTimezoneMiddleware:
+    """
+    Activate the browser's timezone for the request so date filters and
+    rendered datetimes use the user's local day instead of UTC.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self.activate(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self.activate(request)
+        return await self.get_response(request)
+
+    def activate(self, request):
+        timezone.deactivate()
+        name = request.COOKIES.get(TIMEZONE_COOKIE)
+        if name:
+            try:
+                timezone.activate(zoneinfo.ZoneInfo(name))
+            except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+                pass
+
+
+class ActivityMiddleware:
+    """
+    Buffer the request's task activity entries (see core.activity) and
+    write them with one bulk_create once the response is ready. Must come
+    after AuthenticationMiddleware; entries name request.user.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with activity.buffered(request.user):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        buffer = activity.ActivityBuffer(request.user)
+        token = activity.activate(buffer)
+        try:
+            return await self.get_response(request)
+        finally:
+            activity.deactivate(token)
+            if buffer.entries:
+                await sync_to_async(buffer.flush)()
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS core_task_fts USING fts5("
+            "title, description, assignee, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        schema_editor.execute(
+            "INSERT INTO core_task_fts (rowid, title, description, assignee) "
+            "SELECT t.id, t.title, COALESCE(t.description, ''), "
+            "u.username || ' ' || u.first_name || ' ' || u.last_name "
+            "FROM core_task t JOIN auth_user u ON u.id = t.assigned_to_id"
+        )
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE IF NOT EXISTS core_task_search ("
+            "task_id bigint PRIMARY KEY REFERENCES core_task (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS core_task_search_document_idx ON core_task_search USING GIN (document)"
+        )
+        schema_editor.execute(
+            "INSERT INTO core_task_search (task_id, document) "
+            "SELECT t.id, "
+            "setweight(to_tsvector('simple', t.title), 'A') || "
+            "setweight(to_tsvector('simple', u.username || ' ' || u.first_name || ' ' || u.last_name), 'B') || "
+            "setweight(to_tsvector('simple', COALESCE(t.description, '')), 'C') "
+            "FROM core_task t JOIN auth_user u ON u.id = t.assigned_to_id"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS core_task_fts")
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute("DROP TABLE IF EXISTS core_task_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_task_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def create_missing_profiles(apps, schema_editor):
+    # Users created before the post_save signal (or with bulk_create) may
+    # have no Profile; views now rely on request.user.profile existing.
+    User = apps.get_model('auth', 'User')
+    Profile = apps.get_model('core', 'Profile')
+    db_alias = schema_editor.connection.alias
+    missing = User.objects.using(db_alias).filter(profile__isnull=True).values_list('pk', flat=True)
+    Profile.objects.using(db_alias).bulk_create(
+        [Profile(user_id=pk) for pk in missing.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0008_profile_image_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_profiles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def flag_overdue_tasks(apps, schema_editor):
+    # Before the indexes exist; the overdue sweep takes over from here.
+    Task = apps.get_model('core', 'Task')
+    Task.objects.using(schema_editor.connection.alias).filter(
+        status__in=('TODO', 'IN_PROGRESS', 'BLOCKED'), due_date__lt=timezone.now(),
+    ).update(overdue_since=F('due_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_backfill_profiles'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('DUE_SOON', 'Due soon'), ('OVERDUE', 'Overdue')], max_length=20)),
+                ('due_date', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_open_due_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_assignee_open_due_idx',
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='overdue_since',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(flag_overdue_tasks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('due_date__isnull', False), ('overdue_since__isnull', True), ('status__in', ('TODO', 'IN_PROGRESS', 'BLOCKED'))), fields=['due_date'], name='task_overdue_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('overdue_since__isnull', False)), fields=['due_date'], name='task_overdue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('overdue_since__isnull', False)), fields=['assigned_to', 'due_date'], name='task_assignee_overdue_idx'),
+        ),
+        migrations.AddField(
+            model_name='taskreminder',
+            name='recipient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_reminders', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='taskreminder',
+            name='task',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='core.task'),
+        ),
+        migrations.AddIndex(
+            model_name='taskreminder',
+            index=models.Index(condition=models.Q(('sent_at__isnull', True)), fields=['created_at'], name='task_reminder_pending_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='taskreminder',
+            constraint=models.UniqueConstraint(fields=('task', 'kind', 'due_date'), name='task_reminder_once'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_task_activity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskDependency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('blocked', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='blocked_by', to='core.task')),
+                ('blocker', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='blocking', to='core.task')),
+            ],
+            options={
+                'verbose_name_plural': 'Task dependencies',
+                'indexes': [models.Index(fields=['blocked', 'blocker'], name='task_dependency_blocked_idx')],
+                'constraints': [models.UniqueConstraint(fields=('blocker', 'blocked'), name='task_dependency_once'), models.CheckConstraint(condition=models.Q(('blocker', models.F('blocked')), _negated=True), name='task_dependency_not_self')],
+            },
+        ),
+    ]
@@ -1,64 +1,363 @@
-from django.db import models
-from django.contrib.auth.models import User
-from django.utils.translation import gettext_lazy as _ # New Import for better choices
-
-# --- Profile Model ---
-class Profile(models.Model):
-    user = models.OneToOneField(User, on_delete=models.CASCADE)
-    full_name = models.CharField(max_length=255, blank=True, null=True)
-    phone = models.CharField(max_length=15, blank=True, null=True)
-    bio = models.TextField(blank=True, null=True)
-    profile_image = models.ImageField(upload_to="profiles/", blank=True, null=True)
-    
-    # 💡 Improvement: Add related_name to the OneToOneField
-    # This isn't strictly necessary but is good practice to prevent future conflicts
-    # user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
-
-    def __str__(self):
-        # 💡 Improvement: Return the full name if set, otherwise the username
-        return self.full_name or self.user.username
-
-
-# --- Task Model ---
-class Task(models.Model):
-    # 💡 Improvement 1: Use gettext_lazy (_) for choice labels
-    class Status(models.TextChoices):
-        TODO = 'TODO', _('To Do')
-        IN_PROGRESS = 'IN_PROGRESS', _('In Progress')
-        DONE = 'DONE', _('Done')
-        BLOCKED = 'BLOCKED', _('Blocked')
-    
-    class Priority(models.TextChoices):
-        LOW = 'LOW', _('Low')
-        MEDIUM = 'MEDIUM', _('Medium')
-        HIGH = 'HIGH', _('High')
-        CRITICAL = 'CRITICAL', _('Critical')
-
-    title = models.CharField(max_length=255)
-    description = models.TextField(blank=True, null=True)
-    
-    assigned_to = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tasks_assigned')
-    # 💡 Improvement 2: related_name for created_by should be tasks_created_by to be clearer
-    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='tasks_created_by') 
-    
-    status = models.CharField(
-        max_length=20, 
-        choices=Status.choices, # Use new TextChoices
-        default=Status.TODO
-    )
-    priority = models.CharField(
-        max_length=20, 
-        choices=Priority.choices, # Use new TextChoices
-        default=Priority.MEDIUM
-    )
-    due_date = models.DateTimeField(blank=True, null=True)
-    
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
-    
-    class Meta:
-        ordering = ['-priority', 'due_date', 'status']
-        verbose_name_plural = "Tasks" # Good practice for Admin readability
-
-    def __str__(self):
-        return f"Task: {self.title} assigned to {self.assigned_to.username}" # More informative
\ No newline at end of file
+from django.db import models, router, transaction
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _ # New Import for better choices
+
+from .thumbnails import RENDITION_FORMATS, RENDITION_SIZES
+
+# --- Profile Model ---
+class Profile(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    full_name = models.CharField(max_length=255, blank=True, null=True)
+    phone = models.CharField(max_length=15, blank=True, null=True)
+    bio = models.TextField(blank=True, null=True)
+    profile_image = models.ImageField(upload_to="profiles/", blank=True, null=True)
+    # SHA-256 of profile_image; names its renditions (see core.thumbnails).
+    # Empty until the image has been processed.
+    image_hash = models.CharField(max_length=64, blank=True, editable=False, db_index=True)
+    
+    # 💡 Improvement: Add related_name to the OneToOneField
+    # This isn't strictly necessary but is good practice to prevent future conflicts
+    # user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
+
+    def __str__(self):
+        # 💡 Improvement: Return the full name if set, otherwise the username
+        return self.full_name or self.user.username
+
+    def renditions(self):
+        """
+        {size: {format: url}} of the image's renditions, e.g.
+        {{ profile.renditions.medium.webp }}; empty when there are none yet.
+        """
+        if not self.profile_image or not self.image_hash:
+            return {}
+        return {
+            size: {
+                fmt: reverse('profile_image', args=[self.image_hash, size, fmt])
+                for fmt in RENDITION_FORMATS
+            }
+            for size in RENDITION_SIZES
+        }
+
+
+# --- Task Model ---
+
+# Statuses that still count as "open" for the overdue filter and analytics.
+OPEN_TASK_STATUSES = ('TODO', 'IN_PROGRESS', 'BLOCKED')
+
+
+class Task(models.Model):
+    # 💡 Improvement 1: Use gettext_lazy (_) for choice labels
+    class Status(models.TextChoices):
+        TODO = 'TODO', _('To Do')
+        IN_PROGRESS = 'IN_PROGRESS', _('In Progress')
+        DONE = 'DONE', _('Done')
+        BLOCKED = 'BLOCKED', _('Blocked')
+    
+    class Priority(models.TextChoices):
+        LOW = 'LOW', _('Low')
+        MEDIUM = 'MEDIUM', _('Medium')
+        HIGH = 'HIGH', _('High')
+        CRITICAL = 'CRITICAL', _('Critical')
+
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    
+    # The composite indexes below all lead with assigned_to, so the FK doesn't need its own.
+    assigned_to = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tasks_assigned', db_index=False)
+    # 💡 Improvement 2: related_name for created_by should be tasks_created_by to be clearer
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='tasks_created_by') 
+    
+    status = models.CharField(
+        max_length=20, 
+        choices=Status.choices, # Use new TextChoices
+        default=Status.TODO
+    )
+    priority = models.CharField(
+        max_length=20, 
+        choices=Priority.choices, # Use new TextChoices
+        default=Priority.MEDIUM
+    )
+    due_date = models.DateTimeField(blank=True, null=True)
+    # The due date, copied here once an open task has passed it: saves set
+    # it right away, the overdue sweep (core.overdue) catches tasks that
+    # pass their due date later. Read paths filter on it instead of
+    # comparing due_date with the clock.
+    overdue_since = models.DateTimeField(blank=True, null=True, editable=False)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-priority', 'due_date', 'status']
+        verbose_name_plural = "Tasks" # Good practice for Admin readability
+        # Indexes follow the task_list access paths: every non-admin query is
+        # scoped to one assignee and sorted by due_date by default; admins
+        # filter by status/priority across all users; the admin changelist
+        # falls back to Meta.ordering.
+        indexes = [
+            models.Index(fields=['assigned_to', 'due_date'], name='task_assignee_due_idx'),
+            models.Index(fields=['assigned_to', 'status', 'due_date'], name='task_assignee_status_due_idx'),
+            models.Index(fields=['status', 'priority', 'due_date'], name='task_status_prio_due_idx'),
+            models.Index(fields=['-priority', 'due_date', 'status'], name='task_default_order_idx'),
+            models.Index(fields=['due_date'], name='task_due_idx'),
+            models.Index(fields=['-created_at'], name='task_created_idx'),
+            # Covers the calendar feed's per-user COUNT/MAX(updated_at) validator.
+            models.Index(fields=['assigned_to', 'updated_at'], name='task_assignee_updated_idx'),
+            # The overdue sweep's work queue: open, dated tasks not yet
+            # flagged. It also serves the due-soon reminder scan.
+            models.Index(
+                fields=['due_date'],
+                name='task_overdue_pending_idx',
+                condition=models.Q(status__in=OPEN_TASK_STATUSES, due_date__isnull=False, overdue_since__isnull=True),
+            ),
+            # Partial indexes for the "overdue" filter and counts: only flagged tasks.
+            models.Index(
+                fields=['due_date'],
+                name='task_overdue_idx',
+                condition=models.Q(overdue_since__isnull=False),
+            ),
+            models.Index(
+                fields=['assigned_to', 'due_date'],
+                name='task_assignee_overdue_idx',
+                condition=models.Q(overdue_since__isnull=False),
+            ),
+        ]
+
+    def __str__(self):
+        return f"Task: {self.title} assigned to {self.assigned_to.username}" # More informative
+
+    # Fields whose previous value the signal handlers compare on save.
+    TRACKED_FIELDS = ('assigned_to_id', 'status', 'priority')
+    # Fields whose changes go in the activity log (core.activity).
+    AUDITED_FIELDS = ('title', 'description', 'assigned_to_id', 'status', 'priority', 'due_date')
+
+    @property
+    def is_overdue(self):
+        return self.overdue_since is not None
+
+    def refresh_overdue(self, now=None):
+        """Set or clear overdue_since for the task's current status and due date."""
+        overdue = (
+            self.status in OPEN_TASK_STATUSES
+            and self.due_date is not None
+            and self.due_date < (now or timezone.now())
+        )
+        self.overdue_since = self.due_date if overdue else None
+
+    def save(self, *args, **kwargs):
+        # Instances loaded without status and due_date can't have changed either.
+        if not {'status', 'due_date'} <= self.get_deferred_fields():
+            self.refresh_overdue()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and {'status', 'due_date'}.intersection(update_fields):
+                kwargs['update_fields'] = {*update_fields, 'overdue_since'}
+        if not self._state.adding:
+            # Instances loaded with .only()/.defer() or built by hand don't
+            # know their stored values yet; fetch whatever is missing.
+            loaded = getattr(self, '_loaded_values', {})
+            missing = [name for name in self.AUDITED_FIELDS if name not in loaded]
+            if missing:
+                loaded.update(Task.objects.filter(pk=self.pk).values(*missing).first() or {})
+                self._loaded_values = loaded
+        # The row and everything the post_save handlers write for it (stats
+        # counters, search index, outbox notifications) commit together;
+        # its activity entry is queued for when they do.
+        using = kwargs.get('using') or router.db_for_write(Task, instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+        # All post_save handlers have run; the saved values are now the stored ones.
+        self._loaded_values = {field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Remember what was loaded so signal handlers can tell what a save
+        # changed (e.g. moving counters from the old status to the new one).
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+
+# --- Analytics Counters ---
+class TaskStats(models.Model):
+    """
+    Precomputed analytics for one scope: every task ('all') or the tasks
+    assigned to one user ('user:<id>'). Kept current by the Task signal
+    handlers in core.signals; see core.stats.
+    """
+    scope = models.CharField(max_length=32, unique=True)
+
+    total = models.IntegerField(default=0)
+    # One column per Task.Status / Task.Priority value.
+    todo = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    done = models.IntegerField(default=0)
+    blocked = models.IntegerField(default=0)
+    low = models.IntegerField(default=0)
+    medium = models.IntegerField(default=0)
+    high = models.IntegerField(default=0)
+    critical = models.IntegerField(default=0)
+
+    # Overdue also changes when the overdue sweep flags tasks, so it is
+    # recounted after a sweep or a save touches the scope, and in any case
+    # once it is older than TASK_STATS_OVERDUE_MAX_AGE.
+    overdue = models.IntegerField(default=0)
+    overdue_counted_at = models.DateTimeField(blank=True, null=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Task stats"
+
+    def __str__(self):
+        return f"Task stats for {self.scope}"
+
+
+# --- Reminders ---
+class TaskReminder(models.Model):
+    """
+    A reminder the overdue sweep (see core.overdue) has queued for a task's
+    assignee. One per task, kind and due date, so moving the due date
+    re-arms it; delivery goes through the Notification outbox.
+    """
+    class Kind(models.TextChoices):
+        DUE_SOON = 'DUE_SOON', _('Due soon')
+        OVERDUE = 'OVERDUE', _('Overdue')
+
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='reminders')
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_reminders')
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    due_date = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'kind', 'due_date'], name='task_reminder_once'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} reminder for {self.task_id} to {self.recipient_id}"
+
+
+# --- Notification Outbox ---
+class Notification(models.Model):
+    """
+    A message for one user, written in the same transaction as the change
+    it reports and delivered later, in per-user digests, by
+    core.notifications. Unsent rows are retried with backoff until
+    next_attempt_at is cleared (given up).
+    """
+    class Kind(models.TextChoices):
+        ASSIGNED = 'ASSIGNED', _('Assigned to you')
+        DUE_SOON = 'DUE_SOON', _('Due soon')
+        OVERDUE = 'OVERDUE', _('Overdue')
+
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # Delivery state.
+    sent_at = models.DateTimeField(blank=True, null=True)
+    next_attempt_at = models.DateTimeField(blank=True, null=True, default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # The delivery run that holds the row until next_attempt_at.
+    claimed_by = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # The delivery queue: unsent rows by when they are next due.
+            models.Index(fields=['next_attempt_at'], name='notification_pending_idx', condition=models.Q(sent_at__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} notification for {self.task_id} to {self.recipient_id}"
+
+
+# --- Activity Log ---
+class TaskActivity(models.Model):
+    """
+    One change to a task: who made it and a packed diff of the audited
+    fields (see core.activity). Appended, never updated; rows older than
+    TASK_ACTIVITY_RETENTION_DAYS are pruned.
+    """
+    class Action(models.IntegerChoices):
+        CREATED = 1, _('Created')
+        UPDATED = 2, _('Updated')
+        DELETED = 3, _('Deleted')
+
+    # No foreign key constraints: the log outlives the tasks and users it
+    # names, and deleting them never has to touch it.
+    task = models.ForeignKey(
+        Task, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='activity',
+    )
+    actor = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, null=True, blank=True, related_name='+',
+    )
+    action = models.PositiveSmallIntegerField(choices=Action.choices)
+    diff = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = "Task activity"
+        indexes = [
+            # A task's timeline, newest first (ids grow with created_at).
+            models.Index(fields=['task', '-id'], name='task_activity_timeline_idx'),
+            # Pruning by age.
+            models.Index(fields=['created_at'], name='task_activity_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_action_display()} task {self.task_id}"
+
+
+# --- Dependencies ---
+class TaskDependency(models.Model):
+    """
+    `blocker` must be done before `blocked` can go ahead. The graph is kept
+    acyclic, and blocked tasks' statuses follow their blockers; see
+    core.dependencies.
+
+    save() checks for cycles itself, so objects.create() is safe too.
+    bulk_create() and queryset updates skip it (and the status refresh):
+    add edges with core.dependencies.add_dependency() or save().
+    """
+    # The unique constraint's (blocker, blocked) index and the reverse one
+    # below cover the walks in both directions, so neither FK needs its own.
+    blocker = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='blocking', db_index=False)
+    blocked = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='blocked_by', db_index=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Task dependencies"
+        constraints = [
+            models.UniqueConstraint(fields=['blocker', 'blocked'], name='task_dependency_once'),
+            models.CheckConstraint(condition=~models.Q(blocker=models.F('blocked')), name='task_dependency_not_self'),
+        ]
+        indexes = [
+            models.Index(fields=['blocked', 'blocker'], name='task_dependency_blocked_idx'),
+        ]
+
+    def __str__(self):
+        return f"Task {self.blocker_id} blocks task {self.blocked_id}"
+
+    def clean(self):
+        # Imported here: core.dependencies imports this module.
+        from .dependencies import check_acyclic
+        if self.blocker_id and self.blocked_id:
+            check_acyclic(self.blocker_id, self.blocked_id)
+
+    def save(self, *args, **kwargs):
+        from .dependencies import check_acyclic
+        using = kwargs.get('using') or router.db_for_write(TaskDependency, instance=self)
+        with transaction.atomic(using=using):
+            # a -> b and b -> a saved at once wait for each other here
+            # rather than both passing the check.
+            list(
+                Task.objects.using(using).select_for_update()
+                .filter(pk__in=(self.blocker_id, self.blocked_id)).order_by('pk').values_list('pk')
+            )
+            check_acyclic(self.blocker_id, self.blocked_id)
+            super().save(*args, **kwargs)
@@ -0,0 +1,157 @@
+"""
+Task notifications: an outbox drained into per-user email digests.
+
+Writers never send mail. Assigning a task (task_create, task_update, the
+admin, bulk reassignment) and the overdue sweep's reminders add
+Notification rows in the same transaction as the change, which costs the
+request one INSERT. `deliver()`, run periodically by core.jobs, sends them:
+
+- it claims a batch of due rows, so concurrent runs never send a row twice
+  (a run that dies mid-way releases its rows when the claim expires);
+- it coalesces each recipient's rows into one digest, dropping repeats,
+  assignments the recipient has since lost and reminders for tasks since
+  finished;
+- it sends all digests over one connection to the EMAIL_BACKEND (an SMTP
+  session, or the file/locmem backends locally);
+- a failed digest is retried with exponential backoff, up to
+  TASK_NOTIFY_MAX_ATTEMPTS times.
+"""
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Subquery
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import OPEN_TASK_STATUSES, Notification
+
+# How long a delivery run holds the rows it claimed.
+CLAIM_SECONDS = 10 * 60
+
+
+def notify_assigned(tasks, recipient_id):
+    """Queue an ASSIGNED notification to `recipient_id` for each task id in `tasks`."""
+    Notification.objects.bulk_create([
+        Notification(recipient_id=recipient_id, task_id=task_id, kind=Notification.Kind.ASSIGNED)
+        for task_id in tasks
+    ])
+
+
+def notify_reminders(kind, rows):
+    """Queue a notification of `kind` for (task id, recipient id) rows."""
+    Notification.objects.bulk_create([
+        Notification(recipient_id=recipient_id, task_id=task_id, kind=kind) for task_id, recipient_id in rows
+    ])
+
+
+def claim(now, limit):
+    """Mark up to `limit` due, unsent notifications as this run's and return them."""
+    token = uuid.uuid4().hex
+    due = Notification.objects.filter(sent_at__isnull=True, next_attempt_at__lte=now).order_by('next_attempt_at')
+    # The condition is re-checked as each row is updated, so a row another
+    # run claimed first is skipped.
+    Notification.objects.filter(
+        pk__in=Subquery(due.values('pk')[:limit]), sent_at__isnull=True, next_attempt_at__lte=now,
+    ).update(claimed_by=token, next_attempt_at=now + timedelta(seconds=CLAIM_SECONDS))
+    return list(
+        Notification.objects.filter(claimed_by=token, sent_at__isnull=True)
+        .select_related('recipient', 'task').order_by('created_at')
+    )
+
+
+def coalesce(notifications):
+    """
+    {kind: [task, ...]} for one recipient's notifications: each task once
+    per kind, without assignments the recipient no longer has or reminders
+    for tasks finished since.
+    """
+    sections = defaultdict(dict)
+    for notification in notifications:
+        task = notification.task
+        if notification.kind == Notification.Kind.ASSIGNED:
+            if task.assigned_to_id != notification.recipient_id:
+                continue
+        elif task.status not in OPEN_TASK_STATUSES:
+            continue
+        sections[notification.kind][task.pk] = task
+    return {
+        kind: list(sections[kind].values()) for kind in Notification.Kind.values if sections.get(kind)
+    }
+
+
+def build_digest(recipient, sections):
+    count = sum(len(tasks) for tasks in sections.values())
+    context = {
+        'recipient': recipient,
+        'sections': [(Notification.Kind(kind).label, tasks) for kind, tasks in sections.items()],
+    }
+    return EmailMessage(
+        subject=f"{count} task update{'s' if count != 1 else ''}",
+        body=render_to_string('emails/task_digest.txt', context),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[recipient.email],
+    )
+
+
+def backoff(attempts):
+    """Delay before retry number `attempts`, or None once it's time to give up."""
+    if attempts >= settings.TASK_NOTIFY_MAX_ATTEMPTS:
+        return None
+    return timedelta(seconds=min(settings.TASK_NOTIFY_RETRY_SECONDS * 2 ** (attempts - 1), 6 * 60 * 60))
+
+
+def deliver(now=None, limit=None):
+    """
+    Send the due notifications as per-user digests. Returns
+    {'digests': sent, 'notifications': delivered, 'failed': to retry}.
+    """
+    now = now or timezone.now()
+    notifications = claim(now, limit or settings.TASK_JOBS_BATCH_SIZE)
+    by_recipient = defaultdict(list)
+    for notification in notifications:
+        by_recipient[notification.recipient].append(notification)
+
+    result = {'digests': 0, 'notifications': 0, 'failed': 0}
+    if not by_recipient:
+        return result
+    connection = get_connection()
+    try:
+        for recipient, items in by_recipient.items():
+            sections = coalesce(items)
+            error = ''
+            if sections and not recipient.email:
+                error = "No email address."
+            elif sections:
+                try:
+                    # Opens the connection for the first digest (or after a
+                    # failed open) and keeps it for the rest.
+                    connection.open()
+                    connection.send_messages([build_digest(recipient, sections)])
+                except Exception as exc:  # SMTP, socket and backend errors alike
+                    retry_later(items, now, f"{type(exc).__name__}: {exc}")
+                    result['failed'] += len(items)
+                    continue
+                result['digests'] += 1
+            # Nothing left to say (only stale rows) counts as delivered.
+            Notification.objects.filter(pk__in=[item.pk for item in items]).update(sent_at=now, last_error=error)
+            result['notifications'] += len(items)
+    finally:
+        connection.close()
+    return result
+
+
+def retry_later(notifications, now, error):
+    """Schedule another attempt for each of `notifications`, or give up on it."""
+    by_attempts = defaultdict(list)
+    for notification in notifications:
+        by_attempts[notification.attempts + 1].append(notification.pk)
+    for attempts, pks in by_attempts.items():
+        delay = backoff(attempts)
+        Notification.objects.filter(pk__in=pks).update(
+            attempts=attempts,
+            next_attempt_at=None if delay is None else now + delay,
+            last_error=error,
+        )
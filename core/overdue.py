@@ -0,0 +1,135 @@
+"""
+Stored overdue state and due-date reminders.
+
+A task is overdue once it is open (OPEN_TASK_STATUSES) and its due date
+has passed. Rather than compare due_date with the clock on every read,
+Task.overdue_since holds the flag: Task.save() keeps it right for the row
+being saved, bulk writes set it as they write (core.bulk in its UPDATE
+via `overdue_since_expression()`, core.importer per instance), and
+`sweep()` (run periodically by core.jobs) flags the tasks whose due date
+has passed since. Between sweeps a task can be overdue for up to one
+sweep interval before the flag shows it.
+
+The sweep also sends reminders: DUE_SOON for open tasks due within
+TASK_REMINDER_LEAD_SECONDS, OVERDUE for each task it flags. A TaskReminder
+row records each one, so it goes out once per due date, and the message
+itself goes through the notification outbox (core.notifications).
+
+Every step is idempotent (updates are conditional on the current flag,
+reminders are unique per task, kind and due date), so overlapping sweeps
+from several workers are harmless; at worst two racing sweeps queue the
+same reminder twice, and the digest shows it once.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Case, DateTimeField, Exists, F, OuterRef, Value, When
+from django.db.models.lookups import LessThan
+from django.utils import timezone
+
+from .models import OPEN_TASK_STATUSES, Task, TaskReminder, TaskStats
+from . import notifications
+from . import stats as task_stats
+
+
+def pending_tasks():
+    """Open, dated tasks not flagged yet; matches task_overdue_pending_idx."""
+    return Task.objects.filter(status__in=OPEN_TASK_STATUSES, due_date__isnull=False, overdue_since__isnull=True)
+
+
+def overdue_since_expression(now, status=None, due_date=None):
+    """
+    The overdue_since a set-based UPDATE should write alongside a new
+    `status` and/or `due_date` expression (None: unchanged), so bulk writes
+    keep the flag in the same statement.
+    """
+    if status is not None and status not in OPEN_TASK_STATUSES:
+        return Value(None, output_field=DateTimeField())
+    due_date = F('due_date') if due_date is None else due_date
+    still_open = {} if status is not None else {'status__in': OPEN_TASK_STATUSES}
+    return Case(When(LessThan(due_date, now), then=due_date, **still_open), default=None, output_field=DateTimeField())
+
+
+def mark_overdue(now=None, batch_size=None):
+    """
+    Flag the tasks that passed their due date, `batch_size` at a time in
+    due date order off the pending index, and queue an OVERDUE reminder for
+    each. Returns how many were flagged.
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or settings.TASK_JOBS_BATCH_SIZE
+    flagged = 0
+    user_ids = set()
+    while True:
+        with transaction.atomic(using=router.db_for_write(Task)):
+            rows = list(
+                pending_tasks().filter(due_date__lt=now)
+                .order_by('due_date').values_list('pk', 'assigned_to_id', 'due_date')[:batch_size]
+            )
+            if not rows:
+                break
+            Task.objects.filter(pk__in=[pk for pk, _, _ in rows], overdue_since__isnull=True).update(
+                overdue_since=F('due_date'),
+            )
+            queue_reminders(TaskReminder.Kind.OVERDUE, rows)
+        flagged += len(rows)
+        user_ids.update(assigned_to_id for _, assigned_to_id, _ in rows)
+        if len(rows) < batch_size:
+            break
+    if user_ids:
+        # The overdue counters of these scopes are recounted on next read.
+        scopes = [task_stats.ALL_SCOPE, *map(task_stats.user_scope, user_ids)]
+        TaskStats.objects.filter(scope__in=scopes).update(overdue_counted_at=None)
+    return flagged
+
+
+def queue_due_soon(now=None, batch_size=None):
+    """Queue a DUE_SOON reminder for open tasks due within the lead time. Returns how many."""
+    now = now or timezone.now()
+    batch_size = batch_size or settings.TASK_JOBS_BATCH_SIZE
+    already_queued = TaskReminder.objects.filter(
+        task=OuterRef('pk'), kind=TaskReminder.Kind.DUE_SOON, due_date=OuterRef('due_date'),
+    )
+    # Bounded by the tasks due within the lead time that have no reminder yet.
+    rows = list(
+        pending_tasks()
+        .filter(due_date__gte=now, due_date__lt=now + timedelta(seconds=settings.TASK_REMINDER_LEAD_SECONDS))
+        .exclude(Exists(already_queued))
+        .order_by()
+        .values_list('pk', 'assigned_to_id', 'due_date')
+    )
+    return queue_reminders(TaskReminder.Kind.DUE_SOON, rows, batch_size)
+
+
+def queue_reminders(kind, rows, batch_size=None):
+    """
+    Record a reminder for each (task id, assignee id, due date) row that
+    has none yet and queue its notification. Returns how many were new.
+    """
+    batch_size = batch_size or settings.TASK_JOBS_BATCH_SIZE
+    queued = 0
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        with transaction.atomic(using=router.db_for_write(TaskReminder)):
+            existing = set(
+                TaskReminder.objects.filter(task_id__in=[pk for pk, _, _ in batch], kind=kind)
+                .values_list('task_id', 'due_date')
+            )
+            new = [(pk, user_id, due_date) for pk, user_id, due_date in batch if (pk, due_date) not in existing]
+            TaskReminder.objects.bulk_create(
+                [TaskReminder(task_id=pk, recipient_id=user_id, kind=kind, due_date=due_date) for pk, user_id, due_date in new],
+                ignore_conflicts=True,
+            )
+            notifications.notify_reminders(kind, [(pk, user_id) for pk, user_id, _ in new])
+        queued += len(new)
+    return queued
+
+
+def sweep(now=None):
+    """One pass of the periodic job: {'overdue': flagged, 'due_soon': reminders queued}."""
+    now = now or timezone.now()
+    return {
+        'overdue': mark_overdue(now),
+        'due_soon': queue_due_soon(now),
+    }
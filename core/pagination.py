@@ -0,0 +1,178 @@
+"""
+Pagination helpers for large task result sets.
+
+`KeysetPaginator` walks a queryset by (sort column, id) instead of OFFSET,
+so every page costs the same no matter how deep it is, and hands out
+opaque signed cursors for the next/previous page. `approximate_count`
+avoids a full COUNT(*) once a result set is known to be large.
+"""
+import json
+
+from django.core import signing
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+CURSOR_SALT = 'core.pagination.keyset'
+
+
+def approximate_count(queryset, limit):
+    """
+    Return (count, exact).
+
+    Counts at most `limit + 1` rows, so small result sets get an exact
+    number for the price of a bounded scan. Past the limit PostgreSQL's
+    planner estimate is used; other backends report `limit` and leave it
+    to the caller to show it as a lower bound.
+    """
+    capped = queryset.order_by().values('pk')[:limit + 1].count()
+    if capped <= limit:
+        return capped, True
+    return max(_planner_estimate(queryset) or 0, limit), False
+
+
+def _planner_estimate(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KnownCountPaginator(Paginator):
+    """A Paginator that reuses a count the caller already has."""
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count = count
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    A Paginator whose count is exact up to `exact_limit` rows and an
+    approximate_count() estimate beyond, for admin changelists over very
+    large tables. Without a planner estimate (SQLite) the count, and so the
+    reachable pages, stop at the limit.
+    """
+
+    exact_limit = 10_000
+
+    @cached_property
+    def count(self):
+        return approximate_count(self.object_list, self.exact_limit)[0]
+
+
+class KeysetPage:
+    """One page of a KeysetPaginator; iterates like a Paginator page."""
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination over `queryset` ordered by `ordering` ('field' or
+    '-field') with the primary key as tie-breaker.
+
+    NULLs in the sort column are kept where the database naturally sorts
+    them (first for ascending on SQLite, last on PostgreSQL), so the ORDER
+    BY matches a plain (column, id) index.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.descending = ordering.startswith('-')
+        self.field_name = ordering.lstrip('-')
+        self.field = queryset.model._meta.get_field(self.field_name)
+        self.per_page = per_page
+        self.nulls_sort_high = connections[queryset.db].features.nulls_order_largest
+
+    def page(self, cursor=None):
+        position = self._decode(cursor)
+        if position is None:
+            backwards, value, pk = False, None, None
+        else:
+            backwards, value, pk = position['back'], position['value'], position['pk']
+
+        descending = self.descending != backwards
+        queryset = self.queryset.order_by(*self._ordering(descending))
+        if position is not None:
+            queryset = queryset.filter(self._after(value, pk, descending))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or backwards:
+                next_cursor = self._encode(rows[-1], back=False)
+            if (has_more and backwards) or (position is not None and not backwards):
+                previous_cursor = self._encode(rows[0], back=True)
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+    def _ordering(self, descending):
+        prefix = '-' if descending else ''
+        return [prefix + self.field_name, prefix + 'pk']
+
+    def _after(self, value, pk, descending):
+        """Q for the rows strictly after (value, pk) in the given direction."""
+        op = 'lt' if descending else 'gt'
+        # NULLs come after every value when they sort high and we're
+        # ascending, or sort low and we're descending.
+        nulls_last = self.nulls_sort_high != descending
+        if value is None:
+            condition = Q(**{f'{self.field_name}__isnull': True, f'pk__{op}': pk})
+            if not nulls_last:
+                condition |= Q(**{f'{self.field_name}__isnull': False})
+            return condition
+        condition = Q(**{f'{self.field_name}__{op}': value}) | Q(**{self.field_name: value, f'pk__{op}': pk})
+        if nulls_last and self.field.null:
+            condition |= Q(**{f'{self.field_name}__isnull': True})
+        return condition
+
+    def _encode(self, obj, back):
+        value = getattr(obj, self.field_name)
+        if value is not None and hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        return signing.dumps(
+            {'field': self.field_name, 'value': value, 'pk': obj.pk, 'back': back},
+            salt=CURSOR_SALT,
+            compress=True,
+        )
+
+    def _decode(self, cursor):
+        """Return the decoded position, or None for a missing/foreign/tampered cursor."""
+        if not cursor:
+            return None
+        try:
+            position = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            return None
+        if position.get('field') != self.field_name:
+            return None
+        if position['value'] is not None:
+            position['value'] = self.field.to_python(position['value'])
+        return position
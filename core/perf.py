@@ -0,0 +1,308 @@
+"""
+Per-request performance instrumentation.
+
+PerformanceMiddleware records each request's wall time, database query
+count and time, template render time and response size. It adds them to
+an in-process histogram per view. It can also:
+
+- send them back in a Server-Timing header (PERF_SERVER_TIMING);
+- log queries slower than PERF_SLOW_QUERY_MS, a PERF_SLOW_QUERY_SAMPLE_RATE
+  share of them, with the view that ran them.
+
+Template time is measured by the InstrumentedDjangoTemplates backend
+(the TEMPLATES setting). Only the outermost render is counted, so includes
+and extends are not counted twice.
+
+The histogram is shown by /perf/stats/ (superusers) for the process that
+serves it. With PERF_STATS_DIR set, each process also writes its snapshot
+there every PERF_STATS_FLUSH_SECONDS, and `manage.py perf_stats` merges
+them.
+
+The cost is a few perf_counter() calls per query and per request, plus
+one lock per request, so it can stay on in production. Rows a streaming
+response reads after the view returns (the task export) are not counted.
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the wall-time buckets; a last, open-ended bucket
+# holds everything slower.
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Counters summed per view.
+TOTALS = ('requests', 'wall_ms', 'queries', 'db_ms', 'template_ms', 'bytes')
+
+_current = ContextVar('perf_request', default=None)
+
+
+class RequestTimings:
+    __slots__ = ('request', 'queries', 'db_ms', 'template_ms', 'render_depth')
+
+    def __init__(self, request):
+        self.request = request
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.render_depth = 0
+
+    @property
+    def view(self):
+        # Read when needed rather than from process_view(), which Django
+        # can only call through a thread hop when the stack runs async.
+        match = getattr(self.request, 'resolver_match', None)
+        return (match and match.view_name) or '<unresolved>'
+
+
+def _record_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        timings.queries += 1
+        timings.db_ms += elapsed
+        if (elapsed >= settings.PERF_SLOW_QUERY_MS
+                and random.random() < settings.PERF_SLOW_QUERY_SAMPLE_RATE):
+            logger.warning("Slow query (%.1f ms) in %s: %s", elapsed, timings.view, sql)
+
+
+# Connections are per thread, and under ASGI the ORM runs in an executor
+# thread, not the one the middleware runs in. So the wrapper is installed
+# on each thread's connections where they are used: on request_started
+# (sent from the thread the request's sync code runs in) and whenever a
+# connection is opened. It only counts while a request's timings are set.
+
+def wrap_connection(connection):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _wrap_thread_connections(**kwargs):
+    for connection in connections.all():
+        wrap_connection(connection)
+
+
+def _wrap_new_connection(sender, connection, **kwargs):
+    wrap_connection(connection)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None:
+            return super().render(context, request)
+        timings.render_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.render_depth -= 1
+            if not timings.render_depth:
+                timings.template_ms += (time.perf_counter() - started) * 1000
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, with render time added to the request's timings."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+class Histogram:
+    """Per-view totals and wall-time bucket counts, safe to share between threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, view, wall_ms, queries, db_ms, template_ms, size):
+        bucket = next((i for i, bound in enumerate(BUCKETS_MS) if wall_ms <= bound), len(BUCKETS_MS))
+        with self._lock:
+            stats = self._views.get(view)
+            if stats is None:
+                stats = self._views[view] = {
+                    **dict.fromkeys(TOTALS, 0), 'max_wall_ms': 0.0, 'buckets': [0] * (len(BUCKETS_MS) + 1),
+                }
+            stats['requests'] += 1
+            stats['wall_ms'] += wall_ms
+            stats['queries'] += queries
+            stats['db_ms'] += db_ms
+            stats['template_ms'] += template_ms
+            stats['bytes'] += size
+            stats['max_wall_ms'] = max(stats['max_wall_ms'], wall_ms)
+            stats['buckets'][bucket] += 1
+
+    def snapshot(self):
+        """{view: raw totals}, a copy that merge() and summarize() accept."""
+        with self._lock:
+            return {view: {**stats, 'buckets': list(stats['buckets'])} for view, stats in self._views.items()}
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+HISTOGRAM = Histogram()
+
+
+def merge(snapshots):
+    """Add up snapshots taken in several processes."""
+    merged = {}
+    for snapshot in snapshots:
+        for view, stats in snapshot.items():
+            into = merged.get(view)
+            if into is None:
+                merged[view] = {**stats, 'buckets': list(stats['buckets'])}
+                continue
+            for name in TOTALS:
+                into[name] += stats[name]
+            into['max_wall_ms'] = max(into['max_wall_ms'], stats['max_wall_ms'])
+            into['buckets'] = [a + b for a, b in zip(into['buckets'], stats['buckets'])]
+    return merged
+
+
+def bucket_percentile(buckets, point):
+    """
+    The upper bound (ms) of the bucket holding the `point`th percentile;
+    None if it falls in the open-ended last bucket.
+    """
+    rank = point / 100 * sum(buckets)
+    seen = 0
+    for bound, count in zip(BUCKETS_MS, buckets):
+        seen += count
+        if count and seen >= rank:
+            return bound
+    return None
+
+
+def summarize(snapshot):
+    """Per-view averages and percentile bounds, slowest total time first."""
+    rows = []
+    for view, stats in snapshot.items():
+        requests = stats['requests'] or 1
+        rows.append({
+            'view': view,
+            'requests': stats['requests'],
+            'avg_ms': stats['wall_ms'] / requests,
+            'max_ms': stats['max_wall_ms'],
+            **{f'p{point}_ms': bucket_percentile(stats['buckets'], point) for point in (50, 95, 99)},
+            'avg_queries': stats['queries'] / requests,
+            'avg_db_ms': stats['db_ms'] / requests,
+            'avg_template_ms': stats['template_ms'] / requests,
+            'avg_bytes': stats['bytes'] / requests,
+            'buckets': dict(zip([*map(str, BUCKETS_MS), 'inf'], stats['buckets'])),
+        })
+    rows.sort(key=lambda row: row['avg_ms'] * row['requests'], reverse=True)
+    return rows
+
+
+def write_snapshot(directory):
+    """Write this process's histogram to `directory`, replacing its previous snapshot."""
+    path = Path(directory) / f'{os.getpid()}.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix('.tmp')
+    partial.write_text(json.dumps(HISTOGRAM.snapshot()))
+    os.replace(partial, path)
+
+
+def read_snapshots(directory):
+    snapshots = []
+    for path in sorted(Path(directory).glob('*.json')):
+        try:
+            snapshots.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue  # replaced or removed while reading
+    return snapshots
+
+
+def response_size(response):
+    if response.has_header('Content-Length'):
+        return int(response['Content-Length'])
+    # Streamed bodies are not buffered just to be measured.
+    return 0 if response.streaming else len(response.content)
+
+
+class PerformanceMiddleware:
+    """
+    Time each request and add it to HISTOGRAM (see the module docstring).
+    Goes first in MIDDLEWARE so the other middleware's time is included.
+    Runs natively under both WSGI and ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PERF_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.flushed_at = time.monotonic()
+        request_started.connect(_wrap_thread_connections, dispatch_uid='core.perf')
+        connection_created.connect(_wrap_new_connection, dispatch_uid='core.perf')
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings(request)
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(response, timings, started)
+
+    async def __acall__(self, request):
+        timings = RequestTimings(request)
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            # Sync code (the ORM included) runs in an executor thread with
+            # a copy of this context, so its queries see the timings.
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(response, timings, started)
+
+    def finish(self, response, timings, started):
+        wall_ms = (time.perf_counter() - started) * 1000
+        HISTOGRAM.record(
+            timings.view, wall_ms, timings.queries, timings.db_ms, timings.template_ms, response_size(response),
+        )
+        if settings.PERF_SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'app;dur={wall_ms:.1f}, '
+                f'db;dur={timings.db_ms:.1f};desc="{timings.queries} queries", '
+                f'tpl;dur={timings.template_ms:.1f}'
+            )
+        if settings.PERF_STATS_DIR and time.monotonic() - self.flushed_at >= settings.PERF_STATS_FLUSH_SECONDS:
+            self.flushed_at = time.monotonic()
+            try:
+                write_snapshot(settings.PERF_STATS_DIR)
+            except OSError:
+                logger.exception("Could not write the request histogram to %s", settings.PERF_STATS_DIR)
+        return response
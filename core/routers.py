@@ -0,0 +1,136 @@
+"""
+Read-replica routing.
+
+Every query goes to the primary ('default') unless it runs inside
+`replica_reads()`, which the read-heavy views (task list, calendar feed,
+tasks by date, analytics) opt into with `@reads_from_replica`. Inside it,
+reads go to a random alias from settings.DATABASE_REPLICAS; writes always
+go to the primary.
+
+Read-your-writes: ReplicaPinningMiddleware drops a short-lived cookie
+after any unsafe request (POST, ...), and while it is present the user's
+reads stay on the primary, so a task they just created or edited shows up
+even if the replicas lag. The window is DATABASE_REPLICA_PIN_SECONDS.
+
+With no replicas configured everything stays on the primary.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'db_pin'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_replica_reads = ContextVar('replica_reads', default=False)
+_pinned = ContextVar('pinned_to_primary', default=False)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+@contextmanager
+def replica_reads():
+    """Let reads in the enclosed block go to a replica."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextmanager
+def pinned_to_primary(pinned=True):
+    """Keep reads in the enclosed block on the primary, even inside replica_reads()."""
+    token = _pinned.set(pinned)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def reads_from_replica(view_func):
+    """
+    View decorator: run the view (and its template rendering) inside
+    replica_reads(). Works on async views too; the async ORM's worker
+    threads inherit the setting with the context.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            with replica_reads():
+                return await view_func(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        with replica_reads():
+            return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if replicas and _replica_reads.get() and not _pinned.get():
+            return random.choice(replicas)
+        # Explicit, so objects loaded from a replica don't pull related
+        # lookups there outside of replica_reads().
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Explicit for the same reason: saving an instance read from a
+        # replica must still write to the primary.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """Pin a browser's reads to the primary for a while after it writes."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with pinned_to_primary(self.is_pinned(request)):
+            response = self.get_response(request)
+        return self.pin_after_write(request, response)
+
+    async def __acall__(self, request):
+        with pinned_to_primary(self.is_pinned(request)):
+            response = await self.get_response(request)
+        return self.pin_after_write(request, response)
+
+    def pin_after_write(self, request, response):
+        if request.method not in SAFE_METHODS and replica_aliases():
+            seconds = settings.DATABASE_REPLICA_PIN_SECONDS
+            response.set_cookie(
+                PIN_COOKIE, str(int(time.time() + seconds)),
+                max_age=seconds, httponly=True, samesite='Lax',
+            )
+        return response
+
+    def is_pinned(self, request):
+        try:
+            return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
@@ -0,0 +1,228 @@
+"""
+Full-text search over tasks.
+
+The index covers the same fields the task list used to match with
+icontains: title, description and the assignee's username/first/last
+name. Backends are pluggable through the TASK_SEARCH_BACKEND setting:
+
+* 'auto' (default) picks SQLite FTS5 or PostgreSQL tsvector based on the
+  database vendor and falls back to the icontains scan elsewhere.
+* a dotted path to a SearchBackend subclass.
+
+Queries match every word as a prefix ("des proj" finds "design project"),
+and `rank()` orders results by relevance.
+
+The index is kept current by the Task/User signal handlers in
+core.signals; `manage.py rebuild_search_index` rebuilds it in bulk.
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+# Fields of the assignee that are part of the search document.
+USER_SEARCH_FIELDS = {'username', 'first_name', 'last_name'}
+
+# Task fields the search document is built from.
+TASK_SEARCH_FIELDS = {'title', 'description', 'assigned_to'}
+
+# Ids per statement when (re)indexing, well below SQLite's variable limit.
+INDEX_BATCH_SIZE = 500
+
+
+def _batches(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), INDEX_BATCH_SIZE):
+        yield ids[start:start + INDEX_BATCH_SIZE]
+
+
+def get_backend():
+    """Return the configured search backend for the task write database."""
+    alias = router.db_for_write(Task)
+    return _load_backend(getattr(settings, 'TASK_SEARCH_BACKEND', 'auto'), connections[alias].vendor)
+
+
+@lru_cache(maxsize=None)
+def _load_backend(path, vendor):
+    if path == 'auto':
+        backend_class = {
+            'sqlite': SQLiteFTSBackend,
+            'postgresql': PostgresSearchBackend,
+        }.get(vendor, LikeSearchBackend)
+    else:
+        backend_class = import_string(path)
+    return backend_class()
+
+
+class SearchBackend:
+    """Interface shared by all search backends."""
+
+    def filter(self, queryset, query):
+        """Restrict `queryset` to tasks matching `query`."""
+        raise NotImplementedError
+
+    def rank(self, queryset, query):
+        """Filter like `filter()` and order the result by relevance."""
+        return self.filter(queryset, query)
+
+    def index_tasks(self, task_ids):
+        """(Re)index the given tasks."""
+
+    def index_user_tasks(self, user_id):
+        """Reindex every task assigned to a user after their name changed."""
+
+    def remove_tasks(self, task_ids):
+        """Drop the given tasks from the index."""
+
+    def rebuild(self):
+        """Rebuild the whole index from the task table."""
+
+
+class LikeSearchBackend(SearchBackend):
+    """The original icontains scan; needs no index and works everywhere."""
+
+    def filter(self, queryset, query):
+        return queryset.filter(
+            Q(title__icontains=query) |
+            Q(description__icontains=query) |
+            Q(assigned_to__username__icontains=query) |
+            Q(assigned_to__first_name__icontains=query) |
+            Q(assigned_to__last_name__icontains=query)
+        )
+
+
+class IndexedSearchBackend(SearchBackend):
+    """
+    Common plumbing for the SQL index backends. Documents are built in SQL
+    straight from the task and user tables, so indexing a batch of tasks is
+    a single INSERT ... SELECT.
+    """
+
+    def filter(self, queryset, query):
+        expression = self.match_expression(query)
+        if expression is None:
+            # Nothing word-like to match on ("!!!"): keep the old behaviour.
+            return LikeSearchBackend().filter(queryset, query)
+        return queryset.filter(pk__in=RawSQL(self.match_sql, [expression]))
+
+    def rank(self, queryset, query):
+        expression = self.match_expression(query)
+        if expression is None:
+            return self.filter(queryset, query)
+        return self.filter(queryset, query).annotate(
+            search_rank=RawSQL(self.rank_sql, [expression]),
+        ).order_by(self.rank_ordering, 'pk')
+
+    def index_tasks(self, task_ids):
+        for batch in _batches(task_ids):
+            self._index_where('t.id IN (%s)' % ', '.join(['%s'] * len(batch)), batch)
+
+    def index_user_tasks(self, user_id):
+        self._index_where('t.assigned_to_id = %s', [user_id])
+
+    def rebuild(self):
+        with self.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+        self._index_where('1 = 1', [])
+
+    def cursor(self):
+        return connections[router.db_for_write(Task)].cursor()
+
+    def document_source(self, where):
+        return (
+            f'FROM {Task._meta.db_table} t '
+            f'JOIN {User._meta.db_table} u ON u.id = t.assigned_to_id '
+            f'WHERE {where}'
+        )
+
+    def match_expression(self, query):
+        raise NotImplementedError
+
+    def _index_where(self, where, params):
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(IndexedSearchBackend):
+    """SQLite FTS5 virtual table keyed by the task id (its rowid)."""
+
+    table = 'core_task_fts'
+    match_sql = 'SELECT rowid FROM core_task_fts WHERE core_task_fts MATCH %s'
+    # bm25() is lower-is-better; title hits count most, then the assignee.
+    rank_sql = (
+        f'SELECT bm25(core_task_fts, 10.0, 1.0, 5.0) FROM core_task_fts '
+        f'WHERE core_task_fts MATCH %s AND core_task_fts.rowid = {Task._meta.db_table}.id'
+    )
+    rank_ordering = 'search_rank'
+
+    def match_expression(self, query):
+        words = WORD_RE.findall(query)
+        if not words:
+            return None
+        return ' '.join(f'"{word}"*' for word in words)
+
+    def remove_tasks(self, task_ids):
+        with self.cursor() as cursor:
+            for batch in _batches(task_ids):
+                cursor.execute(
+                    f'DELETE FROM {self.table} WHERE rowid IN (%s)' % ', '.join(['%s'] * len(batch)),
+                    batch,
+                )
+
+    def _index_where(self, where, params):
+        with self.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid IN (SELECT t.id {self.document_source(where)})',
+                params,
+            )
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, description, assignee) '
+                f"SELECT t.id, t.title, COALESCE(t.description, ''), "
+                f"u.username || ' ' || u.first_name || ' ' || u.last_name "
+                f'{self.document_source(where)}',
+                params,
+            )
+
+
+class PostgresSearchBackend(IndexedSearchBackend):
+    """A weighted tsvector per task in core_task_search, with a GIN index."""
+
+    table = 'core_task_search'
+    match_sql = "SELECT task_id FROM core_task_search WHERE document @@ to_tsquery('simple', %s)"
+    rank_sql = (
+        f"SELECT ts_rank_cd(document, to_tsquery('simple', %s)) FROM core_task_search "
+        f'WHERE core_task_search.task_id = {Task._meta.db_table}.id'
+    )
+    rank_ordering = '-search_rank'
+
+    def match_expression(self, query):
+        words = WORD_RE.findall(query)
+        if not words:
+            return None
+        return ' & '.join(f'{word}:*' for word in words)
+
+    def remove_tasks(self, task_ids):
+        with self.cursor() as cursor:
+            for batch in _batches(task_ids):
+                cursor.execute(f'DELETE FROM {self.table} WHERE task_id = ANY(%s)', [batch])
+
+    def _index_where(self, where, params):
+        with self.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {self.table} (task_id, document) '
+                f"SELECT t.id, "
+                f"setweight(to_tsvector('simple', t.title), 'A') || "
+                f"setweight(to_tsvector('simple', u.username || ' ' || u.first_name || ' ' || u.last_name), 'B') || "
+                f"setweight(to_tsvector('simple', COALESCE(t.description, '')), 'C') "
+                f'{self.document_source(where)} '
+                f'ON CONFLICT (task_id) DO UPDATE SET document = EXCLUDED.document',
+                params,
+            )
@@ -1,9 +1,170 @@
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from django.contrib.auth.models import User
-from .models import Profile
-
-@receiver(post_save, sender=User)
-def create_profile(sender, instance, created, **kwargs):
-    if created:
-        Profile.objects.create(user=instance)
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+from django.contrib.auth.models import User
+from .models import Profile, Task
+from .search import TASK_SEARCH_FIELDS, USER_SEARCH_FIELDS, get_backend as search_backend
+from . import activity, live, notifications
+from . import stats as task_stats
+
+@receiver(post_save, sender=User)
+def create_profile(sender, instance, created, **kwargs):
+    if created:
+        Profile.objects.create(user=instance)
+
+
+# --- Search index maintenance ---
+
+@receiver(post_save, sender=Task)
+def index_task(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search_backend().index_tasks([instance.pk])
+
+@receiver(post_delete, sender=Task)
+def unindex_task(sender, instance, **kwargs):
+    search_backend().remove_tasks([instance.pk])
+
+@receiver(post_save, sender=User)
+def reindex_user_tasks(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    # The assignee's names are part of each task's search document. Saves
+    # that can't have touched them (e.g. last_login on login) are skipped.
+    if created or raw:
+        return
+    if update_fields is not None and not USER_SEARCH_FIELDS.intersection(update_fields):
+        return
+    search_backend().index_user_tasks(instance.pk)
+
+
+# --- Analytics counters ---
+
+def _stat_values(values):
+    if all(name in values for name in Task.TRACKED_FIELDS):
+        return tuple(values[name] for name in Task.TRACKED_FIELDS)
+    return None
+
+@receiver(post_save, sender=Task)
+def count_saved_task(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else _stat_values(getattr(instance, '_loaded_values', {}))
+    task_stats.apply_change(old, (instance.assigned_to_id, instance.status, instance.priority))
+
+@receiver(post_delete, sender=Task)
+def count_deleted_task(sender, instance, **kwargs):
+    loaded = getattr(instance, '_loaded_values', {})
+    old = _stat_values(loaded) or (instance.assigned_to_id, instance.status, instance.priority)
+    task_stats.apply_change(old, None)
+
+
+# --- Live updates (core.live) ---
+
+@receiver(post_save, sender=Task)
+def publish_saved_task(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    live.publish_task_saved(instance, created)
+
+@receiver(post_delete, sender=Task)
+def publish_deleted_task(sender, instance, **kwargs):
+    live.publish_task_deleted(instance)
+
+
+# --- Notifications (core.notifications) ---
+
+@receiver(post_save, sender=Task)
+def notify_new_assignee(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        # Tasks people create for themselves need no notice.
+        if instance.assigned_to_id == instance.created_by_id:
+            return
+    elif getattr(instance, '_loaded_values', {}).get('assigned_to_id', instance.assigned_to_id) == instance.assigned_to_id:
+        return
+    notifications.notify_assigned([instance.pk], instance.assigned_to_id)
+
+
+# --- Activity log (core.activity) ---
+
+@receiver(post_save, sender=Task)
+def record_saved_task(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    activity.record_saved(instance, created)
+
+@receiver(post_delete, sender=Task)
+def record_deleted_task(sender, instance, **kwargs):
+    activity.record_deleted(instance)
+
+
+# --- Bulk writes ---
+# bulk_create() and QuerySet.update() skip the model signals above. Code
+# that uses them sends tasks_bulk_changed(task_ids=..., user_ids=...,
+# fields=..., stat_changes=...) with the tasks it wrote, every assignee
+# they had before or after, the fields it changed (None for new rows), an
+# (old, new) pair of Task.TRACKED_FIELDS values per row (old None for new
+# rows) and, when the status changed, done_changed: the tasks that moved
+# to or from DONE. The search index, the analytics counters and the
+# dependents' statuses catch up in one pass. Senders log their changes
+# with core.activity.record() themselves, since only they know the old
+# values.
+
+tasks_bulk_changed = Signal()
+
+@receiver(tasks_bulk_changed)
+def reindex_bulk_changed(sender, task_ids, fields=None, **kwargs):
+    if fields is None or TASK_SEARCH_FIELDS.intersection(fields):
+        search_backend().index_tasks(task_ids)
+
+@receiver(tasks_bulk_changed)
+def count_bulk_changed(sender, stat_changes, **kwargs):
+    # Deltas, summed per scope: no recount of the scopes' tasks.
+    task_stats.apply_changes(stat_changes)
+
+@receiver(tasks_bulk_changed)
+def resync_bulk_changed(sender, user_ids, **kwargs):
+    # One resync for the affected views rather than a delta per row.
+    live.publish_resync(user_ids)
+
+
+# --- Dependencies (core.dependencies) ---
+# Imported last: core.dependencies goes through core.bulk, which needs
+# tasks_bulk_changed from this module.
+
+from .models import TaskDependency
+from . import dependencies
+
+@receiver(post_save, sender=Task)
+def refresh_dependents(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    old_status = getattr(instance, '_loaded_values', {}).get('status', instance.status)
+    if (old_status == Task.Status.DONE) != (instance.status == Task.Status.DONE):
+        dependencies.blockers_changed([instance.pk])
+
+@receiver(tasks_bulk_changed)
+def refresh_bulk_dependents(sender, done_changed=None, **kwargs):
+    if done_changed:
+        dependencies.blockers_changed(done_changed)
+
+@receiver(pre_delete, sender=Task)
+def remember_dependents(sender, instance, **kwargs):
+    # The edges are gone by post_delete.
+    instance._dependents = dependencies.downstream([instance.pk])
+
+@receiver(post_delete, sender=Task)
+def refresh_orphaned_dependents(sender, instance, **kwargs):
+    dependents = getattr(instance, '_dependents', None)
+    if dependents:
+        dependencies.graph_changed()
+        dependencies.refresh_blocked(dependents)
+
+@receiver(post_save, sender=TaskDependency)
+@receiver(post_delete, sender=TaskDependency)
+def refresh_dependency_target(sender, instance, raw=False, origin=None, **kwargs):
+    # Edges deleted along with their tasks (or users) are handled above,
+    # once per task.
+    if raw or (origin is not None and getattr(origin, 'model', type(origin)) is not TaskDependency):
+        return
+    dependencies.graph_changed()
+    dependencies.refresh_blocked([instance.blocked_id])
@@ -0,0 +1,228 @@
+"""
+Incrementally maintained task analytics.
+
+analytics_page reads a single TaskStats row: the global 'all' scope for
+admins, 'user:<id>' for everyone else. Task saves and deletes move the
+counters with F() updates (see core.signals); bulk writes that bypass
+signals pass the old and new values of the rows they wrote to
+`apply_changes()`, which moves the counters of every scope they touched in
+one UPDATE each. `manage.py reconcile_task_stats` re-derives every row
+from the task table and reports any drift.
+
+Staleness: status, priority and total counters are updated in the same
+statement sequence as the write and are exact. The overdue count follows
+the stored Task.overdue_since flag, which the overdue sweep (core.overdue)
+also sets, so it is recounted (one indexed COUNT) after a write or a sweep
+touches the scope, or when older than settings.TASK_STATS_OVERDUE_MAX_AGE
+seconds.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Task, TaskStats
+
+ALL_SCOPE = 'all'
+
+STATUS_COLUMNS = {
+    Task.Status.TODO: 'todo',
+    Task.Status.IN_PROGRESS: 'in_progress',
+    Task.Status.DONE: 'done',
+    Task.Status.BLOCKED: 'blocked',
+}
+PRIORITY_COLUMNS = {
+    Task.Priority.LOW: 'low',
+    Task.Priority.MEDIUM: 'medium',
+    Task.Priority.HIGH: 'high',
+    Task.Priority.CRITICAL: 'critical',
+}
+COUNTER_COLUMNS = ['total', *STATUS_COLUMNS.values(), *PRIORITY_COLUMNS.values(), 'overdue']
+
+
+def user_scope(user_id):
+    return f'user:{user_id}'
+
+
+def scope_for(user):
+    """The scope analytics_page shows to `user`."""
+    return ALL_SCOPE if user.is_superuser else user_scope(user.pk)
+
+
+def scope_queryset(scope):
+    if scope == ALL_SCOPE:
+        return Task.objects.all()
+    return Task.objects.filter(assigned_to_id=int(scope.split(':', 1)[1]))
+
+
+def get_stats(user, scope=None):
+    """
+    The TaskStats row for `user`'s scope (or an explicit `scope`): one
+    SELECT when it is fresh, plus an overdue recount when that part is
+    older than the bound.
+    """
+    scope = scope or scope_for(user)
+    stats = TaskStats.objects.filter(scope=scope).first()
+    if stats is None:
+        return rebuild_scope(scope)
+    max_age = timedelta(seconds=settings.TASK_STATS_OVERDUE_MAX_AGE)
+    now = timezone.now()
+    if stats.overdue_counted_at is None or now - stats.overdue_counted_at > max_age:
+        stats.overdue = count_overdue(scope_queryset(scope))
+        stats.overdue_counted_at = now
+        TaskStats.objects.filter(pk=stats.pk).update(overdue=stats.overdue, overdue_counted_at=now)
+    return stats
+
+
+def get_summary(user, scope=None):
+    """get_stats() as a TaskSummary for templates."""
+    return TaskSummary.from_stats(get_stats(user, scope))
+
+
+def count_overdue(tasks):
+    return tasks.filter(overdue_since__isnull=False).count()
+
+
+class TaskSummary(dict):
+    """
+    Task counts keyed by status and priority value ('DONE', 'HIGH', ...)
+    plus 'total' and 'overdue'. Every bucket is present (0 when empty), so
+    templates can index it directly: {{ summary.DONE }}.
+    """
+
+    BUCKETS = ('total', 'overdue', *STATUS_COLUMNS, *PRIORITY_COLUMNS)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(dict.fromkeys(self.BUCKETS, 0))
+        self.update(*args, **kwargs)
+
+    @classmethod
+    def from_stats(cls, stats):
+        summary = cls(total=stats.total, overdue=stats.overdue)
+        for value, column in (*STATUS_COLUMNS.items(), *PRIORITY_COLUMNS.items()):
+            summary[value] = getattr(stats, column)
+        return summary
+
+    def to_counters(self):
+        """The same counts keyed by TaskStats column."""
+        counters = {'total': self['total'], 'overdue': self['overdue']}
+        for value, column in (*STATUS_COLUMNS.items(), *PRIORITY_COLUMNS.items()):
+            counters[column] = self[value]
+        return counters
+
+    def status_rows(self):
+        """(value, label, count) for every status, in declaration order."""
+        return [(value, label, self[value]) for value, label in Task.Status.choices]
+
+    def priority_rows(self):
+        """(value, label, count) for every priority, in declaration order."""
+        return [(value, label, self[value]) for value, label in Task.Priority.choices]
+
+
+def summary_aggregates():
+    """
+    Conditional COUNTs for every bucket, so a whole summary comes back
+    from one pass over the tasks (and one row per group when grouped).
+    """
+    aggregates = {
+        'total': Count('id'),
+        'overdue': Count('id', filter=Q(overdue_since__isnull=False)),
+    }
+    for value in STATUS_COLUMNS:
+        aggregates[value] = Count('id', filter=Q(status=value))
+    for value in PRIORITY_COLUMNS:
+        aggregates[value] = Count('id', filter=Q(priority=value))
+    return aggregates
+
+
+def summarize(tasks):
+    """A TaskSummary of `tasks` in a single aggregate query."""
+    return TaskSummary(tasks.order_by().aggregate(**summary_aggregates()))
+
+
+def compute_counters(tasks):
+    """Counter values for a task queryset, straight from the source of truth."""
+    return summarize(tasks).to_counters()
+
+
+def rebuild_scope(scope):
+    now = timezone.now()
+    counters = compute_counters(scope_queryset(scope))
+    stats, _ = TaskStats.objects.update_or_create(
+        scope=scope, defaults={**counters, 'overdue_counted_at': now},
+    )
+    return stats
+
+
+def apply_change(old, new):
+    """
+    Move counters for a single task write. `old`/`new` are
+    (assigned_to_id, status, priority) tuples, or None for an insert or
+    delete.
+    """
+    apply_changes([(old, new)])
+
+
+def apply_changes(changes):
+    """
+    Move counters for any number of task writes, given as (old, new)
+    pairs like apply_change()'s. The deltas are summed per scope first, so
+    each affected scope gets one UPDATE however many rows changed; a scope
+    without a row yet is built from scratch instead.
+    """
+    deltas = defaultdict(Counter)
+    for pair in changes:
+        for values, sign in zip(pair, (-1, 1)):
+            if values is None:
+                continue
+            assigned_to_id, status, priority = values
+            for scope in (ALL_SCOPE, user_scope(assigned_to_id)):
+                deltas[scope]['total'] += sign
+                deltas[scope][STATUS_COLUMNS[status]] += sign
+                deltas[scope][PRIORITY_COLUMNS[priority]] += sign
+
+    for scope, delta in deltas.items():
+        changes = {column: F(column) + amount for column, amount in delta.items() if amount}
+        # Any write can change the overdue count (status or due date moved).
+        updated = TaskStats.objects.filter(scope=scope).update(overdue_counted_at=None, **changes)
+        if not updated:
+            rebuild_scope(scope)
+
+
+def reconcile(fix=True):
+    """
+    Compare every TaskStats row with the task table. Returns a list of
+    (scope, {column: (stored, actual)}) for rows whose write-maintained
+    counters drifted, fixing them when `fix` is set. Rows for scopes that
+    no longer have tasks are zeroed. The overdue count is refreshed too but
+    not reported, since it is allowed to lag by design.
+    """
+    now = timezone.now()
+    actual = {ALL_SCOPE: dict.fromkeys(COUNTER_COLUMNS, 0)}
+    # One row per assignee with every bucket; the global row is their sum.
+    rows = Task.objects.values('assigned_to_id').annotate(**summary_aggregates()).order_by()
+    for row in rows:
+        counters = TaskSummary(row).to_counters()
+        actual[user_scope(row['assigned_to_id'])] = counters
+        for column, value in counters.items():
+            actual[ALL_SCOPE][column] += value
+
+    stored = {stats.scope: stats for stats in TaskStats.objects.all()}
+    drift = []
+    for scope in sorted(set(actual) | set(stored)):
+        counters = actual.get(scope) or dict.fromkeys(COUNTER_COLUMNS, 0)
+        stats = stored.get(scope)
+        differences = {
+            column: (getattr(stats, column) if stats else None, value)
+            for column, value in counters.items()
+            if column != 'overdue' and (stats is None or getattr(stats, column) != value)
+        }
+        if differences:
+            drift.append((scope, differences))
+        if fix and (differences or stats.overdue != counters['overdue']):
+            TaskStats.objects.update_or_create(
+                scope=scope, defaults={**counters, 'overdue_counted_at': now},
+            )
+    return drift
@@ -6,26 +6,26 @@ from django import template
 register = template.Library()
 
 @register.filter
-def get_count(summary_list, key):
+def get_count(summary, key):
     """
-    Looks up the count for a specific status or priority key (e.g., 'DONE', 'HIGH') 
-    in a list of dictionaries generated by Django's annotate function.
+    Looks up the count for a specific status or priority key (e.g., 'DONE', 'HIGH').
+
+    `summary` is normally a core.stats.TaskSummary (a dict), which is an
+    O(1) lookup. A list of dictionaries generated by Django's annotate
+    function is still accepted and scanned.
     
-    Example usage in template: {{ status_summary|get_count:'DONE' }}
+    Example usage in template: {{ summary|get_count:'DONE' }}
     """
-    if not summary_list:
+    if not summary:
         return 0
+
+    if isinstance(summary, dict):
+        return summary.get(key, 0)
         
-    for item in summary_list:
+    for item in summary:
         # We check both 'status' and 'priority' keys because the summary list 
         # might contain either based on whether you passed status_summary or priority_summary.
-        
-        # Check if the dictionary has a 'status' key matching the input key
-        if item.get('status') == key:
-            return item.get('count', 0)
-            
-        # Check if the dictionary has a 'priority' key matching the input key
-        elif item.get('priority') == key:
+        if item.get('status') == key or item.get('priority') == key:
             return item.get('count', 0)
             
     # Return 0 if the key is not found in any dictionary
@@ -1,3 +1,1103 @@
-from django.test import TestCase
-
-# Create your tests here.
+import asyncio
+import csv
+import gzip
+import io
+import json
+import re
+import shutil
+import tempfile
+import zoneinfo
+from datetime import date, datetime, timedelta
+from smtplib import SMTPException
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.admin import AdminSite
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.core import mail
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse
+from django.db import connection, transaction
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from .admin import TaskAdmin
+from .bench import seed_tasks
+from .bulk import bulk_change_tasks
+from .dates import day_window, days_window
+from .models import Notification, Task, TaskActivity, TaskDependency, TaskReminder
+from .importer import import_tasks, read_rows
+from .pagination import KeysetPaginator
+from .routers import PIN_COOKIE, ReplicaPinningMiddleware, ReplicaRouter, replica_reads
+from . import activity, dependencies, live, notifications, overdue, perf
+from . import stats as task_stats
+from .search import get_backend as search_backend
+
+# Create your tests here.
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Each view must run a fixed number of queries regardless of how many
+    tasks exist or how many rows end up on the page. The numbers below
+    include the auth_user lookup (joined with the profile) done by
+    @login_required; the session itself comes from the cache.
+    """
+
+    TASK_COUNT = 10_000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        cls.users = [User.objects.create_user(f"user{i}", password="pass") for i in range(4)]
+        seed_tasks(cls.users, cls.TASK_COUNT)
+
+    def login(self, user):
+        self.client.force_login(user)
+
+    def test_task_list_user(self):
+        self.login(self.users[0])
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("task_list"))
+        self.assertEqual(len(response.context["page_obj"].object_list), 10)
+
+    def test_task_list_admin(self):
+        self.login(self.admin)
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("task_list"))
+        # Past the keyset threshold the count is a bounded lower bound.
+        self.assertEqual(response.context["pagination_mode"], "cursor")
+        self.assertFalse(response.context["count_is_exact"])
+
+        next_cursor = response.context["page_obj"].next_cursor
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("task_list"), {"cursor": next_cursor})
+        self.assertEqual(len(response.context["page_obj"]), 10)
+
+    def test_task_list_keyset_page_sorted_by_creation(self):
+        self.login(self.admin)
+        response = self.client.get(reverse("task_list"), {"sort": "-created_at"})
+        next_cursor = response.context["page_obj"].next_cursor
+        # The cursor is read off created_at, so it has to be among the loaded columns.
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("task_list"), {"sort": "-created_at", "cursor": next_cursor})
+        self.assertEqual(response.context["pagination_mode"], "cursor")
+        self.assertEqual(len(response.context["page_obj"]), 10)
+
+    def test_task_list_small_result_set_uses_page_numbers(self):
+        self.login(self.admin)
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("task_list"), {"q": "Task 999", "page": 2})
+        self.assertEqual(response.context["pagination_mode"], "page")
+        self.assertTrue(response.context["count_is_exact"])
+
+    def test_task_list_filters_and_sorts(self):
+        self.login(self.admin)
+        params = [
+            {"q": "Task 1"},
+            {"status": "DONE", "priority": "HIGH"},
+            {"assigned_to": str(self.users[1].pk)},
+            {"date_filter": "overdue"},
+            {"date_filter": "week", "sort": "-priority"},
+            {"sort": "title"},
+        ]
+        for query in params:
+            with self.subTest(query=query), self.assertNumQueries(4):
+                self.client.get(reverse("task_list"), query)
+
+    def test_task_list_rows_do_not_touch_the_database(self):
+        self.login(self.admin)
+        response = self.client.get(reverse("task_list"))
+        page = response.context["page_obj"]
+        with self.assertNumQueries(0):
+            for task in page:
+                task.assigned_to.username
+                task.assigned_to.get_full_name()
+                task.description_preview
+
+    def test_calendar_events(self):
+        self.login(self.users[0])
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("task_calendar_events"))
+        self.assertTrue(response.json())
+
+        # Unchanged data: the validator query alone answers with a 304.
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse("task_calendar_events"), HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_tasks_by_date(self):
+        self.login(self.users[0])
+        day = (timezone.now() + timedelta(days=1)).date().isoformat()
+        with self.assertNumQueries(2):
+            self.client.get(reverse("tasks_by_date"), {"date": day})
+
+    def test_analytics_page(self):
+        for user in (self.admin, self.users[0]):
+            self.login(user)
+            with self.subTest(user=user.username), self.assertNumQueries(2):
+                response = self.client.get(reverse("analytics"))
+            expected = self.TASK_COUNT if user.is_superuser else self.TASK_COUNT // len(self.users)
+            self.assertEqual(response.context["total_tasks"], expected)
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        users = [User.objects.create_user(f"user{i}") for i in range(3)]
+        seed_tasks(users, 61)
+        # Duplicate sort values so the id tie-breaker matters.
+        Task.objects.filter(pk__in=Task.objects.values("pk")[:20]).update(title="Same")
+
+    def walk(self, paginator, direction="next", cursor=None):
+        pages = []
+        while True:
+            page = paginator.page(cursor)
+            pages.append([task.pk for task in page])
+            cursor = page.next_cursor if direction == "next" else page.previous_cursor
+            if cursor is None:
+                return pages
+
+    def test_pages_cover_the_ordering_in_both_directions(self):
+        for ordering in ("due_date", "-due_date", "title", "-title", "-created_at", "status"):
+            with self.subTest(ordering=ordering):
+                expected = self.expected(ordering)
+                paginator = KeysetPaginator(Task.objects.all(), ordering, 7)
+                forward = self.walk(paginator)
+                self.assertEqual(sum(forward, []), expected)
+                self.assertTrue(all(len(page) == 7 for page in forward[:-1]))
+
+                # Walk back from the last page to the first.
+                last_page = paginator.page(None)
+                for _ in range(len(forward) - 1):
+                    last_page = paginator.page(last_page.next_cursor)
+                backward = self.walk(paginator, "previous", last_page.previous_cursor)
+                self.assertEqual(sum(reversed(backward), []) + forward[-1], expected)
+
+    def expected(self, ordering):
+        prefix = "-" if ordering.startswith("-") else ""
+        return list(Task.objects.order_by(ordering, prefix + "pk").values_list("pk", flat=True))
+
+    def test_invalid_cursor_starts_from_the_first_page(self):
+        paginator = KeysetPaginator(Task.objects.all(), "due_date", 7)
+        self.assertEqual(
+            [task.pk for task in paginator.page("garbage")],
+            self.expected("due_date")[:7],
+        )
+
+
+class SearchIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user("alice", first_name="Alice", last_name="Walker")
+        cls.bob = User.objects.create_user("bob", first_name="Bob", last_name="Stone")
+        cls.design = Task.objects.create(title="Design review", description="Landing page", assigned_to=cls.alice)
+        cls.deploy = Task.objects.create(title="Deploy", description="Release the design system", assigned_to=cls.bob)
+
+    def search(self, query):
+        return set(search_backend().filter(Task.objects.all(), query))
+
+    def test_prefix_matching_over_all_fields(self):
+        self.assertEqual(self.search("desi"), {self.design, self.deploy})
+        self.assertEqual(self.search("landing pa"), {self.design})
+        self.assertEqual(self.search("walk"), {self.design})
+        self.assertEqual(self.search("nothing"), set())
+
+    def test_ranking_prefers_title_matches(self):
+        ranked = list(search_backend().rank(Task.objects.all(), "design"))
+        self.assertEqual(ranked, [self.design, self.deploy])
+
+    def test_index_follows_task_and_user_changes(self):
+        self.deploy.title = "Ship it"
+        self.deploy.save()
+        self.assertEqual(self.search("ship"), {self.deploy})
+
+        self.bob.last_name = "Marley"
+        self.bob.save()
+        self.assertEqual(self.search("marley"), {self.deploy})
+        self.assertEqual(self.search("stone"), set())
+
+        self.design.delete()
+        self.assertEqual(self.search("landing"), set())
+
+    def test_rebuild(self):
+        Task.objects.filter(pk=self.design.pk).update(title="Renamed")
+        self.assertEqual(self.search("renamed"), set())
+        search_backend().rebuild()
+        self.assertEqual(self.search("renamed"), {self.design})
+
+
+class CalendarFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("alice")
+        cls.other = User.objects.create_user("bob")
+        cls.now = timezone.now()
+        cls.inside = Task.objects.create(
+            title="Inside", description="Long text", assigned_to=cls.user, due_date=cls.now + timedelta(days=2),
+        )
+        cls.outside = Task.objects.create(title="Outside", assigned_to=cls.user, due_date=cls.now + timedelta(days=40))
+        cls.foreign = Task.objects.create(title="Foreign", assigned_to=cls.other, due_date=cls.now)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def fetch(self, **headers):
+        return self.client.get(reverse("task_calendar_events"), {
+            "start": (self.now - timedelta(days=7)).isoformat(),
+            "end": (self.now + timedelta(days=30)).isoformat(),
+        }, **headers)
+
+    def test_only_the_requested_window_without_descriptions(self):
+        events = self.fetch().json()
+        self.assertEqual([event["id"] for event in events], [self.inside.pk])
+        self.assertNotIn("description", events[0]["extendedProps"])
+
+    def test_conditional_requests(self):
+        response = self.fetch()
+        self.assertEqual(self.fetch(HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        self.assertEqual(
+            self.fetch(HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code, 304
+        )
+
+        self.outside.delete()
+        self.assertEqual(self.fetch(HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 200)
+
+    def test_task_detail_loads_the_description(self):
+        response = self.client.get(reverse("task_detail", args=[self.inside.pk]))
+        self.assertEqual(response.json()["description"], "Long text")
+        response = self.client.get(reverse("task_detail", args=[self.foreign.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_async_request_path(self):
+        # The ASGI handler path: async middleware and views, no thread per request.
+        await self.async_client.aforce_login(self.user)
+        window = {"start": (self.now - timedelta(days=7)).isoformat(), "end": (self.now + timedelta(days=30)).isoformat()}
+        response = await self.async_client.get(reverse("task_calendar_events"), window)
+        self.assertEqual([event["id"] for event in response.json()], [self.inside.pk])
+        response = await self.async_client.get(
+            reverse("task_calendar_events"), window, headers={"If-None-Match": response["ETag"]},
+        )
+        self.assertEqual(response.status_code, 304)
+
+        day = timezone.localdate(self.inside.due_date).isoformat()
+        response = await self.async_client.get(reverse("tasks_by_date"), {"date": day})
+        self.assertEqual([task["title"] for task in response.json()], ["Inside"])
+        response = await self.async_client.get(reverse("task_detail", args=[self.foreign.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_out_of_range_bounds_are_ignored(self):
+        response = self.client.get(reverse("task_calendar_events"), {
+            "start": "2024-13-01", "end": "2024-01-01T25:00:00",
+        })
+        self.assertEqual([event["id"] for event in response.json()], [self.inside.pk, self.outside.pk])
+
+    def test_impossible_date_is_a_bad_request(self):
+        response = self.client.get(reverse("tasks_by_date"), {"date": "2024-02-30"})
+        self.assertEqual(response.status_code, 400)
+
+
+class DateWindowTests(TestCase):
+    def test_windows_are_local_midnights(self):
+        new_york = zoneinfo.ZoneInfo("America/New_York")
+        start, end = day_window(date(2024, 3, 10), new_york)
+        self.assertEqual(start, datetime(2024, 3, 10, tzinfo=new_york))
+        # DST starts that day: the local day is 23 hours long.
+        self.assertEqual(end.astimezone(zoneinfo.ZoneInfo("UTC")) - start, timedelta(hours=23))
+        self.assertEqual(days_window(date(2024, 3, 9), 8, new_york)[1], datetime(2024, 3, 17, tzinfo=new_york))
+
+    def test_task_list_today_uses_the_browser_timezone(self):
+        user = User.objects.create_user("alice")
+        tokyo = zoneinfo.ZoneInfo("Asia/Tokyo")
+        local_now = timezone.now().astimezone(tokyo)
+        # 00:30 local time today is still "yesterday" in UTC.
+        early = local_now.replace(hour=0, minute=30, second=0, microsecond=0)
+        task = Task.objects.create(title="Early", assigned_to=user, due_date=early)
+        self.client.force_login(user)
+        self.client.cookies["tz"] = "Asia/Tokyo"
+        response = self.client.get(reverse("task_list"), {"date_filter": "today"})
+        self.assertEqual(list(response.context["page_obj"]), [task])
+
+        response = self.client.get(reverse("tasks_by_date"), {"date": early.date().isoformat()})
+        self.assertEqual([item["title"] for item in response.json()], ["Early"])
+
+        # Unknown zones fall back to UTC, where the task is due the day before.
+        self.client.cookies["tz"] = "Not/AZone"
+        response = self.client.get(reverse("tasks_by_date"), {"date": early.date().isoformat()})
+        self.assertEqual(response.json(), [])
+
+
+class TaskStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user("alice")
+        cls.bob = User.objects.create_user("bob")
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "pass")
+
+    def counters(self, user):
+        stats = task_stats.get_stats(user)
+        return {column: getattr(stats, column) for column in task_stats.COUNTER_COLUMNS}
+
+    def test_counters_follow_task_writes(self):
+        task = Task.objects.create(title="A", assigned_to=self.alice, priority="HIGH")
+        Task.objects.create(title="B", assigned_to=self.alice, due_date=timezone.now() - timedelta(days=1))
+        counters = self.counters(self.alice)
+        self.assertEqual(
+            (counters["total"], counters["todo"], counters["high"], counters["medium"], counters["overdue"]),
+            (2, 2, 1, 1, 1),
+        )
+
+        task = Task.objects.get(pk=task.pk)
+        task.status = "DONE"
+        task.assigned_to = self.bob
+        task.save()
+        self.assertEqual(self.counters(self.alice)["total"], 1)
+        self.assertEqual(self.counters(self.bob)["done"], 1)
+        self.assertEqual(self.counters(self.admin)["total"], 2)
+
+        # Instances loaded with .only() still move the right counters.
+        partial = Task.objects.only("id", "title").get(pk=task.pk)
+        partial.priority = "LOW"
+        partial.save()
+        self.assertEqual(self.counters(self.bob)["low"], 1)
+        self.assertEqual(self.counters(self.bob)["high"], 0)
+
+        partial.delete()
+        self.assertEqual(self.counters(self.admin)["total"], 1)
+        self.assertEqual(task_stats.reconcile(), [])
+
+    def test_overdue_is_recounted_after_a_sweep(self):
+        task = Task.objects.create(title="A", assigned_to=self.alice, due_date=timezone.now() + timedelta(hours=1))
+        self.assertEqual(self.counters(self.alice)["overdue"], 0)
+        Task.objects.filter(pk=task.pk).update(due_date=timezone.now() - timedelta(hours=1))
+        with self.assertNumQueries(1):
+            self.assertEqual(task_stats.get_stats(self.alice).overdue, 0)
+        overdue.sweep()
+        self.assertEqual(self.counters(self.alice)["overdue"], 1)
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        Task.objects.create(title="A", assigned_to=self.alice)
+        Task.objects.filter(assigned_to=self.alice).update(status="BLOCKED")
+        drift = dict(task_stats.reconcile())
+        self.assertEqual(drift["user:%d" % self.alice.pk], {"todo": (1, 0), "blocked": (0, 1)})
+        self.assertEqual(self.counters(self.alice)["blocked"], 1)
+        self.assertEqual(task_stats.reconcile(), [])
+
+
+class OverdueSweepTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user("alice", password="pass")
+
+    def test_sweep_flags_tasks_and_queues_reminders_once(self):
+        now = timezone.now()
+        past = Task.objects.create(title="Past", assigned_to=self.alice, due_date=now + timedelta(minutes=5))
+        soon = Task.objects.create(title="Soon", assigned_to=self.alice, due_date=now + timedelta(hours=2))
+        Task.objects.create(title="Later", assigned_to=self.alice, due_date=now + timedelta(days=3))
+        self.assertFalse(past.is_overdue)
+
+        later = now + timedelta(minutes=10)
+        self.assertEqual(overdue.sweep(later), {"overdue": 1, "due_soon": 1})
+        self.assertEqual(overdue.sweep(later), {"overdue": 0, "due_soon": 0})
+        past.refresh_from_db()
+        self.assertEqual(past.overdue_since, past.due_date)
+        self.assertEqual(
+            set(TaskReminder.objects.values_list("task", "kind")),
+            {(past.pk, TaskReminder.Kind.OVERDUE), (soon.pk, TaskReminder.Kind.DUE_SOON)},
+        )
+
+        self.client.force_login(self.alice)
+        response = self.client.get(reverse("task_list"), {"date_filter": "overdue"})
+        self.assertEqual([task.pk for task in response.context["page_obj"]], [past.pk])
+
+    def test_writes_keep_the_flag_current(self):
+        task = Task.objects.create(title="A", assigned_to=self.alice, due_date=timezone.now() - timedelta(days=1))
+        self.assertTrue(task.is_overdue)
+        task.status = "DONE"
+        task.save()
+        self.assertFalse(Task.objects.get(pk=task.pk).is_overdue)
+
+        bulk_change_tasks(Task.objects.filter(pk=task.pk), status="TODO")
+        self.assertTrue(Task.objects.get(pk=task.pk).is_overdue)
+        bulk_change_tasks(Task.objects.filter(pk=task.pk), shift_days=2)
+        self.assertFalse(Task.objects.get(pk=task.pk).is_overdue)
+
+
+class TaskSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("alice", password="pass")
+        Task.objects.create(title="A", assigned_to=cls.user, status="DONE", priority="HIGH")
+        Task.objects.create(title="B", assigned_to=cls.user, due_date=timezone.now() - timedelta(days=1))
+
+    def test_one_query_for_every_bucket(self):
+        with self.assertNumQueries(1):
+            summary = task_stats.summarize(Task.objects.filter(assigned_to=self.user))
+        self.assertEqual(
+            (summary["total"], summary["DONE"], summary["TODO"], summary["HIGH"], summary["overdue"], summary["BLOCKED"]),
+            (2, 1, 1, 1, 1, 0),
+        )
+        self.assertEqual(summary, task_stats.get_summary(self.user))
+
+    def test_dashboard_cards(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("dashboard"))
+        self.assertEqual(response.context["summary"]["total"], 2)
+        self.assertContains(response, "Overdue")
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_only_opted_in_reads_go_to_a_replica(self):
+        self.assertEqual(self.router.db_for_read(Task), "default")
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Task), "replica")
+            self.assertEqual(self.router.db_for_write(Task), "default")
+
+    def test_reads_are_pinned_to_the_primary_after_a_write(self):
+        routed = []
+
+        def view(request):
+            with replica_reads():
+                routed.append(self.router.db_for_read(Task))
+            return HttpResponse()
+
+        middleware = ReplicaPinningMiddleware(view)
+        factory = RequestFactory()
+        self.assertNotIn(PIN_COOKIE, middleware(factory.get("/")).cookies)
+        cookie = middleware(factory.post("/")).cookies[PIN_COOKIE]
+
+        request = factory.get("/")
+        request.COOKIES[PIN_COOKIE] = cookie.value
+        middleware(request)
+        self.assertEqual(routed, ["replica", "replica", "default"])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Task), "default")
+
+
+class ProfileImageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user("alice")
+        cls.bob = User.objects.create_user("bob")
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+    def upload(self, user):
+        image = Image.new("RGB", (800, 600), "red")
+        exif = Image.Exif()
+        exif[0x010F] = "Camera maker"
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", exif=exif)
+        self.client.force_login(user)
+        self.client.post(reverse("settings"), {
+            "profile_image": SimpleUploadedFile("download.jpg", buffer.getvalue(), "image/jpeg"),
+        })
+        user.profile.refresh_from_db()
+        return user.profile
+
+    def test_identical_uploads_share_one_file_and_renditions(self):
+        alice, bob = self.upload(self.alice), self.upload(self.bob)
+        self.assertEqual(alice.profile_image.name, bob.profile_image.name)
+        self.assertEqual(alice.profile_image.name, f"profiles/{alice.image_hash}.jpg")
+
+        response = self.client.get(alice.renditions()["medium"]["webp"])
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertIn("immutable", response["Cache-Control"])
+        with Image.open(io.BytesIO(b"".join(response.streaming_content))) as rendition:
+            self.assertEqual(rendition.size, (190, 190))
+            self.assertFalse(rendition.getexif())
+
+    def test_unknown_renditions_are_404(self):
+        profile = self.upload(self.alice)
+        self.assertEqual(self.client.get(f"/profiles/images/{profile.image_hash}/huge.webp").status_code, 404)
+        self.assertEqual(self.client.get(f"/profiles/images/{'0' * 64}/medium.webp").status_code, 404)
+
+
+class TaskExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", password="pass")
+        cls.user = User.objects.create_user("alice", password="pass")
+        Task.objects.create(title="Mine, high", description="Line one\nline two", assigned_to=cls.user, priority="HIGH")
+        Task.objects.create(title="Mine, low", assigned_to=cls.user, priority="LOW")
+        Task.objects.create(title="Someone else's", assigned_to=cls.admin, priority="HIGH")
+
+    def export(self, user, **params):
+        self.client.force_login(user)
+        response = self.client.get(reverse("task_export"), params)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def test_csv_uses_the_task_list_filters_and_scope(self):
+        response, body = self.export(self.user, priority="HIGH")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        self.assertEqual([row["title"] for row in rows], ["Mine, high"])
+        self.assertEqual(rows[0]["description"], "Line one\nline two")
+        self.assertEqual(rows[0]["assigned_to"], "alice")
+
+        _, body = self.export(self.admin, priority="HIGH", sort="title")
+        self.assertEqual(len(list(csv.DictReader(io.StringIO(body.decode())))), 2)
+
+    def test_gzipped_jsonl(self):
+        response, body = self.export(self.admin, format="jsonl", gzip="1", sort="-title")
+        self.assertIn("tasks.jsonl.gz", response["Content-Disposition"])
+        tasks = [json.loads(line) for line in gzip.decompress(body).decode().splitlines()]
+        self.assertEqual(len(tasks), 3)
+        self.assertEqual(tasks[0]["title"], "Someone else's")
+
+    def test_non_numeric_assignee_is_ignored(self):
+        _, body = self.export(self.admin, assigned_to="alice")
+        self.assertEqual(len(list(csv.DictReader(io.StringIO(body.decode())))), 3)
+        _, body = self.export(self.admin, assigned_to=str(self.user.pk))
+        self.assertEqual(len(list(csv.DictReader(io.StringIO(body.decode())))), 2)
+
+    def test_unknown_format(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("task_export"), {"format": "xml"}).status_code, 400)
+
+
+class TaskImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", password="pass")
+        cls.alice = User.objects.create_user("alice")
+        cls.bob = User.objects.create_user("bob")
+
+    def test_valid_rows_are_inserted_and_bad_rows_reported(self):
+        rows = [
+            {"title": "Write report", "assigned_to": "alice", "status": "In Progress", "due_date": "2030-01-15"},
+            {"title": "", "assigned_to": "alice"},
+            {"title": "Review", "assigned_to": "carol", "priority": "urgent"},
+            {"title": "Deploy", "assigned_to": "bob", "priority": "critical", "due_date": "2030-01-15T09:30:00Z"},
+            {"title": "Plan", "assigned_to": "alice", "due_date": "soon"},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            result = import_tasks(rows, created_by=self.admin, batch_size=2)
+        # One username lookup per batch with new names, not one per row.
+        user_lookups = [q for q in queries if 'FROM "auth_user"' in q["sql"] and "username" in q["sql"]]
+        self.assertEqual(len(user_lookups), 2)
+
+        self.assertEqual((result.rows, result.created), (5, 2))
+        self.assertEqual([number for number, _ in result.errors], [2, 3, 5])
+        self.assertIn("unknown user 'carol'", result.errors[1][1])
+        self.assertIn("unknown priority 'urgent'", result.errors[1][1])
+
+        task = Task.objects.get(title="Write report")
+        self.assertEqual((task.status, task.priority, task.created_by), ("IN_PROGRESS", "MEDIUM", self.admin))
+        self.assertEqual(timezone.localtime(task.due_date).date(), date(2030, 1, 15))
+        # The bulk-change signal caught up the index and the counters.
+        self.assertEqual(list(search_backend().filter(Task.objects.all(), "deploy")), [Task.objects.get(title="Deploy")])
+        self.assertEqual(task_stats.get_stats(self.admin).total, 2)
+        self.assertEqual(task_stats.get_stats(self.alice).in_progress, 1)
+
+    def test_unreadable_lines_are_reported_as_row_errors(self):
+        jsonl = b'{"title": "First", "assigned_to": "alice"}\n{"title": \n[1, 2]\n{"title": "Last", "assigned_to": "bob"}\n'
+        result = import_tasks(read_rows(io.BytesIO(jsonl), "tasks.jsonl"))
+        self.assertEqual((result.rows, result.created), (4, 2))
+        self.assertEqual([number for number, _ in result.errors], [2, 3])
+        self.assertIn("invalid JSON", result.errors[0][1])
+        self.assertEqual(result.errors[1][1], "not a JSON object")
+
+        # Values that aren't strings fail their own row only.
+        jsonl = (
+            b'{"title": 5, "assigned_to": "alice"}\n'
+            b'{"title": "Tagged", "assigned_to": ["alice"], "priority": true}\n'
+            b'{"title": "Dated", "assigned_to": "alice", "due_date": 20240101}\n'
+            b'{"title": "Fine", "assigned_to": "alice", "description": null}\n'
+        )
+        result = import_tasks(read_rows(io.BytesIO(jsonl), "tasks.jsonl"))
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.errors, [
+            (1, "title must be text, not int"),
+            (2, "priority must be text, not bool; assigned_to must be text, not list"),
+            (3, "due_date must be text, not int"),
+        ])
+
+        # Not UTF-8: the rows before the bad bytes are kept, the rest reported.
+        latin1 = "title,assigned_to\nCafé,alice\n".encode("latin-1")
+        result = import_tasks(read_rows(io.BytesIO(latin1), "tasks.csv"))
+        self.assertEqual((result.created, len(result.errors)), (0, 1))
+        self.assertIn("unreadable file", result.errors[0][1])
+
+        truncated = gzip.compress(b"title,assigned_to\nOne,alice\n" * 100)[:-20]
+        result = import_tasks(read_rows(io.BytesIO(truncated), "tasks.csv.gz"))
+        self.assertIn("unreadable file", result.errors[-1][1])
+
+    def test_admin_upload_round_trips_an_export(self):
+        Task.objects.create(title="Exported", assigned_to=self.alice, priority="HIGH")
+        self.client.force_login(self.admin)
+        export = b"".join(self.client.get(reverse("task_export"), {"gzip": "1"}).streaming_content)
+
+        response = self.client.post(reverse("admin:core_task_import"), {
+            "file": SimpleUploadedFile("tasks.csv.gz", export),
+        })
+        self.assertEqual(response.context["result"].created, 1)
+        self.assertEqual(Task.objects.filter(title="Exported", priority="HIGH").count(), 2)
+
+
+class BulkChangeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", password="pass")
+        cls.alice = User.objects.create_user("alice")
+        cls.bob = User.objects.create_user("bob")
+        cls.due = timezone.now() + timedelta(days=3)
+        cls.tasks = [
+            Task.objects.create(title=f"Task {i}", assigned_to=cls.alice, due_date=cls.due if i else None)
+            for i in range(3)
+        ]
+
+    def test_chunked_update_keeps_dependents_current(self):
+        before = Task.objects.get(pk=self.tasks[1].pk).updated_at
+        task_stats.get_stats(self.bob)
+        with CaptureQueriesContext(connection) as queries:
+            count = bulk_change_tasks(Task.objects.all(), assigned_to=self.bob, shift_days=2, chunk_size=2)
+
+        self.assertEqual(count, 3)
+        task_updates = [q for q in queries if q["sql"].startswith('UPDATE "core_task" ')]
+        self.assertEqual(len(task_updates), 2)
+        # The counters move by delta, one UPDATE per scope; nothing is recounted.
+        self.assertFalse([q for q in queries if "COUNT(" in q["sql"]])
+        self.assertEqual(len([q for q in queries if q["sql"].startswith('UPDATE "core_taskstats"')]), 3)
+        task = Task.objects.get(pk=self.tasks[1].pk)
+        self.assertEqual((task.assigned_to, task.due_date), (self.bob, self.due + timedelta(days=2)))
+        self.assertGreater(task.updated_at, before)
+        self.assertIsNone(Task.objects.get(pk=self.tasks[0].pk).due_date)
+        self.assertEqual(task_stats.get_stats(self.bob).total, 3)
+        self.assertEqual(task_stats.get_stats(self.alice).total, 0)
+        self.assertEqual(search_backend().filter(Task.objects.all(), "bob").count(), 3)
+
+    def test_task_list_multi_select(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse("task_bulk_action"), {
+            "task_ids": [self.tasks[0].pk, self.tasks[2].pk],
+            "operation": "status",
+            "status": "DONE",
+            "next": reverse("task_list") + "?sort=title",
+        })
+        self.assertRedirects(response, reverse("task_list") + "?sort=title", fetch_redirect_response=False)
+        self.assertEqual(Task.objects.filter(status="DONE").count(), 2)
+        self.assertEqual(task_stats.get_stats(self.alice).done, 2)
+
+        self.client.force_login(self.alice)
+        self.client.post(reverse("task_bulk_action"), {"task_ids": [self.tasks[1].pk], "operation": "status", "status": "DONE"})
+        self.assertEqual(Task.objects.filter(status="DONE").count(), 2)
+
+    def test_admin_action(self):
+        self.client.force_login(self.admin)
+        self.client.post(reverse("admin:core_task_changelist"), {
+            "action": "set_priority",
+            "_selected_action": [task.pk for task in self.tasks],
+            "priority": "CRITICAL",
+        })
+        self.assertEqual(Task.objects.filter(priority="CRITICAL").count(), 3)
+        self.assertEqual(task_stats.get_stats(self.admin).critical, 3)
+
+
+class TaskAdminChangelistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", password="pass")
+        users = [User.objects.create_user(f"user{i}") for i in range(5)]
+        seed_tasks(users, 60)
+        cls.assignee = users[1]
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_query_count_does_not_grow_with_rows_or_users(self):
+        # user, bounded COUNT, page SELECT, assignees, creators.
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("admin:core_task_changelist"))
+        self.assertEqual(response.context["cl"].result_count, 60)
+        self.assertNotContains(response, "user4</a>")  # no filter link per user
+
+    def test_autocomplete_filter_and_overdue_column(self):
+        response = self.client.get(
+            reverse("admin:core_task_changelist"),
+            {"assigned_to__id__exact": self.assignee.pk, "o": "-7"},
+        )
+        results = list(response.context["cl"].result_list)
+        self.assertEqual({task.assigned_to_id for task in results}, {self.assignee.pk})
+        expected = Task.objects.filter(
+            assigned_to=self.assignee, due_date__lt=timezone.now(), status__in=["TODO", "IN_PROGRESS", "BLOCKED"],
+        ).count()
+        self.assertEqual(sum(task.is_overdue for task in results), expected)
+        self.assertTrue(results[0].is_overdue)
+
+    def test_action_form_autocomplete_uses_the_admins_site(self):
+        site = AdminSite(name="ops")
+        form = TaskAdmin(Task, site).action_form(auto_id=None)
+        self.assertIs(form.fields["assigned_to"].widget.admin_site, site)
+        response = self.client.get(reverse("admin:core_task_changelist"))
+        self.assertContains(response, 'name="assigned_to"')
+
+
+class TaskListFragmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", password="pass")
+        cls.task = Task.objects.create(title="Write report", assigned_to=cls.admin, priority="HIGH")
+
+    def setUp(self):
+        caches["template_fragments"].clear()
+        self.client.force_login(self.admin)
+
+    def test_rows_are_cached_by_task_version(self):
+        self.client.get(reverse("task_list"))
+        key = make_template_fragment_key(
+            "task_row", [self.task.pk, self.task.updated_at, None, "admin", "", True, "UTC"],
+        )
+        self.assertIsNotNone(caches["template_fragments"].get(key))
+
+        # Saving moves updated_at, so the row is rendered afresh.
+        self.task.title = "Write final report"
+        self.task.save()
+        response = self.client.get(reverse("task_list"))
+        self.assertContains(response, "Write final report")
+        self.assertEqual(self.status_badge(response), "bg-secondary")
+
+        # So do set-based changes, which set updated_at themselves.
+        bulk_change_tasks(Task.objects.filter(pk=self.task.pk), status="DONE")
+        self.assertEqual(self.status_badge(self.client.get(reverse("task_list"))), "bg-success")
+
+    def status_badge(self, response):
+        match = re.search(r'task-status">\s*<span class="badge badge-sm\s*([\w-]+)', response.content.decode())
+        return match.group(1)
+
+
+class PerformanceMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", password="pass")
+        cls.user = User.objects.create_user("user")
+        Task.objects.create(title="Write report", assigned_to=cls.user)
+
+    def setUp(self):
+        perf.HISTOGRAM.reset()
+
+    @override_settings(PERF_SERVER_TIMING=True)
+    def test_records_view_timings(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("task_list"))
+        self.assertIn('db;dur=', response["Server-Timing"])
+        self.assertIn('desc="3 queries"', response["Server-Timing"])
+
+        stats = perf.HISTOGRAM.snapshot()["task_list"]
+        self.assertEqual((stats["requests"], stats["queries"]), (1, 3))
+        self.assertGreater(stats["template_ms"], 0)
+        self.assertEqual(stats["bytes"], len(response.content))
+        self.assertEqual(sum(stats["buckets"]), 1)
+
+        merged = perf.merge([perf.HISTOGRAM.snapshot()] * 2)
+        self.assertEqual(perf.summarize(merged)[0]["requests"], 2)
+
+    @override_settings(PERF_SERVER_TIMING=True)
+    async def test_counts_queries_under_asgi(self):
+        # The ORM runs in an executor thread, on other connection objects.
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("task_list"))
+        self.assertIn('desc="3 queries"', response["Server-Timing"])
+        response = await self.async_client.get(reverse("task_calendar_events"))
+        self.assertNotIn('desc="0 queries"', response["Server-Timing"])
+        self.assertGreater(perf.HISTOGRAM.snapshot()["task_calendar_events"]["queries"], 0)
+
+    @override_settings(PERF_SLOW_QUERY_MS=0, PERF_SLOW_QUERY_SAMPLE_RATE=1.0)
+    def test_slow_queries_are_logged_with_their_view(self):
+        self.client.force_login(self.user)
+        with self.assertLogs("core.perf", "WARNING") as logs:
+            self.client.get(reverse("task_list"))
+        self.assertTrue(any("in task_list:" in line and "core_task" in line for line in logs.output))
+
+    def test_stats_endpoint_is_for_superusers(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("perf_stats")).status_code, 403)
+
+        self.client.force_login(self.admin)
+        self.client.get(reverse("task_list"))
+        views = self.client.get(reverse("perf_stats")).json()["views"]
+        self.assertIn("task_list", [row["view"] for row in views])
+
+
+class AuthenticatedRequestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("alice", password="pass")
+
+    def test_profile_page_loads_user_and_profile_in_one_query(self):
+        self.client.force_login(self.user)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("profile"))
+        self.assertEqual(response.context["profile"].user_id, self.user.pk)
+
+    def test_session_store_choices(self):
+        for engine in ("db", "cached_db", "cache"):
+            with self.subTest(engine=engine), override_settings(
+                SESSION_ENGINE=f"django.contrib.sessions.backends.{engine}"
+            ):
+                client = Client()  # middleware is set up from the settings in force
+                self.assertTrue(client.login(username="alice", password="pass"))
+                self.assertEqual(client.get(reverse("settings")).status_code, 200)
+
+    def test_signup_creates_the_profile(self):
+        self.client.post(reverse("signup"), {
+            "username": "bob", "email": "bob@example.com", "password": "pass", "confirm_password": "pass",
+        })
+        self.assertTrue(User.objects.filter(username="bob", profile__isnull=False).exists())
+
+
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "pass")
+        cls.alice = User.objects.create_user("alice", "alice@example.com")
+        cls.bob = User.objects.create_user("bob", "bob@example.com")
+
+    def reassign(self, task, user):
+        self.client.post(reverse("task_update", args=[task.pk]), {
+            "title": task.title, "assigned_to": user.pk, "status": task.status, "priority": task.priority,
+        })
+
+    def test_assignments_are_delivered_as_one_digest_per_user(self):
+        self.client.force_login(self.admin)
+        first = Task.objects.create(title="Write report", assigned_to=self.admin, created_by=self.admin)
+        second = Task.objects.create(title="Review budget", assigned_to=self.admin, created_by=self.admin)
+        self.assertEqual(Notification.objects.count(), 0)
+
+        self.reassign(first, self.alice)
+        self.reassign(second, self.alice)
+        self.reassign(second, self.bob)
+        self.assertEqual(Notification.objects.count(), 3)
+
+        self.assertEqual(notifications.deliver(), {"digests": 2, "notifications": 3, "failed": 0})
+        digests = {message.to[0]: message for message in mail.outbox}
+        self.assertIn("Write report", digests["alice@example.com"].body)
+        # Alice no longer has the second task; Bob does.
+        self.assertNotIn("Review budget", digests["alice@example.com"].body)
+        self.assertIn("Review budget", digests["bob@example.com"].body)
+        self.assertEqual(notifications.deliver(), {"digests": 0, "notifications": 0, "failed": 0})
+
+    def test_failed_digests_are_retried_with_backoff(self):
+        Task.objects.create(title="Write report", assigned_to=self.alice, created_by=self.admin)
+        now = timezone.now()
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=SMTPException("down")):
+            self.assertEqual(notifications.deliver(now)["failed"], 1)
+        notification = Notification.objects.get()
+        self.assertEqual((notification.attempts, notification.sent_at), (1, None))
+        self.assertEqual(notification.next_attempt_at, now + timedelta(seconds=60))
+
+        self.assertEqual(notifications.deliver(now + timedelta(seconds=30))["digests"], 0)
+        self.assertEqual(notifications.deliver(now + timedelta(seconds=60))["digests"], 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+
+class LiveUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", password="pass")
+        cls.user = User.objects.create_user("alice")
+        cls.other = User.objects.create_user("bob")
+
+    async def next_event(self, subscription):
+        return await asyncio.wait_for(subscription.get(), 1)
+
+    async def test_saves_publish_deltas_after_commit(self):
+        broker = live.get_broker()
+        mine = broker.subscribe(live.channels_for(self.user))
+        everything = broker.subscribe(live.channels_for(self.admin))
+        try:
+            def write():
+                with self.captureOnCommitCallbacks(execute=True):
+                    task = Task.objects.create(title="Draft", assigned_to=self.user)
+                with self.captureOnCommitCallbacks(execute=True):
+                    task.status = "DONE"
+                    task.save()
+                with self.captureOnCommitCallbacks(execute=True):
+                    task.assigned_to = self.other
+                    task.save()
+                return task
+
+            task = await sync_to_async(write)()
+            self.assertEqual(
+                [(await self.next_event(mine))["type"] for _ in range(3)],
+                ["created", "status_changed", "deleted"],
+            )
+            events = [await self.next_event(everything) for _ in range(3)]
+            self.assertEqual([event["type"] for event in events], ["created", "status_changed", "updated"])
+            self.assertEqual(events[1]["task"]["status_display"], "Done")
+            self.assertEqual(events[2]["task"]["assigned_to_id"], self.other.pk)
+            self.assertEqual(events[2]["task"]["id"], task.pk)
+        finally:
+            broker.unsubscribe(mine)
+            broker.unsubscribe(everything)
+
+    async def test_stream(self):
+        await self.async_client.aforce_login(self.user)
+        page = await self.async_client.get(reverse("task_calendar"))
+        self.assertContains(page, "new EventSource")
+        response = await self.async_client.get(reverse("task_events"), {"scope": "assigned"})
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b"retry: 5000\n\n")
+
+        live.get_broker().publish({live.user_channel(self.user.pk)}, {"type": "deleted", "task": {"id": 7}})
+        chunk = await asyncio.wait_for(anext(stream), 1)
+        self.assertEqual(chunk, b'event: deleted\ndata: {"type": "deleted", "task": {"id": 7}}\n\n')
+        await stream.aclose()
+
+    def test_no_stream_under_wsgi(self):
+        # WSGI can't send an endless async stream; pages don't open one.
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("task_events")).status_code, 204)
+        self.assertNotContains(self.client.get(reverse("task_list")), "new EventSource")
+
+
+class TaskActivityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", password="pass")
+        cls.alice = User.objects.create_user("alice")
+        cls.bob = User.objects.create_user("bob")
+        cls.tasks = [Task.objects.create(title=f"Task {i}", assigned_to=cls.alice) for i in range(3)]
+
+    def test_changes_are_buffered_and_written_together(self):
+        task = Task.objects.get(pk=self.tasks[0].pk)
+        with CaptureQueriesContext(connection) as queries, activity.buffered(self.admin):
+            with self.captureOnCommitCallbacks(execute=True):
+                task.status = "DONE"
+                task.save()
+                bulk_change_tasks(Task.objects.exclude(pk=task.pk), assigned_to=self.bob, shift_days=1)
+                try:
+                    with transaction.atomic():
+                        Task.objects.get(pk=self.tasks[1].pk).delete()
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+        inserts = [q for q in queries if q["sql"].startswith('INSERT INTO "core_taskactivity"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertFalse(TaskActivity.objects.filter(action=TaskActivity.Action.DELETED).exists())
+
+        entries = TaskActivity.objects.filter(action=TaskActivity.Action.UPDATED)
+        self.assertEqual(entries.count(), 3)
+        self.assertEqual(set(entries.values_list("actor_id", flat=True)), {self.admin.pk})
+        self.assertEqual(activity.unpack(entries.get(task=task).diff), {"status": ("TODO", "DONE")})
+        # Undated tasks stay undated, so only the assignee changed.
+        self.assertEqual(activity.unpack(entries.get(task=self.tasks[1]).diff), {"assigned_to_id": (self.alice.pk, self.bob.pk)})
+
+    def test_timeline_and_pruning(self):
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(title="Task", assigned_to=self.alice)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("task_update", args=[task.pk]), {
+                "title": "Renamed", "description": "", "assigned_to": self.bob.pk, "status": "TODO", "priority": "HIGH",
+            })
+        history = activity.timeline(task.pk)
+        self.assertEqual([item.action for item in history], [TaskActivity.Action.UPDATED, TaskActivity.Action.CREATED])
+        self.assertEqual(history[0].actor_name, "admin")
+        self.assertIn(("assigned to", "alice", "bob"), history[0].changes)
+        self.assertIn(("priority", "Medium", "High"), history[0].changes)
+        self.assertContains(self.client.get(reverse("task_update", args=[task.pk])), "alice → bob")
+
+        with self.settings(TASK_ACTIVITY_RETENTION_DAYS=30):
+            self.assertEqual(activity.prune(timezone.now() + timedelta(days=29)), 0)
+            self.assertEqual(activity.prune(timezone.now() + timedelta(days=31), batch_size=1), 2)
+        self.assertFalse(TaskActivity.objects.exists())
+
+
+class TaskDependencyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", password="pass")
+        cls.a, cls.b, cls.c, cls.d, cls.e = [
+            Task.objects.create(title=f"Task {name}", assigned_to=cls.admin) for name in "abcde"
+        ]
+
+    def statuses(self):
+        return dict(Task.objects.values_list("title", "status"))
+
+    def test_blocked_status_follows_blockers(self):
+        dependencies.add_dependency(self.a, self.b)
+        dependencies.add_dependency(self.b, self.c)
+        with self.assertRaises(ValidationError):
+            dependencies.add_dependency(self.c, self.a)
+        # Creating the edge directly doesn't get around the check.
+        with self.assertRaises(ValidationError):
+            TaskDependency.objects.create(blocker=self.c, blocked=self.a)
+        self.assertEqual(TaskDependency.objects.count(), 2)
+        self.assertEqual(self.statuses()["Task b"], "BLOCKED")
+        self.assertEqual(self.statuses()["Task c"], "BLOCKED")
+
+        # Only the direct dependents are looked at: c waits for b to be done.
+        # Their counters move by delta, without counting the task table.
+        self.a.status = "DONE"
+        with CaptureQueriesContext(connection) as queries:
+            self.a.save()
+        self.assertFalse([q for q in queries if "COUNT(" in q["sql"]])
+        self.assertEqual((self.statuses()["Task b"], self.statuses()["Task c"]), ("TODO", "BLOCKED"))
+        self.assertEqual(task_stats.get_stats(self.admin).blocked, 1)
+
+        bulk_change_tasks(Task.objects.filter(pk=self.b.pk), status="DONE")
+        self.assertEqual(self.statuses()["Task c"], "TODO")
+
+        bulk_change_tasks(Task.objects.filter(pk=self.b.pk), status="IN_PROGRESS")
+        self.assertEqual(self.statuses()["Task c"], "BLOCKED")
+        Task.objects.get(pk=self.b.pk).delete()
+        self.assertEqual(self.statuses()["Task c"], "TODO")
+
+    def test_work_in_progress_keeps_its_status(self):
+        Task.objects.filter(pk=self.b.pk).update(status="IN_PROGRESS")
+        dependencies.add_dependency(self.a, self.b)
+        self.assertEqual(self.statuses()["Task b"], "IN_PROGRESS")
+        self.assertEqual(list(dependencies.waiting_tasks(Task.objects.all())), [self.b])
+
+        bulk_change_tasks(Task.objects.filter(pk=self.a.pk), status="DONE")
+        self.assertEqual(self.statuses()["Task b"], "IN_PROGRESS")
+        self.assertFalse(dependencies.waiting_tasks(Task.objects.all()).exists())
+
+    def test_critical_path_cache_survives_unrelated_changes(self):
+        dependencies.add_dependency(self.a, self.b)
+        version = cache.get(dependencies.GRAPH_VERSION_KEY)
+        bulk_change_tasks(Task.objects.filter(pk=self.e.pk), status="DONE")
+        self.assertEqual(cache.get(dependencies.GRAPH_VERSION_KEY), version)
+
+        # The end of a chain has no dependents but is still on the path.
+        bulk_change_tasks(Task.objects.filter(pk=self.b.pk), status="DONE")
+        self.assertNotEqual(cache.get(dependencies.GRAPH_VERSION_KEY), version)
+
+    def test_task_list_filters(self):
+        # a -> b -> d and a -> c -> d, plus e -> d: the longest chain starts at a.
+        for blocker, blocked in ((self.a, self.b), (self.b, self.d), (self.a, self.c), (self.c, self.d), (self.e, self.d)):
+            TaskDependency.objects.create(blocker=blocker, blocked=blocked)
+        self.assertEqual(dependencies.critical_path(), [self.a.pk, self.b.pk, self.d.pk])
+
+        self.client.force_login(self.admin)
+        def listed(dependency):
+            response = self.client.get(reverse("task_list"), {"dependency": dependency, "sort": "title"})
+            return [task.title for task in response.context["page_obj"]]
+        self.assertEqual(listed("ready"), ["Task a", "Task e"])
+        self.assertEqual(listed("waiting"), ["Task b", "Task c", "Task d"])
+        self.assertEqual(listed("critical"), ["Task a", "Task b", "Task d"])
+
+        bulk_change_tasks(Task.objects.filter(pk=self.a.pk), status="DONE")
+        self.assertEqual(listed("ready"), ["Task b", "Task c", "Task e"])
+        self.assertEqual(listed("critical"), ["Task b", "Task d"])
@@ -0,0 +1,126 @@
+"""
+Profile image renditions.
+
+Uploads are stored once per distinct content: the original is saved as
+profiles/<sha256>.<ext>, so the same picture uploaded twice (or by two
+users) shares one file instead of piling up as download_XXXX.jpg copies.
+
+From each original a fixed set of square renditions is generated, in WebP
+and JPEG, with all metadata (EXIF, GPS, ICC, comments) stripped:
+
+    profiles/renditions/<sha256>/<size>.<format>
+
+The path is derived from the content, so a rendition never changes once
+written and `core.views.profile_image` serves it with a one-year
+immutable Cache-Control.
+
+ProfileUpdateForm builds renditions on save; `manage.py
+backfill_profile_images` processes images uploaded before this existed.
+"""
+import hashlib
+import io
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+ORIGINALS_DIR = 'profiles'
+RENDITIONS_DIR = 'profiles/renditions'
+
+# Square edge in pixels. The profile page shows 190px avatars; 'large' is
+# their 2x version for high-density screens.
+RENDITION_SIZES = {'small': 64, 'medium': 190, 'large': 380}
+
+# URL extension -> (Pillow format, content type, encoder options).
+RENDITION_FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 6}),
+    'jpg': ('JPEG', 'image/jpeg', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+RENDITION_MAX_AGE = 365 * 24 * 60 * 60
+
+ORIGINAL_EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif', 'BMP': 'bmp'}
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def content_hash(file):
+    """SHA-256 of a file-like object, leaving it rewound."""
+    file.seek(0)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def original_name(image_hash, image_format):
+    return f'{ORIGINALS_DIR}/{image_hash}.{ORIGINAL_EXTENSIONS.get(image_format, "img")}'
+
+
+def rendition_name(image_hash, size, fmt):
+    return f'{RENDITIONS_DIR}/{image_hash}/{size}.{fmt}'
+
+
+def store_original(file):
+    """
+    Save an image under its content hash unless that content is already
+    stored. Returns (storage name, hash).
+    """
+    image_hash = content_hash(file)
+    with Image.open(file) as image:
+        name = original_name(image_hash, image.format)
+    if not default_storage.exists(name):
+        file.seek(0)
+        name = default_storage.save(name, file)
+    return name, image_hash
+
+
+def generate_renditions(name, image_hash, force=False):
+    """
+    Write the missing renditions of the stored original `name` (all of
+    them with `force`). Returns the storage names written.
+    """
+    wanted = [
+        (size, fmt) for size in RENDITION_SIZES for fmt in RENDITION_FORMATS
+        if force or not default_storage.exists(rendition_name(image_hash, size, fmt))
+    ]
+    if not wanted:
+        return []
+
+    written = []
+    with default_storage.open(name, 'rb') as file, Image.open(file) as source:
+        image = ImageOps.exif_transpose(source)
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        for size, edge in RENDITION_SIZES.items():
+            fitted = ImageOps.fit(image, (edge, edge), Image.Resampling.LANCZOS)
+            # Resizing copies .info; clearing it keeps EXIF, ICC and
+            # comments out of the encoded file.
+            fitted.info = {}
+            for fmt, (pil_format, _, options) in RENDITION_FORMATS.items():
+                if (size, fmt) not in wanted:
+                    continue
+                encoded = fitted
+                if pil_format == 'JPEG' and fitted.mode == 'RGBA':
+                    encoded = Image.new('RGB', fitted.size, 'white')
+                    encoded.paste(fitted, mask=fitted.getchannel('A'))
+                buffer = io.BytesIO()
+                encoded.save(buffer, pil_format, **options)
+                target = rendition_name(image_hash, size, fmt)
+                if default_storage.exists(target):
+                    default_storage.delete(target)
+                written.append(default_storage.save(target, ContentFile(buffer.getvalue())))
+    return written
+
+
+def process_stored_image(name, force=False):
+    """
+    Deduplicate and render an image that is already in storage (the
+    backfill worker). Touches only storage, never the database, so it can
+    run in a separate process. Returns (name, canonical name, hash).
+    """
+    with default_storage.open(name, 'rb') as file:
+        canonical, image_hash = store_original(file)
+    generate_renditions(canonical, image_hash, force=force)
+    return name, canonical, image_hash
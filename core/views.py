@@ -4,7 +4,15 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from .forms import SignUpForm, ProfileUpdateForm, TaskForm
 from .models import Profile, Task
+from . import stats as task_stats
+from . import activity, live
 from django import forms # Needed for forms.HiddenInput
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
+from django.utils.cache import patch_cache_control
+from django.db import transaction
+from django.views.decorators.http import condition
+from . import thumbnails
 
 # --- General Views ---
 
@@ -19,8 +27,8 @@ def signup_view(request):
         if form.is_valid():
             user = form.save(commit=False)
             user.set_password(form.cleaned_data["password"])
-            user.save()
-            Profile.objects.create(user=user)
+            with transaction.atomic():
+                user.save()  # The post_save signal creates the Profile.
             return redirect("login")
     else:
         form = SignUpForm()
@@ -44,16 +52,41 @@ def logout_view(request):
 
 @login_required
 def dashboard(request):
-    return render(request, "dashboard.html")
+    # Summary cards for the user's own tasks, from the same counters as analytics.
+    summary = task_stats.get_summary(request.user, task_stats.user_scope(request.user.pk))
+    return render(request, "dashboard.html", {"summary": summary})
 
 @login_required
 def profile(request):
-    profile, created = Profile.objects.get_or_create(user=request.user)
-    return render(request, "profile.html", {"profile": profile})
+    # Loaded with request.user by core.auth.ProfileBackend.
+    return render(request, "profile.html", {"profile": request.user.profile})
+
+def _profile_image_etag(request, image_hash, size, fmt):
+    return f"{image_hash}-{size}-{fmt}"
+
+
+@condition(etag_func=_profile_image_etag)
+def profile_image(request, image_hash, size, fmt):
+    """
+    A profile image rendition. The URL is derived from the image content,
+    so the response never changes and is cacheable for a year. Missing
+    renditions of a known image are generated on first request.
+    """
+    if size not in thumbnails.RENDITION_SIZES or fmt not in thumbnails.RENDITION_FORMATS:
+        raise Http404
+    name = thumbnails.rendition_name(image_hash, size, fmt)
+    if not default_storage.exists(name):
+        owner = Profile.objects.filter(image_hash=image_hash).exclude(profile_image="").first()
+        if owner is None:
+            raise Http404
+        thumbnails.generate_renditions(owner.profile_image.name, image_hash)
+    response = FileResponse(default_storage.open(name, "rb"), content_type=thumbnails.RENDITION_FORMATS[fmt][1])
+    patch_cache_control(response, public=True, max_age=thumbnails.RENDITION_MAX_AGE, immutable=True)
+    return response
 
 @login_required
 def settings_page(request):
-    profile, created = Profile.objects.get_or_create(user=request.user)
+    profile = request.user.profile
 
     if request.method == "POST":
         form = ProfileUpdateForm(request.POST, request.FILES, instance=profile)
@@ -74,150 +107,183 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.db.models import Q, Count
+from django.db.models import Count
+from django.db.models.functions import Substr
 from django.utils import timezone
 from .forms import SignUpForm, ProfileUpdateForm, TaskForm
 from .models import Profile, Task
+from django.conf import settings
 from django.core.paginator import Paginator
+from .dates import day_window, due_within, start_of_day
+from urllib.parse import urlencode
+from .pagination import KeysetPaginator, KnownCountPaginator, approximate_count
+from .routers import reads_from_replica
+from .filters import filter_params, filter_tasks
+from .export import FORMATS as EXPORT_FORMATS, export_filename, export_stream
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.contrib import messages
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views.decorators.http import require_POST
+from .bulk import bulk_change_tasks
+from .forms import TaskBulkChangeForm
 
 # ... (keep your existing views up to task_list)
 
+TASK_LIST_PAGE_SIZE = 10
+
+# Columns rendered by tasks/task_list.html. The description is only shown
+# as a 60 character preview, which is annotated instead of loaded in full.
+# Every sort column is loaded too: KeysetPaginator reads the cursor off it.
+TASK_LIST_FIELDS = (
+    'id', 'title', 'status', 'priority', 'due_date', 'overdue_since', 'created_at', 'updated_at',
+    'assigned_to__id', 'assigned_to__username',
+    'assigned_to__first_name', 'assigned_to__last_name',
+)
+
+# The filter dropdowns' options, built once instead of on every request.
+TASK_LIST_STATUS_CHOICES = tuple(Task.Status.choices)
+TASK_LIST_PRIORITY_CHOICES = tuple(Task.Priority.choices)
+TASK_LIST_DATE_FILTER_OPTIONS = (
+    ('all', 'All Dates'),
+    ('today', 'Today'),
+    ('tomorrow', 'Tomorrow'),
+    ('week', 'Next 7 Days'),
+    ('overdue', 'Overdue'),
+    ('no_date', 'No Due Date'),
+)
+TASK_LIST_DEPENDENCY_FILTER_OPTIONS = (
+    ('all', 'All Tasks'),
+    ('ready', 'Ready to Start'),
+    ('waiting', 'Waiting on Others'),
+    ('critical', 'Critical Path'),
+)
+TASK_LIST_SORT_OPTIONS = (
+    ('due_date', 'Due Date (Oldest First)'),
+    ('-due_date', 'Due Date (Newest First)'),
+    ('priority', 'Priority (Low to High)'),
+    ('-priority', 'Priority (High to Low)'),
+    ('created_at', 'Created (Oldest First)'),
+    ('-created_at', 'Created (Newest First)'),
+    ('title', 'Title (A-Z)'),
+    ('-title', 'Title (Z-A)'),
+    ('status', 'Status'),
+    ('relevance', 'Best Match (Search)'),
+)
+
 @login_required
+@reads_from_replica
 def task_list(request):
     """
     Enhanced task list with search, filter, and pagination
+
+    Query budget (independent of page size and table size):
+    session + user, 1 COUNT, 1 page SELECT (joined with the assignee),
+    plus 1 user list for the admin filter dropdown.
     """
-    # Determine base queryset based on user role
-    if request.user.is_superuser:
-        tasks = Task.objects.all()
-        page_title = "All System Tasks"
-    else:
-        tasks = Task.objects.filter(assigned_to=request.user)
-        page_title = "My Assigned Tasks"
-    
-    # Initialize filter variables
-    search_query = ''
-    status_filter = ''
-    priority_filter = ''
-    assigned_to_filter = ''
-    date_filter = ''
-    sort_by = request.GET.get('sort', 'due_date')
-    
-    # ----- SEARCH FUNCTIONALITY -----
-    if 'q' in request.GET:
-        search_query = request.GET.get('q', '').strip()
-        if search_query:
-            tasks = tasks.filter(
-                Q(title__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(assigned_to__username__icontains=search_query) |
-                Q(assigned_to__first_name__icontains=search_query) |
-                Q(assigned_to__last_name__icontains=search_query)
-            )
-    
-    # ----- FILTER BY STATUS -----
-    if 'status' in request.GET:
-        status_filter = request.GET.get('status')
-        if status_filter and status_filter != 'all':
-            tasks = tasks.filter(status=status_filter)
-    
-    # ----- FILTER BY PRIORITY -----
-    if 'priority' in request.GET:
-        priority_filter = request.GET.get('priority')
-        if priority_filter and priority_filter != 'all':
-            tasks = tasks.filter(priority=priority_filter)
-    
-    # ----- FILTER BY ASSIGNED USER (Admin only) -----
-    if request.user.is_superuser and 'assigned_to' in request.GET:
-        assigned_to_filter = request.GET.get('assigned_to')
-        if assigned_to_filter and assigned_to_filter != 'all':
-            tasks = tasks.filter(assigned_to__id=assigned_to_filter)
-    
-    # ----- FILTER BY DATE -----
-    if 'date_filter' in request.GET:
-        date_filter = request.GET.get('date_filter')
-        today = timezone.now().date()
-        
-        if date_filter == 'today':
-            tasks = tasks.filter(due_date__date=today)
-        elif date_filter == 'tomorrow':
-            tasks = tasks.filter(due_date__date=today + timezone.timedelta(days=1))
-        elif date_filter == 'week':
-            end_date = today + timezone.timedelta(days=7)
-            tasks = tasks.filter(due_date__date__range=[today, end_date])
-        elif date_filter == 'overdue':
-            tasks = tasks.filter(due_date__lt=timezone.now(), status__in=['TODO', 'IN_PROGRESS', 'BLOCKED'])
-        elif date_filter == 'no_date':
-            tasks = tasks.filter(due_date__isnull=True)
-    
-    # ----- SORTING FUNCTIONALITY -----
-    sort_options = {
-        'due_date': 'due_date',  # Ascending: oldest first
-        '-due_date': '-due_date',  # Descending: newest first
-        'priority': 'priority',  # Low to High (LOW, MEDIUM, HIGH, CRITICAL)
-        '-priority': '-priority',  # High to Low (CRITICAL, HIGH, MEDIUM, LOW)
-        'created_at': 'created_at',  # Oldest first
-        '-created_at': '-created_at',  # Newest first
-        'title': 'title',  # A-Z
-        '-title': '-title',  # Z-A
-        'status': 'status',  # Status order
-    }
-    
-    # Default to sorting by due_date if invalid sort option
-    sort_by = sort_options.get(sort_by, 'due_date')
-    tasks = tasks.order_by(sort_by)
+    # Only load the columns the row template renders; the assignee comes
+    # from the same JOIN instead of one query per row.
+    tasks = Task.objects.select_related('assigned_to').only(*TASK_LIST_FIELDS).annotate(
+        description_preview=Substr('description', 1, 61),
+    )
+
+    page_title = "All System Tasks" if request.user.is_superuser else "My Assigned Tasks"
+
+    # Search, filters and sorting; shared with the export (core.filters).
+    tasks, filters = filter_tasks(tasks, request.GET, request.user)
+    search_query = filters['search_query']
+    status_filter = filters['status_filter']
+    priority_filter = filters['priority_filter']
+    assigned_to_filter = filters['assigned_to_filter']
+    date_filter = filters['date_filter']
+    dependency_filter = filters['dependency_filter']
+    sort_by = filters['sort_by']
     
     # ----- PAGINATION -----
-    paginator = Paginator(tasks, 10)  # Show 10 tasks per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Small result sets keep the numbered pages. Once the (bounded) count
+    # passes the threshold, or a cursor is requested, switch to keyset
+    # pagination so deep pages don't pay for an OFFSET scan.
+    cursor = request.GET.get('cursor')
+    filtered_tasks_count, count_is_exact = approximate_count(tasks, settings.TASK_LIST_KEYSET_THRESHOLD)
+    if count_is_exact and not cursor:
+        pagination_mode = 'page'
+        paginator = KnownCountPaginator(tasks, TASK_LIST_PAGE_SIZE, filtered_tasks_count)
+        page_obj = paginator.get_page(request.GET.get('page'))
+    elif sort_by == 'relevance':
+        # Relevance has no column to key on; search results are selective
+        # enough for numbered pages with an exact count.
+        pagination_mode = 'page'
+        page_obj = Paginator(tasks, TASK_LIST_PAGE_SIZE).get_page(request.GET.get('page'))
+        filtered_tasks_count, count_is_exact = page_obj.paginator.count, True
+    else:
+        pagination_mode = 'cursor'
+        if not count_is_exact and not settings.TASK_LIST_APPROXIMATE_COUNT:
+            filtered_tasks_count, count_is_exact = tasks.count(), True
+        page_obj = KeysetPaginator(tasks, sort_by, TASK_LIST_PAGE_SIZE).page(cursor)
     
     # Get all users for admin filter dropdown
-    users = User.objects.all().order_by('username') if request.user.is_superuser else None
+    users = User.objects.only('id', 'username').order_by('username') if request.user.is_superuser else None
     
     # Get filter counts for active filters
-    total_tasks = tasks.count()
-    filtered_tasks_count = page_obj.paginator.count
+    # The count above already covers the filtered set; don't COUNT it twice.
+    total_tasks = filtered_tasks_count
+
+    # Active filters, carried over by the pagination and export links.
+    filter_querystring = urlencode(filter_params(filters))
     
     context = {
         'page_obj': page_obj,
+        'pagination_mode': pagination_mode,
+        'count_is_exact': count_is_exact,
+        'filter_querystring': filter_querystring,
         'search_query': search_query,
         'status_filter': status_filter,
         'priority_filter': priority_filter,
         'assigned_to_filter': assigned_to_filter,
         'date_filter': date_filter,
+        'dependency_filter': dependency_filter,
         'sort_by': sort_by,
         'users': users,
         'total_tasks': total_tasks,
         'filtered_tasks_count': filtered_tasks_count,
-        'status_choices': Task.Status.choices,
-        'priority_choices': Task.Priority.choices,
+        'status_choices': TASK_LIST_STATUS_CHOICES,
+        'priority_choices': TASK_LIST_PRIORITY_CHOICES,
         'page_title': page_title,
         'is_admin': request.user.is_superuser,
-        'date_filter_options': [
-            ('all', 'All Dates'),
-            ('today', 'Today'),
-            ('tomorrow', 'Tomorrow'),
-            ('week', 'Next 7 Days'),
-            ('overdue', 'Overdue'),
-            ('no_date', 'No Due Date'),
-        ],
-        'sort_options': [
-            ('due_date', 'Due Date (Oldest First)'),
-            ('-due_date', 'Due Date (Newest First)'),
-            ('priority', 'Priority (Low to High)'),
-            ('-priority', 'Priority (High to Low)'),
-            ('created_at', 'Created (Oldest First)'),
-            ('-created_at', 'Created (Newest First)'),
-            ('title', 'Title (A-Z)'),
-            ('-title', 'Title (Z-A)'),
-            ('status', 'Status'),
-        ],
+        'bulk_operations': TaskBulkChangeForm.OPERATIONS,
+        'date_filter_options': TASK_LIST_DATE_FILTER_OPTIONS,
+        'dependency_filter_options': TASK_LIST_DEPENDENCY_FILTER_OPTIONS,
+        'sort_options': TASK_LIST_SORT_OPTIONS,
+        'live_updates': live.available(request),
     }
     
     return render(request, "tasks/task_list.html", context)
 
 
+@login_required
+@reads_from_replica
+def task_export(request):
+    """
+    Stream every task matching the task_list filters in the query string
+    as ?format=csv (default) or jsonl, gzip-compressed with ?gzip=1.
+    """
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return HttpResponseBadRequest("Expected ?format=csv or ?format=jsonl")
+    compress = request.GET.get('gzip') == '1'
+
+    tasks, _ = filter_tasks(Task.objects.all(), request.GET, request.user)
+    # Rows are read after the view returns, outside reads_from_replica(),
+    # so bind the queryset to the database chosen now.
+    tasks = tasks.using(tasks.db)
+
+    response = StreamingHttpResponse(
+        export_stream(tasks, fmt, compress),
+        content_type='application/gzip' if compress else EXPORT_FORMATS[fmt][0],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(fmt, compress)}"'
+    return response
+
+
 
 
 @login_required
@@ -274,41 +340,62 @@ def task_update(request, pk):
     else:
         form = TaskForm(instance=task)
         
-    context = {'form': form, 'page_title': f'Edit Task: {task.title}', 'is_admin': request.user.is_superuser}
+    context = {
+        'form': form,
+        'page_title': f'Edit Task: {task.title}',
+        'is_admin': request.user.is_superuser,
+        'activity': activity.timeline(task.pk, limit=20),
+    }
     return render(request, "tasks/task_form.html", context)
 
 
+@login_required
+@require_POST
+def task_bulk_action(request):
+    """
+    Apply one change to the tasks ticked in the task list, as set-based
+    UPDATEs (see core.bulk). Superusers only, like task_update.
+    """
+    if not request.user.is_superuser:
+        return redirect("task_list")
+
+    form = TaskBulkChangeForm(request.POST)
+    task_ids = [pk for pk in request.POST.getlist("task_ids") if pk.isdigit()]
+    if not task_ids:
+        messages.error(request, "Select at least one task.")
+    elif not form.is_valid():
+        for error in form.non_field_errors() or form.errors.values():
+            messages.error(request, error)
+    else:
+        count = bulk_change_tasks(Task.objects.filter(pk__in=task_ids), **form.changes())
+        messages.success(request, f"Updated {count} task(s).")
+
+    next_url = request.POST.get("next")
+    if next_url and url_has_allowed_host_and_scheme(next_url, {request.get_host()}, request.is_secure()):
+        return redirect(next_url)
+    return redirect("task_list")
+
+
 
 
 from django.db.models import Count # Import Count function
 from django.utils import timezone # Import timezone for overdue check
 
 @login_required
+@reads_from_replica
 def analytics_page(request):
-    # Determine the set of tasks to analyze (all for admin, assigned for normal user)
-    if request.user.is_superuser:
-        all_tasks = Task.objects.all()
-    else:
-        all_tasks = Task.objects.filter(assigned_to=request.user)
-    
-    # 1. Status Counts
-    status_summary = all_tasks.values('status').annotate(count=Count('status')).order_by()
-    
-    # 2. Priority Counts
-    priority_summary = all_tasks.values('priority').annotate(count=Count('priority')).order_by()
-    
-    # 3. Overdue Count
-    # Overdue tasks are those past the due date and not marked as DONE
-    overdue_count = all_tasks.filter(
-        due_date__lt=timezone.now(),
-        status__in=['TODO', 'IN_PROGRESS', 'BLOCKED']
-    ).count()
+    """
+    Served from the precomputed TaskStats row for the user's scope (see
+    core.stats) as a TaskSummary the template indexes directly. Query
+    budget: session + user and 1 SELECT, plus 1 overdue COUNT and 1 UPDATE
+    when the overdue figure is past its staleness bound.
+    """
+    summary = task_stats.get_summary(request.user)
 
     context = {
-        'total_tasks': all_tasks.count(),
-        'status_summary': status_summary,
-        'priority_summary': priority_summary,
-        'overdue_count': overdue_count,
+        'summary': summary,
+        'total_tasks': summary['total'],
+        'overdue_count': summary['overdue'],
         'is_admin': request.user.is_superuser
     }
     return render(request, "analytics.html", context)
@@ -317,60 +404,193 @@ def analytics_page(request):
 
 
 import json
-from datetime import datetime
+from django.db.models import Max
 from django.http import JsonResponse
-from django.shortcuts import render
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.shortcuts import aget_object_or_404, render
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.contrib.auth.decorators import login_required
 from .models import Task
 
 
 @login_required
 def task_calendar(request):
-    return render(request, "tasks/calendar.html")
+    return render(request, "tasks/calendar.html", {'live_updates': live.available(request)})
+
+
+def _calendar_window(request):
+    """
+    The [start, end) range FullCalendar asks for, as aware datetimes.
+    Either bound may be missing (older clients fetch everything).
+    """
+    bounds = []
+    for name in ("start", "end"):
+        value = request.GET.get(name, "").replace(" ", "+")  # "+" of a UTC offset decodes to a space
+        try:
+            parsed = parse_datetime(value) if value else None
+            if parsed is None and value:
+                day = parse_date(value[:10])
+                parsed = start_of_day(day) if day else None
+        except ValueError:  # well formed but out of range, e.g. 2024-13-01
+            parsed = None
+        if parsed is not None and timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        bounds.append(parsed)
+    return bounds
+
+
+async def _calendar_state(user):
+    """
+    (task count, latest updated_at) over all of the user's tasks, for the
+    ETag and Last-Modified. The count catches deletions and reassignments
+    that lower the maximum.
+    """
+    state = await Task.objects.filter(assigned_to=user).aaggregate(
+        count=Count("id"), latest=Max("updated_at"),
+    )
+    return state["count"], state["latest"]
+
+
+def _task_event(task_id, title, due_date, status, priority):
+    return {
+        "id": task_id,
+        "title": title,
+        "start": due_date.isoformat(),
+        "extendedProps": {
+            "status": status,
+            "priority": priority,
+        },
+        "color": (
+            "#28a745" if status == "DONE" else
+            "#dc3545" if priority == "CRITICAL" else
+            "#1E90FF"
+        )
+    }
 
 
 @login_required
-def task_calendar_events(request):
-    tasks = Task.objects.filter(assigned_to=request.user, due_date__isnull=False)
-
-    events = []
-    for task in tasks:
-        events.append({
-            "id": task.id,
-            "title": task.title,
-            "start": task.due_date.isoformat(),
-            "extendedProps": {
-                "status": task.status,
-                "priority": task.priority,
-                "description": task.description or ""
-            },
-            "color": (
-                "#28a745" if task.status == "DONE" else
-                "#dc3545" if task.priority == "CRITICAL" else
-                "#1E90FF"
-            )
-        })
+@reads_from_replica
+@cache_control(private=True, no_cache=True)
+async def task_calendar_events(request):
+    """
+    Events in the visible [start, end) window. Descriptions are left out of
+    the bulk payload; the calendar fetches them per task from task_detail.
+
+    Async: the calendar polls this often, and under ASGI it no longer ties
+    up a worker thread while waiting on the database.
 
-    return JsonResponse(events, safe=False)
+    Query budget: session + user, 1 aggregate for the ETag/Last-Modified
+    check (unchanged data stops here with a 304) and 1 SELECT of the event
+    columns.
+    """
+    user = await request.auser()
+    count, latest = await _calendar_state(user)
+    # What @condition does; it can't await the aggregate.
+    etag = quote_etag(f'{user.pk}-{count}-{latest.timestamp() if latest else 0}-{request.GET.urlencode()}')
+    last_modified = int(latest.timestamp()) if latest else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+    if response is None:
+        start, end = _calendar_window(request)
+        tasks = Task.objects.filter(assigned_to=user, due_date__isnull=False)
+        if start:
+            tasks = tasks.filter(due_date__gte=start)
+        if end:
+            tasks = tasks.filter(due_date__lt=end)
+        tasks = tasks.order_by('due_date').values_list('id', 'title', 'due_date', 'status', 'priority')
+        # `async for` fetches the window in one worker-thread hop. (In
+        # Django 5.2, values_list().aiterator() runs its SQL on the event
+        # loop and raises SynchronousOnlyOperation.)
+        events = [_task_event(*row) async for row in tasks]
+        response = JsonResponse(events, safe=False)
+
+    if request.method in ("GET", "HEAD"):
+        if last_modified:
+            response.headers.setdefault("Last-Modified", http_date(last_modified))
+        response.headers.setdefault("ETag", etag)
+    return response
 
 
 @login_required
-def tasks_by_date(request):
-    date_str = request.GET.get("date")
-    selected_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+async def task_detail(request, pk):
+    """
+    A single task as JSON, for the calendar's lazily loaded details.
+    Users can only read their own tasks; admins can read any task.
+    """
+    user = await request.auser()
+    tasks = Task.objects.all() if user.is_superuser else Task.objects.filter(assigned_to=user)
+    task = await aget_object_or_404(
+        tasks.values('id', 'title', 'description', 'status', 'priority', 'due_date'), pk=pk
+    )
+    task["description"] = task["description"] or ""
+    return JsonResponse(task)
+
 
+@login_required
+@reads_from_replica
+async def tasks_by_date(request):
+    try:
+        selected_date = parse_date(request.GET.get("date") or "")
+    except ValueError:  # well formed but not a real day, e.g. 2024-02-30
+        selected_date = None
+    if selected_date is None:
+        return JsonResponse({"error": "Expected ?date=YYYY-MM-DD"}, status=400)
+
+    # Query budget: session + user and 1 SELECT of the listed columns.
+    user = await request.auser()
     tasks = Task.objects.filter(
-        assigned_to=request.user,
-        due_date__date=selected_date
-    )
+        due_within(day_window(selected_date)),
+        assigned_to=user,
+    ).values('title', 'status', 'priority', 'description')
 
     data = []
-    for task in tasks:
+    async for task in tasks:
         data.append({
-            "title": task.title,
-            "status": task.status,
-            "priority": task.priority,
-            "description": task.description or "",
+            "title": task["title"],
+            "status": task["status"],
+            "priority": task["priority"],
+            "description": task["description"] or "",
         })
 
     return JsonResponse(data, safe=False)
+
+
+from django.http import HttpResponse, HttpResponseForbidden
+from . import perf
+
+
+@login_required
+def perf_stats(request):
+    """
+    This process's request histogram (core.perf) as JSON, slowest views
+    first. Superusers only; ?reset=1 clears it after reading.
+    """
+    if not request.user.is_superuser:
+        return HttpResponseForbidden()
+    views = perf.summarize(perf.HISTOGRAM.snapshot())
+    if request.GET.get("reset") == "1":
+        perf.HISTOGRAM.reset()
+    return JsonResponse({"buckets_ms": perf.BUCKETS_MS, "views": views})
+
+
+
+@login_required
+async def task_events(request):
+    """
+    Server-Sent Events with task deltas for the viewer (see core.live):
+    their own tasks, plus every task for superusers unless ?scope=assigned
+    (the calendar). ASGI only: a WSGI request gets 204 No Content, which
+    stops EventSource from reconnecting (see core.live).
+    """
+    if not live.available(request):
+        return HttpResponse(status=204)
+    user = await request.auser()
+    channels = live.channels_for(user, assigned_only=request.GET.get("scope") == "assigned")
+    return StreamingHttpResponse(
+        live.event_stream(channels),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
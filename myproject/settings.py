@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -23,9 +24,10 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-lirv-l)@(&8)kja8=07)3@1gsrg+7-g$79(com%_)o99!3rdhc'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# DJANGO_DEBUG=0 for production.
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = list(filter(None, os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',')))
 
 
 # Application definition
@@ -42,11 +44,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.perf.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.routers.ReplicaPinningMiddleware',
+    'core.middleware.ActivityMiddleware',
+    'core.middleware.UserTimezoneMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -57,10 +63,20 @@ ROOT_URLCONF = 'myproject.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that also times renders for core.perf.
+        'BACKEND': 'core.perf.InstrumentedDjangoTemplates',
         'DIRS': [], # You can optionally define global template dirs here
-        'APP_DIRS': True, # **THIS MUST BE TRUE**
         'OPTIONS': {
+            # Templates are parsed once per process and kept compiled. The
+            # development server's autoreloader still resets the cache when
+            # a template file changes, so this is safe with DEBUG on.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+            'debug': DEBUG,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -74,15 +90,147 @@ TEMPLATES = [
 WSGI_APPLICATION = 'myproject.wsgi.application'
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# 'template_fragments' holds rendered {% cache %} fragments (task list rows
+# and filter dropdowns); their keys include what they depend on, such as
+# the task's updated_at, so entries are never invalidated, only evicted.
+# 'sessions' backs the cache session engines below and is never evicted
+# for space. All are per-process memory caches; point them at a shared
+# backend (Redis, Memcached) when running several processes.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template-fragments',
+        'TIMEOUT': 24 * 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 20_000},
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 1_000_000},
+    },
+}
+
+
+# Sessions
+# Chosen with SESSION_STORE:
+#   cached_db (default) read from the 'sessions' cache, written through to
+#             the database; survives cache restarts.
+#   cache     the 'sessions' cache only: no database query at all, but a
+#             cache flush (or, with the default per-process cache, a second
+#             process) logs everyone out.
+#   db        the database on every request, as Django does by default.
+
+SESSION_STORE = os.environ.get('SESSION_STORE', 'cached_db')
+SESSION_ENGINE = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'db': 'django.contrib.sessions.backends.db',
+}[SESSION_STORE]
+SESSION_CACHE_ALIAS = 'sessions'
+
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+#
+# Chosen with DB_PROFILE:
+#   sqlite   (default) db.sqlite3 in WAL mode, tuned for concurrent readers
+#            and writers. DB_SQLITE_TUNING=0 restores SQLite's defaults.
+#   postgres PostgreSQL via psycopg 3, configured with DB_NAME, DB_USER,
+#            DB_PASSWORD, DB_HOST and DB_PORT. DB_POOL=1 (default) uses
+#            psycopg's connection pool; DB_POOL=0 keeps persistent
+#            per-thread connections for DB_CONN_MAX_AGE seconds instead.
+
+DB_PROFILE = os.environ.get('DB_PROFILE', 'sqlite')
+
+if DB_PROFILE == 'postgres':
+    DB_POOL = os.environ.get('DB_POOL', '1') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'taskmanager'),
+            'USER': os.environ.get('DB_USER', 'taskmanager'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # The pool owns connection lifetimes; Django refuses to combine
+            # it with persistent connections.
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+                    'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '20')),
+                    'timeout': int(os.environ.get('DB_POOL_TIMEOUT', '10')),
+                },
+            } if DB_POOL else {},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # WAL lets readers run alongside the single writer; NORMAL
+                # sync is durable across app crashes (only an OS crash can
+                # lose the last transactions). Writers wait up to 5s for the
+                # lock instead of failing, and BEGIN IMMEDIATE takes it up
+                # front so read-then-write transactions can't deadlock.
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA busy_timeout=5000;'
+                    'PRAGMA mmap_size=268435456;'
+                    'PRAGMA cache_size=-65536;'
+                    'PRAGMA temp_store=MEMORY;'
+                ),
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 5,
+            } if os.environ.get('DB_SQLITE_TUNING', '1') == '1' else {},
+        }
+    }
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Read replicas (core.routers)
+# DB_REPLICAS is a comma-separated list of replica database names (SQLite
+# file paths, or PostgreSQL database names on DB_REPLICA_HOST, which
+# defaults to the primary's host). Each becomes a 'replicaN' alias with the
+# primary's settings otherwise. Replication itself is up to the database;
+# for a local try-out, copy db.sqlite3 or clone the Postgres database.
+# Under the test runner replicas mirror the test database, but the suite's
+# query budgets assume the default single-database setup.
+
+DATABASE_REPLICAS = []
+for number, name in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(',')), start=1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': name.strip(),
+        'TEST': {'MIRROR': 'default'},
     }
-}
+    if DB_PROFILE == 'postgres':
+        DATABASES[alias]['HOST'] = os.environ.get('DB_REPLICA_HOST', DATABASES['default']['HOST'])
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# After a write, the user's reads stay on the primary for this long so
+# they see their own changes despite replication lag.
+DATABASE_REPLICA_PIN_SECONDS = 10
+
+
+# Authentication
+# core.auth.ProfileBackend loads request.user together with its Profile in
+# one joined query.
+
+AUTHENTICATION_BACKENDS = ['core.auth.ProfileBackend']
 
 
 # Password validation
@@ -131,4 +279,77 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
 
-
+# Task list pagination
+# Result sets larger than this switch from numbered pages to keyset (cursor)
+# pagination, and the exact COUNT(*) is replaced by an estimate unless
+# TASK_LIST_APPROXIMATE_COUNT is turned off.
+TASK_LIST_KEYSET_THRESHOLD = 1000
+TASK_LIST_APPROXIMATE_COUNT = True
+
+# Analytics counters (core.stats)
+# The overdue count is recounted after a write or an overdue sweep touches
+# the scope, and otherwise when older than this many seconds.
+TASK_STATS_OVERDUE_MAX_AGE = 60
+
+# Background jobs (core.jobs, `manage.py run_jobs`)
+# The overdue sweep (core.overdue) flags tasks that passed their due date
+# and queues reminders for tasks due within TASK_REMINDER_LEAD_SECONDS.
+# Tasks are flagged at most this many seconds late.
+TASK_OVERDUE_SWEEP_SECONDS = 60
+TASK_REMINDER_LEAD_SECONDS = 24 * 60 * 60
+# Rows per UPDATE/INSERT batch in the jobs.
+TASK_JOBS_BATCH_SIZE = 1000
+
+# Notifications (core.notifications)
+# Assignment notices and reminders wait in an outbox and go out as one
+# digest per user every TASK_NOTIFY_DIGEST_SECONDS. A failed digest is
+# retried after TASK_NOTIFY_RETRY_SECONDS, doubling each time, and given
+# up after TASK_NOTIFY_MAX_ATTEMPTS.
+TASK_NOTIFY_DIGEST_SECONDS = 5 * 60
+TASK_NOTIFY_RETRY_SECONDS = 60
+TASK_NOTIFY_MAX_ATTEMPTS = 8
+
+# Task activity log (core.activity)
+# Entries older than TASK_ACTIVITY_RETENTION_DAYS (None: keep them all)
+# are deleted every TASK_ACTIVITY_PRUNE_SECONDS by the activity_prune job.
+TASK_ACTIVITY_RETENTION_DAYS = 365
+TASK_ACTIVITY_PRUNE_SECONDS = 24 * 60 * 60
+
+# Email
+# With DEBUG on, mail is written to files in EMAIL_FILE_PATH instead of
+# being sent. Otherwise it goes to the SMTP server in EMAIL_HOST etc.
+EMAIL_BACKEND = os.environ.get(
+    'EMAIL_BACKEND',
+    'django.core.mail.backends.filebased.EmailBackend' if DEBUG else 'django.core.mail.backends.smtp.EmailBackend',
+)
+EMAIL_FILE_PATH = os.environ.get('EMAIL_FILE_PATH', BASE_DIR / 'sent_emails')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '0') == '1'
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'Task Manager <tasks@localhost>')
+
+# Task admin (core.admin.TaskAdmin)
+# For tables too large for exact counts and the created_at date hierarchy:
+# the changelist count is estimated past 10,000 rows and the hierarchy is
+# dropped. Turn off on small installs to get both back.
+TASK_ADMIN_LARGE_TABLES = True
+
+# Request instrumentation (core.perf)
+# Per-view timings are collected unless PERF_INSTRUMENTATION=0. Queries
+# slower than PERF_SLOW_QUERY_MS are logged to the 'core.perf' logger (a
+# PERF_SLOW_QUERY_SAMPLE_RATE fraction of them). With PERF_STATS_DIR set,
+# each process writes its histogram there for `manage.py perf_stats`.
+PERF_INSTRUMENTATION = os.environ.get('PERF_INSTRUMENTATION', '1') == '1'
+PERF_SERVER_TIMING = os.environ.get('PERF_SERVER_TIMING', '1' if DEBUG else '0') == '1'
+PERF_SLOW_QUERY_MS = float(os.environ.get('PERF_SLOW_QUERY_MS', '100'))
+PERF_SLOW_QUERY_SAMPLE_RATE = float(os.environ.get('PERF_SLOW_QUERY_SAMPLE_RATE', '1.0'))
+PERF_STATS_DIR = os.environ.get('PERF_STATS_DIR') or None
+PERF_STATS_FLUSH_SECONDS = 30
+
+# Live task updates (core.live)
+# 'core.live.LocalBroker' reaches the event streams of the same process;
+# with several ASGI workers on PostgreSQL use 'core.live.PostgresBroker'.
+TASK_EVENTS_BROKER = os.environ.get('TASK_EVENTS_BROKER', 'core.live.LocalBroker')
+TASK_EVENTS_HEARTBEAT_SECONDS = 15